@@ -0,0 +1,85 @@
+# benchmarks/analysis_memory.py
+"""
+Memory of one SMC analysis: the working set (smc_working_set: no copy of the candles,
+int8 flags, categorical tags) against the former path that copied the DataFrame and
+added ~20 int64 / float64 / object columns to it (analyze_smc_features + populate_*).
+
+For each size reports the derived bytes kept, the tracemalloc peak and the time of one
+analysis, and the peak of a scan running --workers analyses at once in threads.
+
+    python -m benchmarks.analysis_memory --bars 1000,10000,100000 --symbols 50 --workers 8
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.analysis import AdvancedSMC, analyze_smc_features, smc_working_set
+from src.core.synthetic_data import KINDS, synthetic_dataframe
+
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+def _frame_path(df):
+    smc = AdvancedSMC()
+    return smc.populate_exit_trend(smc.populate_entry_trend_simple(analyze_smc_features(df.copy())))
+
+
+def _working_set_path(df):
+    return smc_working_set(df)
+
+
+def _derived_bytes(result) -> int:
+    if isinstance(result, dict):
+        return sum(a.nbytes for col, a in result.items() if col not in CANDLE_COLUMNS)
+    # The copied frame holds the candles again on top of the derived columns
+    return int(result.memory_usage(index=True, deep=True).sum())
+
+
+def _peak(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, seconds
+
+
+def _scan_peak(fn, frames, workers: int) -> int:
+    def scan():
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(fn, frames))
+    return _peak(scan)[1]
+
+
+def run(args) -> dict:
+    paths = {'frame': _frame_path, 'working_set': _working_set_path}
+    report = {'workers': args.workers, 'symbols': args.symbols, 'sizes': {}}
+    for bars in (int(b) for b in args.bars.split(',')):
+        df = synthetic_dataframe('trending', bars, seed=0)
+        frames = [synthetic_dataframe(KINDS[i % len(KINDS)], bars, seed=i) for i in range(args.symbols)]
+        sizes = {}
+        for name, fn in paths.items():
+            fn(df)  # warm up
+            result, peak, seconds = _peak(fn, df)
+            sizes[name] = {'derived_bytes': _derived_bytes(result), 'peak_bytes': peak,
+                           'ms': round(seconds * 1e3, 2),
+                           'scan_peak_bytes': _scan_peak(fn, frames, args.workers)}
+        sizes['peak_ratio'] = round(sizes['working_set']['peak_bytes'] / sizes['frame']['peak_bytes'], 3)
+        report['sizes'][bars] = sizes
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', default='1000,10000,100000')
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/analysis_results.py
+"""
+Size and pickling cost of the SMC analysis results (src/core/smc_results.py) for a
+scan's worth of symbols: the typed records, their to_dict() form, and the former
+nested dicts holding numpy scalars. Reports the deep size of one cached analysis and
+pickle dumps/loads time and bytes (what the process pool and caches pay per result).
+
+    python -m benchmarks.analysis_results --symbols 250 --bars 500
+"""
+import argparse
+import json
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from src.core.analysis import AdvancedSMC
+from src.core.smc_results import to_plain
+from src.core.synthetic_data import KINDS, synthetic_dataframe
+
+
+def deep_size(obj, seen=None) -> int:
+    """sys.getsizeof of obj and everything it references (each object counted once)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_size(getattr(obj, name), seen) for name in obj.__slots__)
+    return size
+
+
+def _numpy_scalars(value):
+    """The pre-typed result shape: dicts and lists with numpy float64 prices."""
+    if isinstance(value, dict):
+        return {k: _numpy_scalars(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_numpy_scalars(v) for v in value]
+    if isinstance(value, float):
+        return np.float64(value)
+    return value
+
+
+def _pickling(results: list, repeat: int = 5) -> dict:
+    dumps_s, loads_s = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        blobs = [pickle.dumps(r, pickle.HIGHEST_PROTOCOL) for r in results]
+        dumps_s.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for blob in blobs:
+            pickle.loads(blob)
+        loads_s.append(time.perf_counter() - started)
+    n = len(results)
+    return {'bytes_per_result': round(sum(map(len, blobs)) / n),
+            'dumps_us_per_result': round(min(dumps_s) / n * 1e6, 1),
+            'loads_us_per_result': round(min(loads_s) / n * 1e6, 1)}
+
+
+def run(args) -> dict:
+    smc = AdvancedSMC('fake')
+    frames = [synthetic_dataframe(KINDS[i % len(KINDS)], args.bars, seed=i) for i in range(args.symbols)]
+    started = time.perf_counter()
+    typed = [smc.analyze_smc_structure(df) for df in frames]
+    analysis_seconds = time.perf_counter() - started
+    variants = {
+        'typed': typed,
+        'to_dict': [r.to_dict() for r in typed],
+        'numpy_scalar_dicts': [_numpy_scalars(r.to_dict()) for r in typed],
+    }
+    n = len(typed)
+    report = {
+        'symbols': args.symbols, 'bars': args.bars,
+        'levels_per_result': round(sum(len(r.order_blocks) + len(r.liquidity_zones) + len(r.fair_value_gaps)
+                                       + len(r.break_of_structure) for r in typed) / n, 1),
+        'analysis_ms_per_symbol': round(analysis_seconds / n * 1e3, 2),
+    }
+    for name, results in variants.items():
+        report[name] = {'bytes_in_memory_per_result': round(sum(deep_size(r) for r in results) / n),
+                        **_pickling(results)}
+    started = time.perf_counter()
+    for r in typed:
+        to_plain({'smc_analysis': r})
+    report['to_dict_us_per_result'] = round((time.perf_counter() - started) / n * 1e6, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=250)
+    parser.add_argument('--bars', type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/async_load_test.py
+"""
+Load test for the asyncio runtime (AsyncTradingBot) against local fakes.
+
+Fires N concurrent "analyze" taps from N different users through a fake Bot API server
+and a fake exchange with configurable latency, then reports latency percentiles,
+throughput and the peak number of threads used by the process.
+
+    python -m benchmarks.async_load_test --requests 2000 --symbols 100 --latency 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.bot import constants as const
+from src.bot.services.async_analysis_service import AsyncAnalysisService
+from src.bot.services.scheduler_service import SchedulerService
+from src.bot.trading_bot import AsyncTradingBot
+from src.core.fake_exchange import AsyncFakeExchange
+from .fakes import FakeBotApiServer
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else 0.0
+
+
+async def run(args) -> dict:
+    server = FakeBotApiServer()
+    await server.start()
+
+    exchange = AsyncFakeExchange(symbols=list(const.POPULAR_PAIRS) + [f"T{i}/USDT" for i in range(args.symbols)],
+                                 latency=args.latency, error_rate=args.error_rate)
+    executor = ProcessPoolExecutor(max_workers=args.workers)
+    service = AsyncAnalysisService(exchange=exchange, executor=executor)
+    state_dir = tempfile.mkdtemp()
+    state_file = os.path.join(state_dir, 'bot_data.json')
+    bot = AsyncTradingBot('TEST:TOKEN', base_url=server.base_url, analysis_service=service,
+                          scheduler_service=SchedulerService(persistence_file=state_file), poll_timeout=1)
+    await bot.start()
+
+    peak_threads = threading.active_count()
+    sent_at = {}
+    timeframes = ['15m', '1h', '4h']
+    started = time.monotonic()
+    for user_id in range(1, args.requests + 1):
+        symbol = f"T{user_id % args.symbols}/USDT"
+        data = f"analyze:{symbol}:{timeframes[user_id % len(timeframes)]}"
+        sent_at[user_id] = time.monotonic()
+        server.push_update(server.callback_update(user_id, data))
+
+    done = {}
+    seen = 0
+    deadline = started + args.timeout
+    while len(done) < args.requests and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        peak_threads = max(peak_threads, threading.active_count())
+        new_calls, seen = server.calls[seen:], len(server.calls)
+        for ts, method, payload in new_calls:
+            if method != 'editMessageText':
+                continue
+            chat_id = int(payload['chat_id'])
+            text = payload.get('text', '')
+            if chat_id not in done and (text.startswith('📊') or text.startswith('❌')):
+                done[chat_id] = ts
+    elapsed = time.monotonic() - started
+
+    await bot.stop()
+    await server.stop()
+    executor.shutdown()
+    shutil.rmtree(state_dir, ignore_errors=True)
+
+    latencies = [done[u] - sent_at[u] for u in done]
+    return {
+        'requests': args.requests,
+        'completed': len(done),
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(len(done) / elapsed, 1) if elapsed else 0,
+        'latency_p50_s': round(_percentile(latencies, 50), 3),
+        'latency_p95_s': round(_percentile(latencies, 95), 3),
+        'latency_p99_s': round(_percentile(latencies, 99), 3),
+        'latency_mean_s': round(statistics.mean(latencies), 3) if latencies else 0,
+        'exchange_fetches': exchange.calls['fetch_ohlcv'],
+        'exchange_latency_s': args.latency,
+        'peak_threads': peak_threads,
+        'analysis_workers': args.workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.3, help='fake exchange latency (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=2, help='analysis process-pool size')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/bot_load_test.py
+"""
+End-to-end load test of the threaded runtime (TradingBot) against local fakes.
+
+The bot polls a fake Bot API server and reads candles from src.core.fake_exchange with
+configurable latency and error rate (registered with data_fetcher.register_exchange).
+N simulated users each go through a session: /start, open the pair menu, tap a menu pair,
+`/analysis SYMBOL TF`, then add a pair to their watchlist. Afterwards notification_job and
+market_scanner_job run once over the filled watchlists / subscribers.
+
+Reports p50/p95/p99 latency per interaction (update queued -> bot reply received by the
+fake server), the duration of each job and the messages per second it sent.
+
+    python -m benchmarks.bot_load_test --users 200 --concurrency 20 --latency 0.05 --warm
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from src.bot import constants as const
+from src.bot.services.scheduler_service import SchedulerService
+from src.bot.trading_bot import TradingBot, hot_symbol_job, market_scanner_job, notification_job
+from src.core.data_fetcher import register_exchange
+from src.core.fake_exchange import FakeExchange
+from .fakes import FakeBotApiServer
+
+TOKEN = '123456:LOADTEST'
+EXCHANGE_NAME = 'loadtest'
+TIMEFRAMES = ['15m', '1h', '4h']
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else 0.0
+
+
+class _Inbox:
+    """Bot API calls routed per chat, so every simulated user waits only for its own replies."""
+
+    def __init__(self):
+        self._queues = defaultdict(queue.Queue)
+        self._lock = threading.Lock()
+
+    def __call__(self, ts, method, payload):
+        chat_id = payload.get('chat_id')
+        if chat_id:
+            self.get(int(chat_id)).put((ts, method, payload))
+
+    def get(self, chat_id: int) -> queue.Queue:
+        with self._lock:
+            return self._queues[chat_id]
+
+
+def _is_final_analysis(method, payload):
+    return method == 'editMessageText' and not payload.get('text', '').startswith('🔄')
+
+
+def _session(user_id: int, server: FakeBotApiServer, inbox: _Inbox, args) -> list:
+    """One user's session. Returns [(interaction, seconds or None on timeout)]."""
+    rng = random.Random(user_id)
+    symbol = f"T{rng.randrange(args.symbols)}/USDT"
+    menu_pair = rng.choice(const.POPULAR_PAIRS)
+    steps = [
+        ('start', server.message_update(user_id, '/start'), lambda m, p: m == 'sendMessage'),
+        ('open_menu', server.callback_update(user_id, const.CB_SELECT_PAIR), lambda m, p: m == 'editMessageText'),
+        ('menu_analyze', server.callback_update(user_id, f"{const.CB_ANALYZE}:{menu_pair}:{const.MENU_TIMEFRAME}"),
+         _is_final_analysis),
+        ('analysis_command', server.message_update(user_id, f"/analysis {symbol} {rng.choice(TIMEFRAMES)}"),
+         _is_final_analysis),
+        ('watchlist_prompt', server.callback_update(user_id, f"{const.CB_WATCHLIST}:add_prompt"),
+         lambda m, p: m == 'editMessageText'),
+        ('watchlist_add', server.message_update(user_id, f"{symbol} {rng.choice(TIMEFRAMES)}"),
+         lambda m, p: m == 'sendMessage'),
+    ]
+    replies = inbox.get(user_id)
+    results = []
+    for name, update, is_reply in steps:
+        sent_at = time.monotonic()
+        server.push_update(update)
+        deadline = sent_at + args.timeout
+        latency = None
+        while latency is None and time.monotonic() < deadline:
+            try:
+                ts, method, payload = replies.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if is_reply(method, payload):
+                latency = ts - sent_at
+        results.append((name, latency))
+        if latency is None:
+            break
+    return results
+
+
+def _run_job(name: str, job, context, server: FakeBotApiServer) -> dict:
+    seen = len(server.calls)
+    started = time.monotonic()
+    job(context)
+    elapsed = time.monotonic() - started
+    sent = sum(1 for _, method, _ in server.calls[seen:] if method == 'sendMessage')
+    return {'job': name, 'duration_s': round(elapsed, 3), 'messages': sent,
+            'messages_per_s': round(sent / elapsed, 1) if elapsed else 0}
+
+
+def run(args) -> dict:
+    inbox = _Inbox()
+    server = FakeBotApiServer(on_call=inbox)
+    server.start_in_thread()
+
+    symbols = list(const.POPULAR_PAIRS) + [f"T{i}/USDT" for i in range(max(args.symbols, args.scan_symbols))]
+    exchange = FakeExchange(symbols=symbols, latency=args.latency, error_rate=args.error_rate)
+    register_exchange(EXCHANGE_NAME, lambda: exchange)
+    state_dir = tempfile.mkdtemp()
+    scheduler_service = SchedulerService(persistence_file=os.path.join(state_dir, 'bot_data.json'))
+    bot = TradingBot(TOKEN, base_url=server.base_url, scheduler_service=scheduler_service,
+                     exchange_name=EXCHANGE_NAME)
+    # Jobs are run explicitly below, not on their schedule
+    for job in bot.updater.job_queue.jobs():
+        job.schedule_removal()
+    context = SimpleNamespace(bot=bot.updater.bot, bot_data=bot.dispatcher.bot_data, job=None)
+    bot.updater.start_polling(poll_interval=0, timeout=10)
+
+    report = {'users': args.users, 'concurrency': args.concurrency,
+              'exchange_latency_s': args.latency, 'exchange_error_rate': args.error_rate}
+    try:
+        if args.warm:
+            started = time.monotonic()
+            hot_symbol_job(context)
+            report['warm_up_s'] = round(time.monotonic() - started, 3)
+
+        latencies, timeouts = defaultdict(list), defaultdict(int)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            sessions = pool.map(lambda u: _session(u, server, inbox, args), range(1, args.users + 1))
+            for results in sessions:
+                for name, latency in results:
+                    if latency is None:
+                        timeouts[name] += 1
+                    else:
+                        latencies[name].append(latency * 1000)
+        elapsed = time.monotonic() - started
+        completed = sum(len(v) for v in latencies.values())
+        report['interactions'] = {
+            name: {
+                'count': len(latencies[name]),
+                'timeouts': timeouts[name],
+                'p50_ms': round(_percentile(latencies[name], 50), 2),
+                'p95_ms': round(_percentile(latencies[name], 95), 2),
+                'p99_ms': round(_percentile(latencies[name], 99), 2),
+                'mean_ms': round(statistics.mean(latencies[name]), 2) if latencies[name] else 0,
+            }
+            for name in dict.fromkeys(list(latencies) + list(timeouts))
+        }
+        report['sessions_s'] = round(elapsed, 3)
+        report['interactions_per_s'] = round(completed / elapsed, 1) if elapsed else 0
+
+        report['jobs'] = [_run_job('notification_job', notification_job, context, server)]
+        for user_id in range(1, args.users + 1):
+            scheduler_service.add_scanner_subscriber(user_id)
+        # The first scan only records the states; new candles make some of them flip in the second
+        _run_job('market_scanner_job', market_scanner_job, context, server)
+        exchange.seed += 1
+        report['jobs'].append(_run_job('market_scanner_job', market_scanner_job, context, server))
+        report['exchange_calls'] = dict(exchange.calls)
+    finally:
+        bot.updater.stop()
+        shutil.rmtree(state_dir, ignore_errors=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=20, help='users active at the same time')
+    parser.add_argument('--symbols', type=int, default=30, help='distinct pairs used by /analysis and watchlists')
+    parser.add_argument('--scan-symbols', type=int, default=50, help='pairs listed by the fake exchange')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake exchange latency (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--warm', action='store_true', help='run hot_symbol_job once before the users start')
+    parser.add_argument('--timeout', type=float, default=60, help='per-interaction timeout (s)')
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/confluence.py
+"""
+Latency of the multi-timeframe view (src/core/confluence.py) on the `fake` exchange with
+--latency seconds per request: the six timeframes analyzed one after the other (one tap of
+the timeframe keyboard each) against BotAnalysisService.get_confluence and its async
+counterpart (concurrent fetches, 4h / 3d resampled from 1h / 1d).
+
+    python -m benchmarks.confluence --latency 0.3 --symbols 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from src.bot.services.analysis_service import BotAnalysisService
+from src.bot.services.async_analysis_service import AsyncAnalysisService
+from src.core.confluence import CONFLUENCE_TIMEFRAMES, fetch_plan
+from src.core.data_fetcher import register_exchange
+from src.core.fake_exchange import AsyncFakeExchange, FakeExchange
+
+
+def _median(values: list) -> float:
+    return round(sorted(values)[len(values) // 2] * 1e3, 1)
+
+
+def run(args) -> dict:
+    register_exchange('fake', lambda: FakeExchange(latency=args.latency))
+    service = BotAnalysisService('fake')
+    symbols = [f"{s}/USDT" for s in ('BTC', 'ETH', 'SOL', 'BNB', 'XRP', 'ADA', 'DOGE', 'DOT')][:args.symbols]
+    sequential, confluence = [], []
+    for symbol in symbols:
+        started = time.perf_counter()
+        for timeframe in CONFLUENCE_TIMEFRAMES:
+            service.smc_analyzer.get_trading_signals(symbol, timeframe)
+        sequential.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        service.get_confluence(symbol)
+        confluence.append(time.perf_counter() - started)
+
+    async def run_async():
+        async_service = AsyncAnalysisService('fake', exchange=AsyncFakeExchange(latency=args.latency))
+        await async_service.warm_up()
+        timings = []
+        for symbol in symbols:
+            started = time.perf_counter()
+            await async_service.get_confluence(symbol)
+            timings.append(time.perf_counter() - started)
+        await async_service.close()
+        return timings
+
+    return {
+        'latency_ms': args.latency * 1e3,
+        'requests': {'sequential': len(CONFLUENCE_TIMEFRAMES), 'confluence': len(fetch_plan())},
+        'sequential_ms': _median(sequential),
+        'confluence_ms': _median(confluence),
+        'async_confluence_ms': _median(asyncio.run(run_async())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--symbols', type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/fakes.py
+"""
+Local Telegram Bot API server used by the load tests and benchmarks (the exchange
+side is src.core.fake_exchange). Nothing here talks to the network.
+"""
+import asyncio
+import itertools
+import threading
+import time
+
+from aiohttp import web
+
+
+class FakeBotApiServer:
+    """
+    In-process Telegram Bot API stand-in. Updates pushed with push_update() are served by
+    getUpdates (long polling) or POSTed to a webhook; every outgoing call is recorded and,
+    if given, passed to on_call(ts, method, payload) on the server thread.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, on_call=None):
+        self.host = host
+        self.port = port
+        self.on_call = on_call
+        self.calls = []  # (monotonic time, method, payload)
+        self._updates = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1000)
+        self._new_update = None
+        self._loop = None
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._new_update = asyncio.Event()
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def start_in_thread(self):
+        """Run the server on its own event loop thread (for the threaded PTB bot)."""
+        started = threading.Event()
+
+        def _run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=_run, name='fake-bot-api', daemon=True).start()
+        started.wait()
+
+    # --- Update injection ---
+    def push_update(self, update: dict) -> dict:
+        """Queue an update for getUpdates. Safe to call from any thread."""
+        update = dict(update, update_id=next(self._update_ids))
+        self._loop.call_soon_threadsafe(self._enqueue, update)
+        return update
+
+    def _enqueue(self, update: dict):
+        self._updates.append(update)
+        self._new_update.set()
+
+    @staticmethod
+    def callback_update(user_id: int, data: str, message_id: int = 1) -> dict:
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        return {'callback_query': {
+            'id': f'cb{user_id}-{time.monotonic_ns()}', 'from': user, 'chat_instance': str(user_id), 'data': data,
+            'message': {'message_id': message_id, 'date': int(time.time()), 'chat': chat, 'text': '...'},
+        }}
+
+    @staticmethod
+    def message_update(user_id: int, text: str) -> dict:
+        user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+        chat = {'id': user_id, 'type': 'private'}
+        message = {'message_id': 1, 'date': int(time.time()), 'chat': chat, 'from': user, 'text': text}
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return {'message': message}
+
+    # --- Recorded calls ---
+    def calls_for(self, method: str, chat_id=None):
+        return [c for c in self.calls if c[1] == method and (chat_id is None or c[2].get('chat_id') == chat_id)]
+
+    # --- HTTP handler ---
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        if request.can_read_body:
+            payload = await request.json() if request.content_type == 'application/json' else dict(await request.post())
+        else:
+            payload = dict(request.query)
+
+        if method == 'getUpdates':
+            return web.json_response({'ok': True, 'result': await self._get_updates(payload)})
+
+        call = (time.monotonic(), method, payload)
+        self.calls.append(call)
+        if self.on_call is not None:
+            self.on_call(*call)
+        if method in ('sendMessage', 'editMessageText'):
+            chat = {'id': int(payload.get('chat_id', 0)), 'type': 'private'}
+            message_id = int(payload['message_id']) if payload.get('message_id') else next(self._message_ids)
+            result = {'message_id': message_id, 'date': int(time.time()), 'chat': chat, 'text': payload.get('text', '')}
+        elif method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_bot'}
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _get_updates(self, payload: dict) -> list:
+        offset = int(payload.get('offset') or 0)
+        timeout = float(payload.get('timeout') or 0)
+        self._updates = [u for u in self._updates if u['update_id'] >= offset]
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:100]
@@ -0,0 +1,70 @@
+# benchmarks/import_time.py
+"""
+Import time of the bot entry point (`import main`) in fresh interpreters, and which heavy
+modules it pulls in. With --baseline REV the same measurement runs on a `git archive`
+of that revision, for before/after numbers.
+
+    python -m benchmarks.import_time --runs 10 --baseline HEAD~1
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('ccxt', 'pandas', 'numpy', 'aiohttp')
+
+_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure(tree: str, runs: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=tree)
+    samples, loaded = [], []
+    # One unmeasured run so every tree is compared with warm .pyc files
+    for i in range(runs + 1):
+        out = subprocess.run([sys.executable, '-c', _PROBE], cwd=tree, env=env, check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        if i:
+            samples.append(result['seconds'] * 1000)
+            loaded = result['loaded']
+    return {
+        'import_ms_median': round(statistics.median(samples), 1),
+        'import_ms_min': round(min(samples), 1),
+        'heavy_modules_loaded': loaded,
+    }
+
+
+def export_revision(rev: str, dest: str):
+    archive = subprocess.run(['git', 'archive', rev], check=True, capture_output=True).stdout
+    subprocess.run(['tar', '-x', '-C', dest], input=archive, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--baseline', help='git revision to compare against (e.g. HEAD~1)')
+    args = parser.parse_args()
+
+    results = {'current': measure(os.getcwd(), args.runs)}
+    if args.baseline:
+        tree = tempfile.mkdtemp()
+        try:
+            export_revision(args.baseline, tree)
+            results[args.baseline] = measure(tree, args.runs)
+        finally:
+            shutil.rmtree(tree, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
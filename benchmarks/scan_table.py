@@ -0,0 +1,81 @@
+# benchmarks/scan_table.py
+"""
+Cost of the scanner's scan table (src/core/scan_table.py) behind /top: saving a pass of
+--symbols rows, a reader picking up the saved file, and ranking it (what one /top pays),
+against analyzing the symbols one by one like get_telegram_summary did (--analyze, on
+the `fake` exchange).
+
+    python -m benchmarks.scan_table --symbols 250,5000 --repeat 200 --analyze 25
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from src.core.scan_table import ScanTable
+
+
+def _rows(count: int, now: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [{
+        'symbol': f"S{i}/USDT", 'price': rng.uniform(0.01, 50000), 'strength': rng.uniform(0, 10),
+        'rsi': rng.uniform(10, 90), 'trend': rng.choice((1, -1, 0)), 'bos_time': now - rng.randrange(30) * 86400,
+        'choch': rng.choice((1, -1, 0)), 'choch_time': now - rng.randrange(10) * 86400,
+        'level_distance': rng.uniform(0, 10), 'scanned_at': now,
+    } for i in range(count)]
+
+
+def _ms(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) / repeat * 1e3, 3)
+
+
+def _analyze_ms(count: int) -> float:
+    from src.core.analysis import AdvancedSMC
+    from src.core.data_fetcher import get_top_symbols_by_volume
+    smc = AdvancedSMC('fake')
+    symbols = get_top_symbols_by_volume('fake', count)
+    started = time.perf_counter()
+    for symbol in symbols:
+        smc.get_telegram_summary(symbol, '1d')
+    return round((time.perf_counter() - started) * 1e3, 1)
+
+
+def run(args) -> dict:
+    now = int(time.time())
+    report = {'repeat': args.repeat, 'sizes': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(s) for s in args.symbols.split(',')):
+            path = os.path.join(directory, f"scan-{count}.npz")
+            writer, rows = ScanTable(path), _rows(count, now)
+            save_ms = _ms(lambda: writer.update(rows), max(args.repeat // 10, 1))
+
+            def read():
+                ScanTable(path).top(10)
+            reader = ScanTable(path)
+            report['sizes'][count] = {
+                'file_bytes': os.path.getsize(path),
+                'save_ms': save_ms,
+                'load_and_top_ms': _ms(read, max(args.repeat // 10, 1)),
+                'top_ms': _ms(lambda: reader.top(10), args.repeat),
+            }
+    if args.analyze:
+        report['analyze_one_by_one_ms'] = {'symbols': args.analyze, 'ms': _analyze_ms(args.analyze)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', default='250,5000')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--analyze', type=int, default=25, help='symbols analyzed one by one for comparison (0: skip)')
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/smc_core.py
+"""
+Micro-benchmark of the SMC core on seeded synthetic candles.
+
+Times every stage of analyze_smc_features (swings, BOS/CHoCH, order blocks, FVG,
+liquidity sweeps), the signal/extraction steps of AdvancedSMC.analyze_smc_structure
+and calculate_indicators, per market kind and size. Reports seconds, bars/s and the
+tracemalloc peak per stage as JSON, plus the estimated duration of a 250-symbol scan.
+
+    python -m benchmarks.smc_core --bars 200,1000,10000,100000 --output smc.json
+    python -m benchmarks.smc_core --bars 200,1000 --save-baseline benchmarks/baselines/smc_core.json
+    python -m benchmarks.smc_core --bars 200,1000 --baseline benchmarks/baselines/smc_core.json --threshold 0.25
+
+With --baseline the exit status is 1 when any stage is slower than baseline * (1 + threshold).
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.core.analysis import SMC_STAGES, AdvancedSMC
+from src.core.data_fetcher import calculate_indicators
+from src.core.synthetic_data import KINDS, synthetic_dataframe
+
+SCAN_SYMBOLS = 250
+# Stages faster than this are too noisy to gate on
+MIN_GATED_SECONDS = 0.002
+
+
+def _stages(smc: AdvancedSMC):
+    """(name, function df -> df) for one full analysis, in pipeline order."""
+    def signals(df):
+        return smc.populate_exit_trend(smc.populate_entry_trend_simple(df))
+
+    def extraction(df):
+        smc.extract_order_blocks(df)
+        smc.extract_liquidity_zones(df)
+        smc.extract_fair_value_gaps(df)
+        smc.extract_break_of_structure(df)
+        smc.extract_recent_signals(df)
+        return df
+
+    def indicators(df):
+        calculate_indicators(df, df.tail(200).copy())
+        return df
+
+    return list(SMC_STAGES) + [('signals', signals), ('extraction', extraction), ('indicators', indicators)]
+
+
+def _run_pipeline(stages, source: pd.DataFrame, measure_memory: bool) -> dict:
+    """Run all stages once on a copy of `source`; returns {stage: (seconds, peak bytes or None)}."""
+    df = source.copy()
+    results = {}
+    for name, stage in stages:
+        if measure_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        df = stage(df)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] - base if measure_memory else None
+        results[name] = (elapsed, peak)
+    return results
+
+
+def bench(kind: str, bars: int, repeat: int, memory: bool, seed: int = 0) -> list:
+    smc = AdvancedSMC()
+    stages = _stages(smc)
+    source = synthetic_dataframe(kind, bars, seed)
+
+    timings = {name: [] for name, _ in stages}
+    for _ in range(repeat):
+        for name, (seconds, _) in _run_pipeline(stages, source, measure_memory=False).items():
+            timings[name].append(seconds)
+
+    peaks = {}
+    if memory:
+        tracemalloc.start()
+        try:
+            peaks = {name: peak for name, (_, peak) in _run_pipeline(stages, source, measure_memory=True).items()}
+        finally:
+            tracemalloc.stop()
+
+    rows = []
+    for name, samples in timings.items():
+        seconds = statistics.median(samples)
+        rows.append({
+            'kind': kind, 'bars': bars, 'stage': name,
+            'seconds': round(seconds, 6),
+            'bars_per_s': round(bars / seconds) if seconds else None,
+            'peak_kib': round(peaks[name] / 1024, 1) if name in peaks else None,
+        })
+    total = sum(r['seconds'] for r in rows)
+    rows.append({'kind': kind, 'bars': bars, 'stage': 'total', 'seconds': round(total, 6),
+                 'bars_per_s': round(bars / total) if total else None,
+                 'peak_kib': max((r['peak_kib'] or 0) for r in rows) if memory else None})
+    return rows
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Stages slower than baseline * (1 + threshold)."""
+    reference = {(r['kind'], r['bars'], r['stage']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for r in results:
+        base = reference.get((r['kind'], r['bars'], r['stage']))
+        if base is None or base < MIN_GATED_SECONDS:
+            continue
+        ratio = r['seconds'] / base
+        r['vs_baseline'] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append({'kind': r['kind'], 'bars': r['bars'], 'stage': r['stage'],
+                                'baseline_s': base, 'seconds': r['seconds'], 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', default='200,1000,10000,100000', help='comma-separated sizes')
+    parser.add_argument('--kinds', default=','.join(KINDS))
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per size (1 above 10k bars)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--save-baseline', help='write the report as the new baseline')
+    parser.add_argument('--baseline', help='compare against this baseline report')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown vs baseline')
+    args = parser.parse_args()
+
+    results = []
+    for kind in args.kinds.split(','):
+        for bars in (int(b) for b in args.bars.split(',')):
+            repeat = args.repeat if bars <= 10_000 else 1
+            print(f"{kind} {bars} bars x{repeat}...", file=sys.stderr)
+            results.extend(bench(kind, bars, repeat, memory=not args.no_memory, seed=args.seed))
+
+    totals_200 = [r['seconds'] for r in results if r['stage'] == 'total' and r['bars'] == 200]
+    report = {
+        'meta': {
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        f'scan_{SCAN_SYMBOLS}_symbols_estimate_s': round(statistics.mean(totals_200) * SCAN_SYMBOLS, 2)
+        if totals_200 else None,
+        'results': results,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        report['threshold'] = args.threshold
+        report['regressions'] = regressions
+        status = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/sweep.py
+"""
+Scaling of the parameter sweep (src/core/sweep.py) with the number of worker processes,
+on seeded synthetic candles. Reports combinations per second and the speedup over
+one worker for each --workers value.
+
+    python -m benchmarks.sweep --symbols 20 --bars 3000 --combinations 1000 --workers 1,2,4,8
+"""
+import argparse
+import itertools
+import json
+import time
+
+from src.core.sweep import run_sweep
+from src.core.synthetic_data import KINDS, synthetic_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=3000)
+    parser.add_argument('--combinations', type=int, default=1000)
+    parser.add_argument('--workers', default='1,2,4')
+    args = parser.parse_args()
+
+    rows_by_symbol = {f"S{i}/USDT": synthetic_rows(KINDS[i % len(KINDS)], args.bars, i) for i in range(args.symbols)}
+    # 10 swing lookbacks x 10 OB lookbacks x N sweep windows, cut to the requested size
+    grid = list(itertools.product(range(8, 38, 3), range(3, 23, 2), range(2, 2 + max(1, args.combinations // 100))))
+    grid = grid[:args.combinations]
+
+    results, base = [], None
+    for workers in (int(w) for w in args.workers.split(',')):
+        started = time.perf_counter()
+        run_sweep(rows_by_symbol, grid, workers)
+        elapsed = time.perf_counter() - started
+        if workers == 1:
+            base = elapsed
+        results.append({
+            'workers': workers, 'seconds': round(elapsed, 2),
+            'combinations_per_s': round(len(grid) / elapsed, 1),
+            'speedup_vs_1': round(base / elapsed, 2) if base else None,
+        })
+    print(json.dumps({'symbols': args.symbols, 'bars': args.bars, 'combinations': len(grid),
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/webhook_latency.py
+"""
+Update-to-reply latency of TradingBot in long-polling vs webhook mode, measured against
+a local fake Bot API server. Each simulated user sends `/start`; the latency is the time
+from the update becoming available (queued for getUpdates, or POSTed to the webhook)
+until the fake server receives the bot's sendMessage.
+
+    python -m benchmarks.webhook_latency --updates 500 --concurrency 20 --processors 4
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bot.services.scheduler_service import SchedulerService
+from src.bot.trading_bot import TradingBot
+from .fakes import FakeBotApiServer
+
+TOKEN = '123456:BENCHMARK'
+SECRET = 'benchmark-secret'
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else 0.0
+
+
+def _wait_for_replies(server, user_ids, timeout):
+    """Map user id -> time of the first sendMessage to that chat."""
+    replies, seen, deadline = {}, 0, time.monotonic() + timeout
+    pending = set(user_ids)
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.005)
+        new_calls, seen = server.calls[seen:], len(server.calls)
+        for ts, method, payload in new_calls:
+            chat_id = int(payload.get('chat_id', 0))
+            if method == 'sendMessage' and chat_id in pending:
+                replies[chat_id] = ts
+                pending.discard(chat_id)
+    return replies
+
+
+def _summary(mode, sent_at, replies, elapsed):
+    latencies = [(replies[u] - sent_at[u]) * 1000 for u in replies]
+    return {
+        'mode': mode,
+        'updates': len(sent_at),
+        'replied': len(replies),
+        'updates_per_s': round(len(replies) / elapsed, 1) if elapsed else 0,
+        'latency_p50_ms': round(_percentile(latencies, 50), 2),
+        'latency_p95_ms': round(_percentile(latencies, 95), 2),
+        'latency_p99_ms': round(_percentile(latencies, 99), 2),
+        'latency_mean_ms': round(statistics.mean(latencies), 2) if latencies else 0,
+    }
+
+
+def _make_bot(server, state_dir):
+    return TradingBot(TOKEN, base_url=server.base_url, exchange_name='fake',
+                      scheduler_service=SchedulerService(persistence_file=os.path.join(state_dir, 'bot_data.json')))
+
+
+def bench_polling(server, state_dir, args, first_user):
+    bot = _make_bot(server, state_dir)
+    bot.updater.start_polling(poll_interval=0.0, timeout=10)
+    users = list(range(first_user, first_user + args.updates))
+    sent_at = {}
+
+    def _send(user_id):
+        sent_at[user_id] = time.monotonic()
+        server.push_update(server.message_update(user_id, '/start'))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(_send, users))
+    replies = _wait_for_replies(server, users, args.timeout)
+    elapsed = time.monotonic() - started
+    bot.updater.stop()
+    return _summary('polling', sent_at, replies, elapsed)
+
+
+def bench_webhook(server, state_dir, args, first_user):
+    bot = _make_bot(server, state_dir)
+    bot.start_webhook(webhook_url=None, listen='127.0.0.1', port=0, url_path='telegram',
+                      secret_token=SECRET, update_processors=args.processors)
+    url = f"http://127.0.0.1:{bot._webhook_server.port}/telegram"
+    users = list(range(first_user, first_user + args.updates))
+    sent_at = {}
+    update_ids = iter(range(1_000_000, 2_000_000))
+
+    def _post(batch):
+        body = [dict(server.message_update(u, '/start'), update_id=next(update_ids)) for u in batch]
+        request = urllib.request.Request(url, data=json.dumps(body if args.batch > 1 else body[0]).encode(),
+                                         headers={'Content-Type': 'application/json',
+                                                  'X-Telegram-Bot-Api-Secret-Token': SECRET})
+        for u in batch:
+            sent_at[u] = time.monotonic()
+        urllib.request.urlopen(request, timeout=10).read()
+
+    batches = [users[i:i + args.batch] for i in range(0, len(users), args.batch)]
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(_post, batches))
+    replies = _wait_for_replies(server, users, args.timeout)
+    elapsed = time.monotonic() - started
+    bot.stop_webhook()
+    return _summary(f'webhook (processors={args.processors}, batch={args.batch})', sent_at, replies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=20, help='parallel senders (users)')
+    parser.add_argument('--processors', type=int, default=4, help='webhook update processors')
+    parser.add_argument('--batch', type=int, default=1, help='updates per webhook POST')
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    server = FakeBotApiServer()
+    server.start_in_thread()
+    state_dir = tempfile.mkdtemp()
+    try:
+        results = [bench_polling(server, state_dir, args, first_user=1),
+                   bench_webhook(server, state_dir, args, first_user=1_000_001)]
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+from src.bot import startup  # first import: start of the startup clock
 import logging
 import os
 from dotenv import load_dotenv
@@ -6,7 +7,8 @@ from dotenv import load_dotenv
 load_dotenv() 
 
 # Import from your source code naturally
-from src.bot.trading_bot import TradingBot
+from src.bot.trading_bot import TradingBot, AsyncTradingBot
+startup.mark('imports')
 
 # Configure logging
 logging.basicConfig(
@@ -22,12 +24,45 @@ def main():
         logger.error("BOT_TOKEN not found in environment variables! Please create .env file.")
         return
 
+    # METRICS_PORT enables the Prometheus /metrics endpoint
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        from src.core.metrics import start_metrics_server
+        start_metrics_server(int(metrics_port), os.getenv("METRICS_LISTEN", "0.0.0.0"))
+
     try:
         logger.info("Initializing bot...")
-        bot = TradingBot(bot_token)
+        # EXCHANGE=fake runs offline on the deterministic fake exchange
+        exchange_name = os.getenv("EXCHANGE", "binance")
+        # BOT_RUNTIME=async selects the asyncio runtime; default is the threaded Updater
+        # COORDINATION (shared by the replicas) runs the scheduled jobs once across all of them
+        coordinator = os.getenv("COORDINATION") or None
+        async_runtime = os.getenv("BOT_RUNTIME", "threaded").lower() == "async"
+        webhook_mode = os.getenv("BOT_MODE", "polling").lower() == "webhook"
+        if async_runtime and webhook_mode:
+            logger.error("BOT_MODE=webhook is not supported with BOT_RUNTIME=async; "
+                         "use BOT_RUNTIME=threaded for webhooks or BOT_MODE=polling.")
+            return
+        if async_runtime:
+            bot = AsyncTradingBot(bot_token, exchange_name=exchange_name, coordinator=coordinator)
+        else:
+            # CANDLE_FEED=poll runs the watchlist/alert jobs on candle closes instead of timers
+            bot = TradingBot(bot_token, exchange_name=exchange_name, candle_feed=os.getenv("CANDLE_FEED") or None,
+                             coordinator=coordinator)
         
         logger.info("🤖 Bot is starting...")
-        bot.run()
+        # BOT_MODE=webhook receives updates over HTTP instead of long polling
+        if webhook_mode:
+            bot.run_webhook(
+                os.getenv("WEBHOOK_URL"),
+                listen=os.getenv("WEBHOOK_LISTEN", "0.0.0.0"),
+                port=int(os.getenv("PORT", "8443")),
+                url_path=os.getenv("WEBHOOK_PATH", "telegram"),
+                secret_token=os.getenv("WEBHOOK_SECRET"),
+                update_processors=int(os.getenv("UPDATE_WORKERS", "4")),
+            )
+        else:
+            bot.run()
         
     except Exception as e:
         logger.error(f"Critical error running bot: {e}", exc_info=True)
@@ -0,0 +1,135 @@
+# src/bot/async_client.py
+import asyncio
+import contextlib
+import logging
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from telegram.utils.helpers import DefaultValue
+
+from src.core.metrics import SEND_FAILURES, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.telegram.org/bot'
+
+_SEND_TIMERS = {
+    method: STAGE_SECONDS.labels(stage=stage, exchange='', timeframe='')
+    for method, stage in (('sendMessage', 'send_message'), ('editMessageText', 'edit_message'),
+                          ('answerCallbackQuery', 'answer_callback'))
+}
+
+
+def _clean_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop unset values and convert PTB objects (keyboards...) to plain JSON."""
+    api_kwargs = params.pop('api_kwargs', None) or {}
+    payload = {}
+    for key, value in params.items():
+        if value is None or isinstance(value, DefaultValue):
+            continue
+        if hasattr(value, 'to_dict'):
+            value = value.to_dict()
+        elif isinstance(value, (list, tuple)):
+            value = [v.to_dict() if hasattr(v, 'to_dict') else v for v in value]
+        payload[key] = value
+    payload.update(api_kwargs)
+    return payload
+
+
+class AsyncBotClient:
+    """Minimal asyncio Telegram Bot API client built on aiohttp."""
+
+    def __init__(self, token: str, base_url: str = DEFAULT_BASE_URL, max_connections: int = 100):
+        # Same convention as telegram.Bot: base_url + token
+        self._url = f"{base_url}{token}"
+        self._max_connections = max_connections
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Last scheduled call for each chat, so fire-and-forget calls keep their order
+        self._chat_tails: Dict[Any, asyncio.Task] = {}
+
+    async def start(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._max_connections)
+            self._session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        pending = [t for t in self._chat_tails.values() if not t.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def call(self, method: str, request_timeout: float = 30, **params) -> Any:
+        """Call a Bot API method. Returns the `result` field, or None on failure."""
+        payload = _clean_params(params)
+        try:
+            # getUpdates is a long poll: its duration is not a latency
+            with _SEND_TIMERS[method].time() if method in _SEND_TIMERS else contextlib.nullcontext():
+                async with self._session.post(f"{self._url}/{method}", json=payload,
+                                              timeout=aiohttp.ClientTimeout(total=request_timeout)) as resp:
+                    data = await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            SEND_FAILURES.labels(method=method).inc()
+            logger.error(f"Bot API {method} failed: {e!r}")
+            return None
+
+        if not data.get('ok'):
+            description = data.get('description', '')
+            if "message is not modified" not in description:
+                SEND_FAILURES.labels(method=method).inc()
+                logger.error(f"Bot API {method} error: {description}")
+            return None
+        return data.get('result')
+
+    def schedule(self, order_key: Any, method: str, /, **params) -> asyncio.Task:
+        """Fire-and-forget call, ordered after any earlier call with the same key (chat)."""
+        previous = self._chat_tails.get(order_key)
+
+        async def _run():
+            if previous is not None and not previous.done():
+                await asyncio.gather(previous, return_exceptions=True)
+            return await self.call(method, **params)
+
+        task = asyncio.get_running_loop().create_task(_run())
+        self._chat_tails[order_key] = task
+        task.add_done_callback(
+            lambda t: self._chat_tails.pop(order_key, None) if self._chat_tails.get(order_key) is t else None)
+        return task
+
+    # --- Typed helpers ---
+    async def get_updates(self, offset: Optional[int] = None, timeout: int = 30) -> Optional[List[dict]]:
+        return await self.call('getUpdates', request_timeout=timeout + 10, offset=offset, timeout=timeout,
+                               allowed_updates=['message', 'callback_query'])
+
+    async def send_message(self, chat_id, text, **kwargs) -> Optional[dict]:
+        return await self.call('sendMessage', chat_id=chat_id, text=text, **kwargs)
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs) -> Optional[dict]:
+        return await self.call('editMessageText', chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+
+    async def answer_callback_query(self, callback_query_id, **kwargs) -> Optional[dict]:
+        return await self.call('answerCallbackQuery', callback_query_id=callback_query_id, **kwargs)
+
+
+class LoopBotProxy:
+    """
+    Synchronous `telegram.Bot` stand-in used when parsing updates for the async runtime.
+    The existing PTB handlers call `reply_text`, `edit_message_text`, `answer`... on the
+    update objects; here those calls are scheduled on the event loop and return at once.
+    """
+    defaults = None
+
+    def __init__(self, client: AsyncBotClient):
+        self._client = client
+
+    def send_message(self, chat_id, text, timeout=None, **kwargs):
+        self._client.schedule(chat_id, 'sendMessage', chat_id=chat_id, text=text, **kwargs)
+
+    def edit_message_text(self, text, chat_id=None, message_id=None, inline_message_id=None, timeout=None, **kwargs):
+        self._client.schedule(chat_id or inline_message_id, 'editMessageText', text=text, chat_id=chat_id,
+                              message_id=message_id, inline_message_id=inline_message_id, **kwargs)
+
+    def answer_callback_query(self, callback_query_id, text=None, show_alert=None, timeout=None, **kwargs):
+        self._client.schedule(('cbq', callback_query_id), 'answerCallbackQuery', callback_query_id=callback_query_id,
+                              text=text, show_alert=show_alert, **kwargs)
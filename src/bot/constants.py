@@ -23,11 +23,20 @@ HELP_TEXT = """
 **⚡ Lệnh nhanh:**
 • /start - Hiển thị menu chính
 • /analysis BTC/USDT 4h - Phân tích nhanh
+• /alert BTC/USDT 4h - Báo khi giá cắt OB / vùng thanh khoản gần nhất (hoặc /alert BTC/USDT 65000)
+• /confluence BTC/USDT - Xu hướng, BOS / CHoCH và mức giá của mọi khung (15m -> 1w) trong một tin nhắn
+• /top - Cặp có xu hướng tăng / giảm mạnh nhất và CHoCH mới (theo lượt quét thị trường gần nhất)
 
 **⚠️ Tuyên bố miễn trừ trách nhiệm:**
 Bot chỉ cung cấp phân tích, không phải là lời khuyên tài chính.
 """
 
+# --- Menu pairs ---
+# Các cặp trên menu chính / menu cặp phổ biến (luôn được phân tích sẵn bởi HotSymbolService)
+MAIN_MENU_PAIRS = ["BTC/USDT", "ETH/USDT"]
+POPULAR_PAIRS = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "ADA/USDT", "SOL/USDT", "DOT/USDT"]
+MENU_TIMEFRAME = "15m"
+
 # --- User States ---
 STATE_WAITING_FOR = "waiting_for"
 STATE_CUSTOM_TOKEN = "custom_token"
@@ -36,6 +45,7 @@ STATE_ADD_WATCHLIST = "add_watchlist"
 # --- Callback Data Prefixes ---
 CB_ANALYZE = "analyze"
 CB_TIMEFRAME = "timeframe"
+CB_CONFLUENCE = "confluence"
 CB_REFRESH = "refresh"
 CB_WATCHLIST = "watchlist" 
 CB_BACK_MAIN = "back_main"
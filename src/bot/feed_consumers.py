@@ -0,0 +1,125 @@
+# src/bot/feed_consumers.py
+"""
+The jobs of TradingBot as candle feed consumers (src/core/candle_feed.py): instead of
+waking up on a timer, each one runs when a candle it cares about has closed.
+
+- watchlist: analyzes a watched (symbol, timeframe) right after its candle closes and
+  notifies the users watching it (notification_job);
+- price_alert: checks the alerts of a symbol against the close of every 1m candle
+  (price_alert_job);
+- market_scanner: evaluates the top symbols when their 1d candle closes (market_scanner_job).
+"""
+import logging
+import os
+import time
+
+from src.core.rate_limiter import priority
+from .services.scanner_service import scan_error_budget
+from .trading_bot import (
+    alert_key, group_watchlists, notify_watchers, owns, runs_jobs, scan_key, send_price_alerts, send_scanner_flips,
+    watch_key
+)
+
+logger = logging.getLogger(__name__)
+
+# Khung nến dùng làm "giá mới nhất" cho cảnh báo giá
+ALERT_FEED_TIMEFRAME = os.getenv('ALERT_FEED_TIMEFRAME', '1m')
+SCANNER_TIMEFRAME = '1d'
+SCANNER_TOP_SYMBOLS = 250
+# Danh sách top symbol của scanner được làm mới sau mỗi khoảng này (giây)
+SCANNER_SYMBOLS_REFRESH = 4 * 3600
+
+
+def watchlist_consumer(bot, bot_data):
+    scheduler_service = bot_data['scheduler_service']
+    analysis_service = bot_data['analysis_service']
+
+    def keys():
+        if not runs_jobs(bot_data):
+            return set()
+        return {key for key in group_watchlists(scheduler_service.get_all_watchlists())
+                if owns(bot_data, watch_key(*key))}
+
+    @priority('watchlist')
+    def handle(event):
+        user_ids = group_watchlists(scheduler_service.get_all_watchlists()).get(event.key)
+        if user_ids and runs_jobs(bot_data) and owns(bot_data, watch_key(*event.key)):
+            notify_watchers(bot, analysis_service, event.symbol, event.timeframe, user_ids)
+
+    return handle, keys
+
+
+def price_alert_consumer(bot, bot_data):
+    price_alert_service = bot_data['price_alert_service']
+
+    def keys():
+        if not runs_jobs(bot_data):
+            return set()
+        return {(symbol, ALERT_FEED_TIMEFRAME) for symbol in price_alert_service.symbols()
+                if owns(bot_data, alert_key(symbol))}
+
+    def handle(event):
+        if not (runs_jobs(bot_data) and owns(bot_data, alert_key(event.symbol))):
+            return
+        fired = price_alert_service.update_price(event.symbol, event.close)
+        send_price_alerts(bot, fired, {event.symbol: event.close})
+        price_alert_service.save_if_dirty()
+
+    return handle, keys
+
+
+def market_scanner_consumer(bot, bot_data, clock=time.time):
+    """Batch consumer: all the 1d closes queued together are evaluated as one scan."""
+    from src.core.data_fetcher import get_top_symbols_by_volume
+
+    scanner_service = bot_data['scanner_service']
+    scheduler_service = bot_data['scheduler_service']
+    cached = {'keys': set(), 'at': None}
+
+    @priority('scanner')
+    def keys():
+        if not runs_jobs(bot_data):
+            return set()
+        if cached['at'] is None or clock() - cached['at'] >= SCANNER_SYMBOLS_REFRESH:
+            symbols = get_top_symbols_by_volume(scanner_service.exchange_name, SCANNER_TOP_SYMBOLS)
+            cached['keys'], cached['at'] = {(s, SCANNER_TIMEFRAME) for s in symbols}, clock()
+        # Ownership is checked on every call: the shards move when a replica joins or dies
+        return {key for key in cached['keys'] if owns(bot_data, scan_key(key[0]))}
+
+    @priority('scanner')
+    def handle(events):
+        events = [e for e in events if runs_jobs(bot_data) and owns(bot_data, scan_key(e.symbol))]
+        if not events:
+            return
+        previous_states = bot_data.get('scanner_states', {})
+        new_states, flipped_tokens, scores = dict(previous_states), [], []
+        budget = scan_error_budget(len(events), scanner_service.exchange_name)
+        for event in events:
+            if budget.exhausted():
+                logger.warning(f"Feed scan aborted after {budget.errors} errors")
+                break
+            try:
+                analysis = scanner_service.get_trading_signals(event.symbol, event.timeframe)
+                if analysis:
+                    scanner_service.evaluate_symbol(event.symbol, analysis, previous_states, new_states,
+                                                    flipped_tokens, scores)
+                else:
+                    budget.record_error()
+            except Exception as e:
+                budget.record_error()
+                logger.error(f"Error scanning token {event.symbol}: {e}")
+        bot_data['scanner_states'] = new_states
+        scanner_service.save_scores(scores, SCANNER_TIMEFRAME)
+        logger.info(f"Feed scan of {len(events)} closes found {len(flipped_tokens)} reversal signals")
+        send_scanner_flips(bot, scheduler_service, flipped_tokens)
+
+    return handle, keys
+
+
+def subscribe_consumers(feed, bot, bot_data, enable_market_scanner: bool = False) -> list:
+    """Subscribe the bot jobs to `feed`; returns the subscriptions."""
+    consumers = [('watchlist', watchlist_consumer(bot, bot_data), False),
+                 ('price_alert', price_alert_consumer(bot, bot_data), False)]
+    if enable_market_scanner:
+        consumers.append(('market_scanner', market_scanner_consumer(bot, bot_data, feed.clock), True))
+    return [feed.subscribe(handle, keys, name=name, batch=batch) for name, (handle, keys), batch in consumers]
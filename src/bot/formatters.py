@@ -1,6 +1,14 @@
 # src/bot/formatters.py
+from collections import OrderedDict
 from datetime import datetime
+from typing import NamedTuple, Optional
 import re  # Cần import thư viện re để lọc
+import threading
+
+from src.core.metrics import CACHE_REQUESTS, STAGE_SECONDS
+
+_RENDER_HITS = CACHE_REQUESTS.labels(cache='render', result='hit')
+_RENDER_MISSES = CACHE_REQUESTS.labels(cache='render', result='miss')
 
 
 def format_price(price: float) -> str:
@@ -14,142 +22,204 @@ def format_price(price: float) -> str:
         return f"{price:,.8f}".rstrip('0').rstrip('.')
 
 
+# Bảng dịch các thuật ngữ tiếng Anh phổ biến (Bạn có thể thêm vào đây)
+# Đây là nơi bạn dịch các chuỗi mà service của bạn có thể trả về
+_SUGGESTION_TRANSLATIONS = {
+    "Bullish trend": "Xu hướng tăng",
+    "Bearish trend": "Xu hướng giảm",
+    "Wait for retest": "Chờ retest",
+    "Wait for confirmation": "Chờ xác nhận",
+    "Long signal appeared": "Tín hiệu Long xuất hiện",
+    "Short signal appeared": "Tín hiệu Short xuất hiện",
+    "Consider entry": "Xem xét vào lệnh",
+    "Look for Long": "Tìm cơ hội Long",
+    "Look for Short": "Tìm cơ hội Short",
+    "No suggestion available.": "Không có gợi ý.",
+    # Thêm các cụm từ khác mà bạn muốn dịch ở đây...
+}
+# Một regex duy nhất cho tất cả cụm từ: dịch trong một lượt thay vì gọi replace() nhiều lần.
+# Cụm dài hơn đứng trước để ưu tiên khớp dài nhất.
+_TRANSLATION_RE = re.compile('|'.join(
+    re.escape(en) for en in sorted(_SUGGESTION_TRANSLATIONS, key=len, reverse=True)
+))
+# Các dòng chứa FVG hoặc RSI (không phân biệt hoa/thường) bị loại khỏi gợi ý
+_HIDDEN_LINE_RE = re.compile(r'FVG|RSI', re.IGNORECASE)
+
+# Nhãn hiển thị theo ngôn ngữ; ngôn ngữ chưa có sẽ dùng tiếng Việt
+_LABELS = {
+    'vi': {
+        'title': 'Phân tích',
+        'price': 'Giá hiện tại',
+        'change': 'Thay đổi 24h',
+        'latest': 'Gần nhất',
+        'no_signal': 'Không có tín hiệu vào lệnh mới.',
+        'suggestion': 'Gợi ý Trading',
+        'updated': 'Cập nhật',
+        'error': 'Lỗi',
+    },
+}
+
+# Số tin nhắn đã render được giữ lại (LRU)
+RENDER_CACHE_SIZE = 1024
+
+
+class AnalysisDigest(NamedTuple):
+    """Phần nhỏ của kết quả phân tích đủ để render tin nhắn."""
+    symbol: str
+    timeframe: str
+    timestamp: int
+    price: float
+    price_change_pct: float
+    bos_type: Optional[str]
+    bos_price: float
+    lz_type: Optional[str]
+    lz_price: float
+    long_price: Optional[float]
+    short_price: Optional[float]
+    suggestion: str
+
+
+class _RenderCache:
+    """LRU của tin nhắn đã render, khóa theo (symbol, timeframe, thời gian nến, ngôn ngữ)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, digest: AnalysisDigest, language: str) -> str:
+        key = (digest.symbol, digest.timeframe, digest.timestamp, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            # Nến chưa đóng vẫn thay đổi giá: chỉ dùng lại khi digest giống hệt
+            if entry is not None and entry[0] == digest:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                _RENDER_HITS.inc()
+                return entry[1]
+            self.misses += 1
+        _RENDER_MISSES.inc()
+        text = render_analysis(digest, language)
+        with self._lock:
+            self._entries[key] = (digest, text)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                    'hit_rate': self.hits / total if total else 0.0}
+
+
+_render_cache = _RenderCache(RENDER_CACHE_SIZE)
+
+
+def get_render_cache_stats() -> dict:
+    """Số liệu của cache tin nhắn phân tích (hits, misses, size, hit_rate)."""
+    return _render_cache.stats()
+
+
 def _clean_suggestion(suggestion: str) -> str:
     """
     Dịch và đơn giản hóa các thuật ngữ trong gợi ý.
     Xóa các tham chiếu đến FVG và RSI theo yêu cầu.
     """
+    # 1. Dịch tất cả thuật ngữ trong một lượt
+    suggestion = _TRANSLATION_RE.sub(lambda m: _SUGGESTION_TRANSLATIONS[m.group(0)], suggestion)
+
+    # 2. Giữ lại các dòng KHÔNG chứa "FVG"/"RSI", bỏ khoảng trắng thừa
+    final_suggestion = "\n".join(
+        line.strip() for line in suggestion.split('\n') if not _HIDDEN_LINE_RE.search(line)
+    )
 
-    # 1. Dịch các thuật ngữ tiếng Anh phổ biến (Bạn có thể thêm vào đây)
-    # Đây là nơi bạn dịch các chuỗi mà service của bạn có thể trả về
-    replacements = {
-        "Bullish trend": "Xu hướng tăng",
-        "Bearish trend": "Xu hướng giảm",
-        "Wait for retest": "Chờ retest",
-        "Wait for confirmation": "Chờ xác nhận",
-        "Long signal appeared": "Tín hiệu Long xuất hiện",
-        "Short signal appeared": "Tín hiệu Short xuất hiện",
-        "Consider entry": "Xem xét vào lệnh",
-        "Look for Long": "Tìm cơ hội Long",
-        "Look for Short": "Tìm cơ hội Short",
-        "No suggestion available.": "Không có gợi ý.",
-        # Thêm các cụm từ khác mà bạn muốn dịch ở đây...
-    }
-
-    for en, vi in replacements.items():
-        suggestion = suggestion.replace(en, vi)
-
-    # 2. Xóa các dòng chứa FVG hoặc RSI
-    # Tách gợi ý thành các dòng riêng biệt
-    lines = suggestion.split('\n')
-
-    # Giữ lại một dòng NẾU nó KHÔNG chứa "FVG" và KHÔNG chứa "RSI"
-    # re.IGNORECASE là để tìm kiếm không phân biệt hoa/thường (ví dụ: FVG, fvg, Rsi...)
-    cleaned_lines = []
-    for line in lines:
-        if not re.search(r'FVG|RSI', line, re.IGNORECASE):
-            cleaned_lines.append(line.strip())  # Thêm .strip() để xóa khoảng trắng thừa
-
-    # 3. Nối các dòng đã lọc lại
-    final_suggestion = "\n".join(cleaned_lines)
-
-    # 4. Xử lý trường hợp sau khi lọc không còn gì
+    # 3. Xử lý trường hợp sau khi lọc không còn gì
     if not final_suggestion.strip():
         return "Không có gợi ý."
 
     return final_suggestion
 
 
-def format_analysis_result(result: dict) -> str:
-    """Định dạng kết quả phân tích chi tiết sang tiếng Việt."""
-    if result.get('error'):
-        return f"❌ **Lỗi:** {result.get('message')}"
-
-    # --- 1. Trích xuất dữ liệu ---
-    symbol = result.get('symbol', 'N/A')
-    timeframe = result.get('timeframe', 'N/A')
-    price = result.get('current_price', 0)
-
+def make_digest(result: dict) -> AnalysisDigest:
+    """Trích phần cần hiển thị từ kết quả phân tích."""
     indicators = result.get('indicators', {})
     smc = result.get('smc_analysis', {})
-    trading_signals = result.get('trading_signals', {})
-
-    # Lấy gợi ý gốc
-    original_suggestion = result.get('analysis', {}).get('suggestion', 'Không có gợi ý.')
-
-    # **THAY ĐỔI Ở ĐÂY: Lọc và làm sạch gợi ý**
-    suggestion = _clean_suggestion(original_suggestion)
-
-    # --- 2. Xây dựng từng phần của tin nhắn ---
+    trading_signals = result.get('trading_signals', {}) or {}
 
-    # Tiêu đề
-    header = f"📊 *Phân tích {symbol} - {timeframe}*\n"
-
-    # Thông tin giá
-    price_info = (
-        f"💰 *Giá hiện tại:* ${format_price(price)}\n"
-        f"📈 *Thay đổi 24h:* {indicators.get('price_change_pct', 0):+.2f}%\n"
+    bos_list = smc.get('break_of_structure', [])
+    lz_list = smc.get('liquidity_zones', [])
+    entry_long = trading_signals.get('entry_long', [])
+    entry_short = trading_signals.get('entry_short', [])
+    latest_bos = bos_list[-1] if bos_list else None
+    latest_lz = lz_list[-1] if lz_list else None
+
+    return AnalysisDigest(
+        symbol=result.get('symbol', 'N/A'),
+        timeframe=result.get('timeframe', 'N/A'),
+        timestamp=int(result.get('timestamp', datetime.now().timestamp())),
+        price=result.get('current_price', 0),
+        price_change_pct=indicators.get('price_change_pct', 0),
+        bos_type=latest_bos.get('type', 'N/A') if latest_bos else None,
+        bos_price=latest_bos.get('price', 0) if latest_bos else 0,
+        lz_type=latest_lz.get('type', 'N/A') if latest_lz else None,
+        lz_price=latest_lz.get('price', 0) if latest_lz else 0,
+        long_price=entry_long[-1].get('price', 0) if entry_long else None,
+        short_price=entry_short[-1].get('price', 0) if entry_short else None,
+        suggestion=result.get('analysis', {}).get('suggestion', 'Không có gợi ý.'),
     )
 
-    # Phần PHÂN TÍCH
-    analysis_section = "🔍 *ANALYSIS:*\n"
 
-    bos_list = smc.get('break_of_structure', [])
-    analysis_section += f"🔄 *Structure:*\n"
-    if bos_list:
-        latest_bos = bos_list[-1]
-        bos_type = latest_bos.get('type', 'N/A').replace('_bos', ' ').upper()
-        analysis_section += f"    *Gần nhất:* {bos_type}\n"
-        analysis_section += f"    *Price:* ${format_price(latest_bos.get('price', 0))}\n"
-
-    lz_list = smc.get('liquidity_zones', [])
-    analysis_section += f"💧 *Liquidity Zones:* \n"
-    if lz_list:
-        latest_lz = lz_list[-1]
-        lz_type = latest_lz.get('type', 'N/A').replace('_', ' ').title()
-        analysis_section += f"    *Gần nhất:* {lz_type}\n"
-        analysis_section += f"    *Level:* ${format_price(latest_lz.get('price', 0))}\n"
+def render_analysis(digest: AnalysisDigest, language: str = 'vi') -> str:
+    """Render tin nhắn phân tích; hàm thuần túy theo digest và ngôn ngữ."""
+    labels = _LABELS.get(language, _LABELS['vi'])
+    parts = [
+        # Tiêu đề
+        f"📊 *{labels['title']} {digest.symbol} - {digest.timeframe}*\n\n",
+        # Thông tin giá
+        f"💰 *{labels['price']}:* ${format_price(digest.price)}\n",
+        f"📈 *{labels['change']}:* {digest.price_change_pct:+.2f}%\n\n",
+        # Phần PHÂN TÍCH
+        "🔍 *ANALYSIS:*\n",
+        "🔄 *Structure:*\n",
+    ]
+    if digest.bos_type is not None:
+        parts.append(f"    *{labels['latest']}:* {digest.bos_type.replace('_bos', ' ').upper()}\n")
+        parts.append(f"    *Price:* ${format_price(digest.bos_price)}\n")
+    parts.append("💧 *Liquidity Zones:* \n")
+    if digest.lz_type is not None:
+        parts.append(f"    *{labels['latest']}:* {digest.lz_type.replace('_', ' ').title()}\n")
+        parts.append(f"    *Level:* ${format_price(digest.lz_price)}\n")
 
     # Phần TÍN HIỆU GIAO DỊCH
-    signals_section = "🔔 *TRADING SIGNALS:*\n"
-    has_signal = False
-    if trading_signals:
-        entry_long = trading_signals.get('entry_long', [])
-        entry_short = trading_signals.get('entry_short', [])
-
-        if entry_long:
-            has_signal = True
-            latest_long = entry_long[-1]
-            signals_section += f"🟢 *Long Signal:* ${format_price(latest_long.get('price', 0))}\n"
-            # signals_section += f"    *Tag:* {latest_long.get('tag', 'N/A')}\n"
-
-        if entry_short:
-            has_signal = True
-            latest_short = entry_short[-1]
-            signals_section += f"🔴 *Short Signal:* ${format_price(latest_short.get('price', 0))}\n"
-            # signals_section += f"    *Tag:* {latest_short.get('tag', 'N/A')}\n"
-
-    if not has_signal:
-        signals_section += "⏸️ Không có tín hiệu vào lệnh mới.\n"
-
-    # Gợi ý Trading (Đã được lọc)
-    suggestion_section = f"💡 *Gợi ý Trading:*\n{suggestion}\n"
-
-    # Dấu thời gian
-    timestamp = datetime.fromtimestamp(result.get('timestamp', datetime.now().timestamp()))
-    footer = f"🕐 *Cập nhật:* {timestamp.strftime('%H:%M:%S %d/%m/%Y')}"
-
-    # Kết hợp tất cả
-    full_message = (
-        f"{header}\n"
-        f"{price_info}\n"
-        f"{analysis_section}\n"
-        f"{signals_section}\n"
-        f"{suggestion_section}\n"
-        f"{footer}"
-    )
-
-    return full_message
+    parts.append("\n🔔 *TRADING SIGNALS:*\n")
+    if digest.long_price is not None:
+        parts.append(f"🟢 *Long Signal:* ${format_price(digest.long_price)}\n")
+    if digest.short_price is not None:
+        parts.append(f"🔴 *Short Signal:* ${format_price(digest.short_price)}\n")
+    if digest.long_price is None and digest.short_price is None:
+        parts.append(f"⏸️ {labels['no_signal']}\n")
+
+    # Gợi ý Trading (Đã được lọc) và dấu thời gian
+    timestamp = datetime.fromtimestamp(digest.timestamp)
+    parts.append(f"\n💡 *{labels['suggestion']}:*\n{_clean_suggestion(digest.suggestion)}\n\n")
+    parts.append(f"🕐 *{labels['updated']}:* {timestamp.strftime('%H:%M:%S %d/%m/%Y')}")
+    return ''.join(parts)
+
+
+def format_analysis_result(result: dict, language: str = 'vi') -> str:
+    """
+    Định dạng kết quả phân tích chi tiết sang tiếng Việt.
+    Kết quả giống nhau gửi cho nhiều người dùng chỉ được render một lần (LRU cache).
+    """
+    if result.get('error'):
+        labels = _LABELS.get(language, _LABELS['vi'])
+        return f"❌ **{labels['error']}:** {result.get('message')}"
+    with STAGE_SECONDS.labels(stage='format', exchange='', timeframe=result.get('timeframe', '')).time():
+        return _render_cache.get_or_render(make_digest(result), language)
 
 
 def format_scanner_notification(flipped_tokens: list, timeframe: str) -> str:
@@ -175,4 +245,88 @@ def format_scanner_notification(flipped_tokens: list, timeframe: str) -> str:
 
     message += "_Đây là những tín hiệu sớm, vui lòng phân tích kỹ trước khi giao dịch._"
 
-    return message
\ No newline at end of file
+    return message
+
+_ALERT_KINDS = {'custom': 'Giá tùy chỉnh', 'order_block': 'Order Block', 'liquidity': 'Vùng thanh khoản'}
+
+
+def format_price_alert(alert, price: float) -> str:
+    """Thông báo khi giá cắt qua một mức cảnh báo."""
+    direction = "📈 vượt lên" if price >= alert.price else "📉 giảm xuống"
+    kind = _ALERT_KINDS.get(alert.kind, alert.kind)
+    label = f" ({alert.label})" if alert.label else ""
+    return (f"🎯 **Cảnh báo giá #{alert.id}**\n\n"
+            f"`{alert.symbol}` {direction} qua mức ${format_price(alert.price)}\n"
+            f"📍 *Mức:* {kind}{label}\n"
+            f"💰 *Giá hiện tại:* ${format_price(price)}")
+
+
+def format_price_alert_list(alerts: list) -> str:
+    """Danh sách cảnh báo giá đang chờ của một người dùng."""
+    if not alerts:
+        return "🎯 Bạn chưa có cảnh báo giá nào.\n\n📖 `/alert BTC/USDT 4h` hoặc `/alert BTC/USDT 65000`"
+    lines = ["🎯 **Cảnh báo giá đang chờ:**\n"]
+    for alert in alerts:
+        label = f" ({alert.label})" if alert.label else ""
+        lines.append(f"#{alert.id} `{alert.symbol}` ${format_price(alert.price)} - "
+                     f"{_ALERT_KINDS.get(alert.kind, alert.kind)}{label}")
+    lines.append("\n🗑️ `/alert remove <id>` hoặc `/alert clear`")
+    return "\n".join(lines)
+
+
+def _top_line(rank: int, row: dict) -> str:
+    distance = row['level_distance']
+    level = f", cách mức gần nhất {distance:.1f}%" if distance == distance else ""  # nan: không có mức
+    return (f"{rank}. `{row['symbol']}` ${format_price(row['price'])} - "
+            f"sức mạnh {row['strength']:.1f}, RSI {row['rsi']:.0f}{level}")
+
+
+def format_top_table(top: dict) -> str:
+    """Bảng xếp hạng /top từ bảng điểm của scanner."""
+    if not top['symbols']:
+        return "📊 Chưa có dữ liệu quét thị trường. Bảng được cập nhật sau mỗi lượt quét của scanner."
+    scanned = datetime.fromtimestamp(top['scanned_at']).strftime('%H:%M %d/%m/%Y')
+    lines = [f"📊 **Top thị trường - Khung {top['timeframe']}**",
+             f"_{top['symbols']} cặp, quét lúc {scanned}_\n"]
+    sections = (('bullish', "🟢 **Xu hướng tăng mạnh nhất:**"), ('bearish', "🔴 **Xu hướng giảm mạnh nhất:**"))
+    for key, title in sections:
+        lines.append(title)
+        lines.extend(_top_line(i, row) for i, row in enumerate(top[key], 1))
+        lines.append("" if top[key] else "_Không có_\n")
+    lines.append("🔄 **CHoCH mới:**")
+    for row in top['choch']:
+        when = datetime.fromtimestamp(row['choch_time']).strftime('%d/%m %H:%M')
+        direction = "tăng" if row['choch'] > 0 else "giảm"
+        lines.append(f"• `{row['symbol']}` CHoCH {direction} lúc {when} - ${format_price(row['price'])}")
+    if not top['choch']:
+        lines.append("_Không có_")
+    return "\n".join(lines)
+
+
+_ARROWS = {'bullish': '▲', 'bearish': '▼', 'long': '▲', 'short': '▼'}
+
+
+def _bars_ago(event) -> str:
+    return f"{_ARROWS[event[0]]} {event[1]}" if event else "·"
+
+
+def format_confluence(view: dict) -> str:
+    """Bảng đa khung: xu hướng, BOS / CHoCH / tín hiệu vào lệnh gần nhất và mức giá gần nhất mỗi khung."""
+    rows = view['rows']
+    structure = ["TF   Trend BOS    CHoCH  Entry"]
+    levels = ["TF   Hỗ trợ        Kháng cự"]
+    for timeframe, row in rows.items():
+        if row is None:
+            structure.append(f"{timeframe:<4} lỗi dữ liệu")
+            continue
+        structure.append(f"{timeframe:<4} {_ARROWS.get(row['trend'], '·'):<5} {_bars_ago(row['bos']):<6} "
+                         f"{_bars_ago(row['choch']):<6} {_bars_ago(row['entry'])}")
+        support = format_price(row['support']) if row['support'] else "·"
+        resistance = format_price(row['resistance']) if row['resistance'] else "·"
+        levels.append(f"{timeframe:<4} {support:<13} {resistance}")
+    table = "\n".join(structure)
+    return (f"🧭 **Đa khung {view['symbol']}** - ${format_price(view['price'])}\n"
+            f"Đồng thuận: 🟢 {view['bullish']}/{len(rows)} tăng, 🔴 {view['bearish']}/{len(rows)} giảm\n\n"
+            f"```\n{table}\n```\n"
+            f"```\n{chr(10).join(levels)}\n```\n"
+            "_Số = số nến trước (▲ tăng / long, ▼ giảm / short)._")
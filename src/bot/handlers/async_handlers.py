@@ -0,0 +1,192 @@
+# src/bot/handlers/async_handlers.py
+"""
+Handlers for the asyncio runtime (AsyncTradingBot).
+Only the paths that wait on exchange I/O are re-implemented as coroutines; menus and
+watchlist management reuse the synchronous handlers, whose Bot API calls are scheduled
+on the event loop by LoopBotProxy.
+"""
+import logging
+from telegram import Update
+
+from src.bot import constants as const
+from src.bot import keyboards
+from src.bot import formatters
+from src.bot.utils.state_manager import get_user_state, reset_user_state
+from . import callback_handlers, command_handlers, message_handlers, error_handlers
+
+logger = logging.getLogger(__name__)
+
+# Commands that never touch the exchange and can run the sync handler inline
+SYNC_COMMANDS = {
+    'start': command_handlers.start_command,
+    'watchlist': command_handlers.watchlist_command,
+    'profile': command_handlers.profile_command,
+    'top': command_handlers.top_command,
+}
+
+
+class AsyncContext:
+    """Small stand-in for telegram.ext.CallbackContext used by the async runtime."""
+    __slots__ = ('bot', 'client', 'bot_data', 'args', 'error')
+
+    def __init__(self, bot, client, bot_data: dict):
+        self.bot = bot
+        self.client = client
+        self.bot_data = bot_data
+        self.args = []
+        self.error = None
+
+    def for_update(self) -> 'AsyncContext':
+        """Per-update context sharing the same bot_data."""
+        return AsyncContext(self.bot, self.client, self.bot_data)
+
+
+async def dispatch_update(update: Update, context: AsyncContext):
+    """Route one update; mirrors the handler registration of TradingBot._setup_handlers."""
+    try:
+        if update.callback_query:
+            await handle_callback(update, context)
+        elif update.message and update.message.text:
+            text = update.message.text.strip()
+            if text.startswith('/'):
+                await handle_command(update, context, text)
+            else:
+                await handle_message(update, context)
+    except Exception as e:
+        context.error = e
+        error_handlers.error_handler(update, context)
+
+
+async def handle_command(update: Update, context: AsyncContext, text: str):
+    command, *args = text.split()
+    command = command[1:].split('@', 1)[0].lower()
+    context.args = args
+    if command == 'analysis':
+        await analysis_command(update, context)
+    elif command == 'alert':
+        await alert_command(update, context)
+    elif command == 'confluence':
+        await confluence_command(update, context)
+    elif command in SYNC_COMMANDS:
+        SYNC_COMMANDS[command](update, context)
+
+
+async def handle_callback(update: Update, context: AsyncContext):
+    query = update.callback_query
+    parts = query.data.split(':', 3)
+    if parts[0] in (const.CB_ANALYZE, const.CB_REFRESH):
+        query.answer()
+        _, symbol, timeframe = parts
+        await perform_analysis(context, query.message.chat_id, query.message.message_id, symbol, timeframe,
+                               use_warm=parts[0] == const.CB_ANALYZE)
+    elif parts[0] == const.CB_CONFLUENCE:
+        query.answer()
+        await perform_confluence(context, query.message.chat_id, query.message.message_id, parts[1])
+    else:
+        callback_handlers.handle_callback(update, context)
+
+
+async def handle_message(update: Update, context: AsyncContext):
+    user_id = update.effective_user.id
+    waiting_for = get_user_state(user_id, context).get(const.STATE_WAITING_FOR)
+    if waiting_for == const.STATE_CUSTOM_TOKEN:
+        symbol = update.message.text.strip().upper()
+        if '/' not in symbol:
+            symbol += "/USDT"
+        reset_user_state(user_id, context)
+        await _reply_and_analyze(update, context, f"Đang tìm kiếm {symbol}...", symbol, '4h')
+    else:
+        message_handlers.handle_message(update, context)
+
+
+async def analysis_command(update: Update, context: AsyncContext):
+    """Handle /analysis <SYMBOL> <TIMEFRAME> command."""
+    if not context.args:
+        update.message.reply_text("📖 **Usage:** `/analysis BTC/USDT 4h`", parse_mode='Markdown')
+        return
+
+    symbol = context.args[0].upper()
+    if '/' not in symbol:
+        symbol += "/USDT"
+    timeframe = context.args[1].lower() if len(context.args) > 1 else '4h'
+    await _reply_and_analyze(update, context, f"🔄 Analyzing {symbol} {timeframe}...", symbol, timeframe)
+
+
+async def alert_command(update: Update, context: AsyncContext):
+    """Async version of command_handlers.alert_command (the key-level analysis is awaited)."""
+    user_id = update.effective_user.id
+    action, value = command_handlers.parse_alert_args(context.args)
+    if action != 'levels':
+        update.message.reply_text(command_handlers.alert_replies(action, value, user_id, context),
+                                  parse_mode='Markdown')
+        return
+
+    symbol, timeframe = value
+    chat_id = update.effective_chat.id
+    loading_msg = await context.client.send_message(chat_id, f"🔄 Tìm mức giá quan trọng của {symbol} {timeframe}...")
+    analysis_service = context.bot_data['async_analysis_service']
+    result = await analysis_service.get_analysis_for_symbol(symbol, timeframe)
+    levels = [] if result.get('error') else analysis_service.get_key_levels(result)
+    text = command_handlers.key_level_alert_reply(user_id, symbol, timeframe, result, levels, context)
+    if loading_msg:
+        await context.client.edit_message_text(chat_id, loading_msg['message_id'], text, parse_mode='Markdown')
+
+
+async def confluence_command(update: Update, context: AsyncContext):
+    """Async version of command_handlers.confluence_command."""
+    symbol = command_handlers.parse_symbol(context.args)
+    if not symbol:
+        update.message.reply_text("📖 **Usage:** `/confluence BTC/USDT`", parse_mode='Markdown')
+        return
+    chat_id = update.effective_chat.id
+    loading_msg = await context.client.send_message(chat_id, f"🔄 Phân tích đa khung {symbol}...")
+    if loading_msg:
+        await perform_confluence(context, chat_id, loading_msg['message_id'], symbol)
+
+
+async def perform_confluence(context: AsyncContext, chat_id: int, message_id: int, symbol: str):
+    """Async version of callback_handlers.perform_confluence."""
+    client = context.client
+    await client.edit_message_text(chat_id, message_id, f"🔄 **Đang phân tích đa khung {symbol}...**",
+                                   parse_mode='Markdown')
+    result = await context.bot_data['async_analysis_service'].get_confluence(symbol)
+    if result.get('error'):
+        await client.edit_message_text(chat_id, message_id, f"❌ **Lỗi Phân tích**\n\n{result.get('message')}",
+                                       parse_mode='Markdown')
+        return
+    await client.edit_message_text(chat_id, message_id, formatters.format_confluence(result),
+                                   reply_markup=keyboards.create_confluence_keyboard(symbol), parse_mode='Markdown')
+
+
+async def _reply_and_analyze(update: Update, context: AsyncContext, loading_text: str, symbol: str, timeframe: str):
+    chat_id = update.effective_chat.id
+    loading_msg = await context.client.send_message(chat_id, loading_text, parse_mode='Markdown')
+    if loading_msg:
+        await perform_analysis(context, chat_id, loading_msg['message_id'], symbol, timeframe)
+
+
+async def perform_analysis(context: AsyncContext, chat_id: int, message_id: int, symbol: str, timeframe: str,
+                           use_warm: bool = True):
+    """Perform analysis and update message (async version of callback_handlers.perform_analysis)."""
+    client = context.client
+    keyboard = keyboards.create_analysis_options_keyboard(symbol, timeframe)
+    hot_symbol_service = context.bot_data.get('hot_symbol_service')
+    if hot_symbol_service:
+        warm = hot_symbol_service.get_warm(symbol, timeframe) if use_warm else None
+        if warm:
+            await client.edit_message_text(chat_id, message_id, warm.text, reply_markup=keyboard,
+                                           parse_mode='Markdown')
+            return
+        if not use_warm:
+            hot_symbol_service.record_request(symbol, timeframe)
+    await client.edit_message_text(chat_id, message_id, f"🔄 **Đang phân tích {symbol} {timeframe}...**",
+                                   parse_mode='Markdown')
+    analysis_service = context.bot_data['async_analysis_service']
+    result = await analysis_service.get_analysis_for_symbol(symbol, timeframe)
+    if result.get('error'):
+        await client.edit_message_text(chat_id, message_id, f"❌ **Lỗi Phân tích**\n\n{result.get('message')}",
+                                       parse_mode='Markdown')
+        return
+    formatted_result = formatters.format_analysis_result(result)
+    await client.edit_message_text(chat_id, message_id, formatted_result, reply_markup=keyboard,
+                                   parse_mode='Markdown')
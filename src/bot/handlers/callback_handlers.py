@@ -48,10 +48,14 @@ def handle_callback(update: Update, context: CallbackContext):
     
     if action == const.CB_ANALYZE or action == const.CB_REFRESH:
         _, symbol, timeframe = parts
-        perform_analysis(query.message, context, symbol, timeframe)
+        # "Làm mới" luôn phân tích lại, không dùng kết quả tính sẵn
+        perform_analysis(query.message, context, symbol, timeframe, use_warm=action == const.CB_ANALYZE)
     elif action == const.CB_TIMEFRAME:
         _, symbol = parts
         handle_timeframe_selection(query, context, symbol)
+    elif action == const.CB_CONFLUENCE:
+        _, symbol = parts
+        perform_confluence(query.message, context, symbol)
     elif action == const.CB_WATCHLIST:
         handle_watchlist_router(update, context, parts)
     elif action == const.CB_BACK_MAIN:
@@ -67,8 +71,18 @@ def handle_callback(update: Update, context: CallbackContext):
 
 # --- Detailed Handlers ---
 
-def perform_analysis(message: Message, context: CallbackContext, symbol: str, timeframe: str):
+def perform_analysis(message: Message, context: CallbackContext, symbol: str, timeframe: str,
+                     use_warm: bool = True):
     """Perform analysis and update message."""
+    keyboard = keyboards.create_analysis_options_keyboard(symbol, timeframe)
+    hot_symbol_service = context.bot_data.get('hot_symbol_service')
+    if hot_symbol_service:
+        warm = hot_symbol_service.get_warm(symbol, timeframe) if use_warm else None
+        if warm:
+            message.edit_text(warm.text, reply_markup=keyboard, parse_mode='Markdown')
+            return
+        if not use_warm:
+            hot_symbol_service.record_request(symbol, timeframe)
     message.edit_text(f"🔄 **Đang phân tích {symbol} {timeframe}...**", parse_mode='Markdown')
     analysis_service = context.bot_data['analysis_service']
     result = analysis_service.get_analysis_for_symbol(symbol, timeframe)
@@ -76,9 +90,18 @@ def perform_analysis(message: Message, context: CallbackContext, symbol: str, ti
         message.edit_text(f"❌ **Lỗi Phân tích**\n\n{result.get('message')}", parse_mode='Markdown')
         return
     formatted_result = formatters.format_analysis_result(result)
-    keyboard = keyboards.create_analysis_options_keyboard(symbol, timeframe)
     message.edit_text(formatted_result, reply_markup=keyboard, parse_mode='Markdown')
 
+def perform_confluence(message: Message, context: CallbackContext, symbol: str):
+    """Analyze every timeframe of a symbol at once and show them as one message."""
+    message.edit_text(f"🔄 **Đang phân tích đa khung {symbol}...**", parse_mode='Markdown')
+    result = context.bot_data['analysis_service'].get_confluence(symbol)
+    if result.get('error'):
+        message.edit_text(f"❌ **Lỗi Phân tích**\n\n{result.get('message')}", parse_mode='Markdown')
+        return
+    message.edit_text(formatters.format_confluence(result), reply_markup=keyboards.create_confluence_keyboard(symbol),
+                      parse_mode='Markdown')
+
 def handle_watchlist_router(update: Update, context: CallbackContext, parts: list):
     """Route watchlist-related actions."""
     query = update.callback_query
@@ -1,10 +1,17 @@
+import os
 from telegram import Update
 from telegram.ext import CallbackContext
 from src.bot import constants as const
 from src.bot import keyboards
 from src.bot.utils.state_manager import reset_user_state
-from src.bot.formatters import format_analysis_result
-from .callback_handlers import show_watchlist_menu, perform_analysis
+from src.bot.formatters import format_analysis_result, format_price_alert_list, format_top_table
+from src.core.profiling import PROFILER
+from .callback_handlers import show_watchlist_menu, perform_analysis, perform_confluence
+
+# Telegram user id được dùng các lệnh quản trị (/profile), cách nhau bởi dấu phẩy
+ADMIN_IDS = {int(i) for i in os.getenv("ADMIN_IDS", "").split(",") if i.strip()}
+# Telegram giới hạn 4096 ký tự mỗi tin nhắn
+MAX_REPORT_CHARS = 3900
 
 def start_command(update: Update, context: CallbackContext):
     """Send welcome message and main menu."""
@@ -29,6 +36,140 @@ def analysis_command(update: Update, context: CallbackContext):
     loading_msg = update.message.reply_text(f"🔄 Analyzing {symbol} {timeframe}...", parse_mode='Markdown')
     perform_analysis(loading_msg, context, symbol, timeframe)
 
+def parse_symbol(args: list) -> str:
+    """First command argument as a pair ('btc' -> 'BTC/USDT'), or None."""
+    if not args:
+        return None
+    symbol = args[0].upper()
+    return symbol if '/' in symbol else symbol + "/USDT"
+
+def confluence_command(update: Update, context: CallbackContext):
+    """Handle /confluence <SYMBOL>: every timeframe of the symbol in one message."""
+    symbol = parse_symbol(context.args)
+    if not symbol:
+        update.message.reply_text("📖 **Usage:** `/confluence BTC/USDT`", parse_mode='Markdown')
+        return
+    loading_msg = update.message.reply_text(f"🔄 Phân tích đa khung {symbol}...")
+    perform_confluence(loading_msg, context, symbol)
+
+ALERT_USAGE = ("📖 **Usage:**\n"
+               "`/alert BTC/USDT 4h` - báo khi giá cắt OB / vùng thanh khoản gần nhất\n"
+               "`/alert BTC/USDT 65000` - báo khi giá cắt mức tùy chỉnh\n"
+               "`/alert list`, `/alert remove <id>`, `/alert clear`")
+
+
+def parse_alert_args(args: list):
+    """
+    /alert arguments -> (action, value): ('list', None), ('remove', id), ('clear', None),
+    ('price', (symbol, price)), ('levels', (symbol, timeframe)) or ('usage', None).
+    """
+    if not args or args[0].lower() == 'list':
+        return 'list', None
+    action = args[0].lower()
+    if action == 'clear':
+        return 'clear', None
+    if action == 'remove':
+        try:
+            return 'remove', int(args[1].lstrip('#'))
+        except (IndexError, ValueError):
+            return 'usage', None
+    symbol = args[0].upper()
+    if '/' not in symbol:
+        symbol += "/USDT"
+    if len(args) > 1:
+        try:
+            return 'price', (symbol, float(args[1].replace(',', '')))
+        except ValueError:
+            return 'levels', (symbol, args[1].lower())
+    return 'levels', (symbol, '4h')
+
+
+def alert_replies(action: str, value, user_id: int, context) -> str:
+    """Reply of the /alert actions that need no analysis (everything but 'levels')."""
+    price_alert_service = context.bot_data['price_alert_service']
+    if action == 'list':
+        return format_price_alert_list(price_alert_service.get_user_alerts(user_id))
+    if action == 'remove':
+        return f"🗑️ Đã xóa cảnh báo #{value}." if price_alert_service.remove(user_id, value) else f"❌ Không có cảnh báo #{value}."
+    if action == 'clear':
+        return f"🗑️ Đã xóa {price_alert_service.clear(user_id)} cảnh báo."
+    if action == 'price':
+        symbol, price = value
+        result = price_alert_service.add(user_id, symbol, price)
+        return ('✅ ' if result['success'] else '❌ ') + result['message']
+    return ALERT_USAGE
+
+
+def key_level_alert_reply(user_id: int, symbol: str, timeframe: str, result: dict, levels: list, context) -> str:
+    """Subscribe to the nearest key levels of an analysis result and describe what was added."""
+    if result.get('error'):
+        return f"❌ {result.get('message')}"
+    added = context.bot_data['price_alert_service'].add_key_levels(
+        user_id, symbol, timeframe, levels, result.get('current_price', 0))
+    if not added:
+        return f"⚠️ Không tìm thấy OB / vùng thanh khoản cho {symbol} {timeframe}."
+    return "\n".join(('✅ ' if r['success'] else '❌ ') + r['message'] for r in added) + \
+        "\n\n" + format_price_alert_list(context.bot_data['price_alert_service'].get_user_alerts(user_id))
+
+
+def alert_command(update: Update, context: CallbackContext):
+    """Handle /alert <SYMBOL> [TIMEFRAME | PRICE] | list | remove <id> | clear."""
+    user_id = update.effective_user.id
+    action, value = parse_alert_args(context.args)
+    if action != 'levels':
+        update.message.reply_text(alert_replies(action, value, user_id, context), parse_mode='Markdown')
+        return
+
+    symbol, timeframe = value
+    loading_msg = update.message.reply_text(f"🔄 Tìm mức giá quan trọng của {symbol} {timeframe}...")
+    analysis_service = context.bot_data['analysis_service']
+    result = analysis_service.get_analysis_for_symbol(symbol, timeframe)
+    levels = [] if result.get('error') else analysis_service.get_key_levels(result)
+    loading_msg.edit_text(key_level_alert_reply(user_id, symbol, timeframe, result, levels, context),
+                          parse_mode='Markdown')
+
+# Số cặp tối đa mỗi danh sách của /top
+TOP_MAX = 20
+
+def top_command(update: Update, context: CallbackContext):
+    """Handle /top [N]: market ranking read from the scanner's scan table (no exchange calls)."""
+    try:
+        n = min(int(context.args[0]), TOP_MAX) if context.args else 10
+    except ValueError:
+        update.message.reply_text("📖 **Usage:** `/top` hoặc `/top 5`", parse_mode='Markdown')
+        return
+    from src.core.scan_table import get_scan_table
+    update.message.reply_text(format_top_table(get_scan_table().top(max(n, 1))), parse_mode='Markdown')
+
 def watchlist_command(update: Update, context: CallbackContext):
     """Show watchlist menu when user types command."""
-    show_watchlist_menu(update, context)
\ No newline at end of file
+    show_watchlist_menu(update, context)
+
+def profile_command(update: Update, context: CallbackContext):
+    """
+    Admin: /profile on [rate] | off | report [top_n] [name] | (no args: status).
+    """
+    if update.effective_user.id not in ADMIN_IDS:
+        return
+
+    args = context.args or []
+    action = args[0].lower() if args else 'status'
+    try:
+        if action == 'on':
+            PROFILER.set_sample_rate(float(args[1]) if len(args) > 1 else 0.1)
+        elif action == 'off':
+            PROFILER.set_sample_rate(0)
+        elif action == 'report':
+            top_n = int(args[1]) if len(args) > 1 else 15
+            name = args[2] if len(args) > 2 else None
+            report = PROFILER.report(top_n, name)[:MAX_REPORT_CHARS]
+            update.message.reply_text(f"```\n{report}\n```", parse_mode='Markdown')
+            return
+    except ValueError:
+        update.message.reply_text("📖 **Usage:** `/profile on 0.1`, `/profile off`, `/profile report 15 run_scan`",
+                                  parse_mode='Markdown')
+        return
+
+    update.message.reply_text(
+        f"🔬 Profiling: sample rate {PROFILER.sample_rate}, {len(PROFILER.files())} profiles in `{PROFILER.directory}`",
+        parse_mode='Markdown')
@@ -6,9 +6,10 @@ from typing import List, Dict, Any
 
 def create_main_menu_keyboard() -> InlineKeyboardMarkup:
     """Tạo bàn phím cho menu chính."""
+    btc, eth = const.MAIN_MENU_PAIRS
     keyboard = [
-        [InlineKeyboardButton("📊 Phân tích BTC/USDT", callback_data=f'{const.CB_ANALYZE}:BTC/USDT:15m')],
-        [InlineKeyboardButton("📈 Phân tích ETH/USDT", callback_data=f'{const.CB_ANALYZE}:ETH/USDT:15m')],
+        [InlineKeyboardButton(f"📊 Phân tích {btc}", callback_data=f'{const.CB_ANALYZE}:{btc}:{const.MENU_TIMEFRAME}')],
+        [InlineKeyboardButton(f"📈 Phân tích {eth}", callback_data=f'{const.CB_ANALYZE}:{eth}:{const.MENU_TIMEFRAME}')],
         [InlineKeyboardButton("🔍 Chọn cặp có sẵn", callback_data=const.CB_SELECT_PAIR)],
         [InlineKeyboardButton("✏️ Nhập token tùy chỉnh", callback_data=const.CB_CUSTOM_TOKEN)],
         [InlineKeyboardButton("👁️ Watchlist", callback_data=f'{const.CB_WATCHLIST}:menu')],
@@ -34,18 +35,30 @@ def create_timeframe_selection_keyboard(symbol: str) -> InlineKeyboardMarkup:
     keyboard = [
         [InlineKeyboardButton(tf, callback_data=f'{const.CB_ANALYZE}:{symbol}:{tf}') for tf in ["15m", "1h", "4h"]],
         [InlineKeyboardButton(tf, callback_data=f'{const.CB_ANALYZE}:{symbol}:{tf}') for tf in ["1d", "3d", "1w"]],
+        [InlineKeyboardButton("🧭 Tất cả các khung", callback_data=f'{const.CB_CONFLUENCE}:{symbol}')],
         [InlineKeyboardButton("🔙 Quay lại", callback_data=const.CB_BACK_MAIN)]
     ]
     return InlineKeyboardMarkup(keyboard)
 
 
+def create_confluence_keyboard(symbol: str) -> InlineKeyboardMarkup:
+    """Tạo bàn phím sau khi phân tích đa khung."""
+    keyboard = [
+        [InlineKeyboardButton("🔄 Tải lại", callback_data=f'{const.CB_CONFLUENCE}:{symbol}')],
+        [InlineKeyboardButton("⏱️ Chọn một khung", callback_data=f'{const.CB_TIMEFRAME}:{symbol}')],
+        [InlineKeyboardButton("🔙 Menu chính", callback_data=const.CB_BACK_MAIN)]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
 def create_popular_pairs_keyboard() -> InlineKeyboardMarkup:
     """Tạo bàn phím chọn các cặp phổ biến."""
-    pairs = ["BTC/USDT", "ETH/USDT", "BNB/USDT", "ADA/USDT", "SOL/USDT", "DOT/USDT"]
+    pairs = const.POPULAR_PAIRS
+    tf = const.MENU_TIMEFRAME
     keyboard = [
         [
-            InlineKeyboardButton(pairs[i], callback_data=f'{const.CB_ANALYZE}:{pairs[i]}:15m'),
-            InlineKeyboardButton(pairs[i + 1], callback_data=f'{const.CB_ANALYZE}:{pairs[i + 1]}:15m')
+            InlineKeyboardButton(pairs[i], callback_data=f'{const.CB_ANALYZE}:{pairs[i]}:{tf}'),
+            InlineKeyboardButton(pairs[i + 1], callback_data=f'{const.CB_ANALYZE}:{pairs[i + 1]}:{tf}')
         ] for i in range(0, len(pairs), 2)
     ]
     keyboard.append([InlineKeyboardButton("🔙 Quay lại", callback_data=const.CB_BACK_MAIN)])
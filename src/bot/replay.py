@@ -0,0 +1,228 @@
+# src/bot/replay.py
+"""
+Replay of archived candles through the alert pipeline of the bot, faster than real time.
+
+A simulated clock steps from --start to --end; at the same intervals as TradingBot,
+notification_job and market_scanner_job run against a ReplayExchange that only serves
+the candles closed by the simulated time (no look-ahead). Every message the jobs would
+have sent is captured with its simulated time instead of going to Telegram, and written
+to a JSONL file. The summary doubles as a throughput benchmark: simulated days per
+wall-clock minute.
+
+    python -m src.bot.replay --archive binance-1h.smca --days 30 --data bot_data.json --output alerts.jsonl
+    python -m src.bot.replay --archive candles.json --watch BTC/USDT:1h,ETH/USDT:4h --subscribers 1 --days 7
+"""
+import argparse
+import heapq
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Optional
+
+import numpy as np
+
+from src.core.data_fetcher import register_exchange
+from src.core.fake_exchange import FakeExchange
+from src.core.timeframes import timeframe_to_seconds
+from .services.analysis_service import BotAnalysisService
+from .services.scanner_service import MarketScannerService
+from .services.scheduler_service import PERSISTENCE_FILE, SchedulerService
+from .trading_bot import market_scanner_job, notification_job
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_NAME = 'replay'
+# Same cadence as TradingBot._setup_jobs (the scanner runs every 4 hours when enabled)
+NOTIFICATION_INTERVAL = 300
+SCANNER_INTERVAL = 4 * 3600
+JOBS = {'notification_job': notification_job, 'market_scanner_job': market_scanner_job}
+
+
+class SimulatedClock:
+    """time.time() stand-in that only moves when told to."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance_to(self, now: float):
+        self.now = max(self.now, now)
+
+
+class ReplayExchange(FakeExchange):
+    """FakeExchange over recorded candles that hides every candle not yet closed at clock()."""
+
+    def series(self, symbol: str, timeframe: str) -> np.ndarray:
+        candles = super().series(symbol, timeframe)
+        close_ms = int(self.clock() * 1000) - timeframe_to_seconds(timeframe) * 1000
+        return candles[:int(np.searchsorted(candles[:, 0], close_ms, side='right'))]
+
+    def recorded_end(self, timeframes) -> Optional[float]:
+        """Close time (seconds) of the last recorded candle over all symbols, ignoring the clock."""
+        ends = []
+        for symbol in self.symbols:
+            for timeframe in timeframes:
+                in_archive = self._archive is not None and (symbol, timeframe) in self._archive
+                if timeframe in self.recorded.get(symbol, {}) or in_archive:
+                    candles = FakeExchange.series(self, symbol, timeframe)
+                    if len(candles):
+                        ends.append(candles[-1, 0] / 1000 + timeframe_to_seconds(timeframe))
+        return max(ends) if ends else None
+
+
+class RecordingBot:
+    """Takes the place of telegram.Bot for the jobs: send_message is captured, not sent."""
+
+    def __init__(self, clock: SimulatedClock):
+        self.clock = clock
+        self.job = None
+        self.messages: List[dict] = []
+
+    def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        self.messages.append({
+            'sim_time': datetime.fromtimestamp(self.clock(), tz=timezone.utc).isoformat(),
+            'sim_ts': self.clock(), 'job': self.job, 'chat_id': chat_id, 'text': text,
+        })
+        return SimpleNamespace(message_id=len(self.messages), chat_id=chat_id, text=text)
+
+
+def replay(scheduler_service: SchedulerService, start: float, end: float,
+           notification_interval: float = NOTIFICATION_INTERVAL,
+           scanner_interval: Optional[float] = SCANNER_INTERVAL, clock: SimulatedClock = None) -> dict:
+    """
+    Run the jobs of the bot from `start` to `end` (unix seconds) on the simulated clock.
+    EXCHANGE_NAME must already be registered with a ReplayExchange on the same clock.
+    Returns {'messages': [...], 'jobs': {name: {runs, messages, seconds}}, 'wall_seconds', 'simulated_days'}.
+    """
+    clock = clock or SimulatedClock(start)
+    bot = RecordingBot(clock)
+    context = SimpleNamespace(bot=bot, job=None, bot_data={
+        # SHARED_CACHE keys and expires on wall-clock time: every simulated step would hit the first result
+        'analysis_service': BotAnalysisService(EXCHANGE_NAME, shared_cache=False),
+        'scanner_service': MarketScannerService(EXCHANGE_NAME, shared_cache=False),
+        'scheduler_service': scheduler_service,
+        'scanner_states': {},
+    })
+    # (time, order, job name, interval); the order keeps simultaneous jobs in a stable sequence
+    events = [(start, 0, 'notification_job', notification_interval)]
+    if scanner_interval:
+        events.append((start, 1, 'market_scanner_job', scanner_interval))
+    heapq.heapify(events)
+
+    stats = defaultdict(lambda: {'runs': 0, 'messages': 0, 'seconds': 0.0})
+    started = time.perf_counter()
+    while events and events[0][0] <= end:
+        at, order, name, interval = heapq.heappop(events)
+        clock.advance_to(at)
+        bot.job, sent_before = name, len(bot.messages)
+        job_started = time.perf_counter()
+        try:
+            JOBS[name](context)
+        except Exception as e:
+            logger.error(f"Replay: {name} failed at {at}: {e}")
+        job_seconds = time.perf_counter() - job_started
+        for message in bot.messages[sent_before:]:
+            message['job_seconds'] = round(job_seconds, 4)
+        stats[name]['runs'] += 1
+        stats[name]['messages'] += len(bot.messages) - sent_before
+        stats[name]['seconds'] += job_seconds
+        heapq.heappush(events, (at + interval, order, name, interval))
+    wall_seconds = time.perf_counter() - started
+
+    simulated_days = (end - start) / 86400
+    for job_stats in stats.values():
+        job_stats['seconds'] = round(job_stats['seconds'], 3)
+        job_stats['avg_seconds'] = round(job_stats['seconds'] / job_stats['runs'], 4) if job_stats['runs'] else 0.0
+    return {
+        'messages': bot.messages,
+        'jobs': dict(stats),
+        'wall_seconds': round(wall_seconds, 3),
+        'simulated_days': round(simulated_days, 3),
+        'simulated_days_per_minute': round(simulated_days / wall_seconds * 60, 2) if wall_seconds else None,
+    }
+
+
+def synthetic_scheduler(watch: List[str], subscribers: int, path: str) -> SchedulerService:
+    """A SchedulerService in `path` with one user per SYMBOL:TF watch and users 1..N subscribed to the scanner."""
+    scheduler_service = SchedulerService(path)
+    for user_id, item in enumerate(watch, 1):
+        symbol, timeframe = item.rsplit(':', 1)
+        scheduler_service.add_to_watchlist(user_id, symbol, timeframe)
+    for user_id in range(1, subscribers + 1):
+        scheduler_service.add_scanner_subscriber(user_id)
+    return scheduler_service
+
+
+def write_messages(messages: List[dict], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        for message in messages:
+            f.write(json.dumps(message, ensure_ascii=False) + '\n')
+
+
+def _parse_time(text: str) -> float:
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archive', required=True, help='recorded candles: JSON recording or candle_archive file')
+    parser.add_argument('--data', default=PERSISTENCE_FILE, help='bot data file with the watchlists and subscribers')
+    parser.add_argument('--watch', help='replay these SYMBOL:TF watches instead of --data (one user each)')
+    parser.add_argument('--subscribers', type=int, default=1, help='scanner subscribers when --watch is used')
+    parser.add_argument('--start', help='UTC start, e.g. 2024-05-01 (default: --days before --end)')
+    parser.add_argument('--end', help='UTC end (default: close of the last archived candle)')
+    parser.add_argument('--days', type=float, default=30)
+    parser.add_argument('--notification-interval', type=float, default=NOTIFICATION_INTERVAL)
+    parser.add_argument('--scanner-interval', type=float, default=SCANNER_INTERVAL, help='0 disables the scanner')
+    parser.add_argument('--output', default='replay_alerts.jsonl')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    clock = SimulatedClock()
+    exchange = ReplayExchange(archive=args.archive, clock=clock)
+    register_exchange(EXCHANGE_NAME, lambda: exchange)
+
+    tmp_dir = None
+    if args.watch:
+        tmp_dir = tempfile.mkdtemp(prefix='replay-')
+        scheduler_service = synthetic_scheduler(args.watch.split(','), args.subscribers,
+                                                os.path.join(tmp_dir, 'bot_data.json'))
+    else:
+        scheduler_service = SchedulerService(args.data)
+
+    if args.end:
+        end = _parse_time(args.end)
+    else:
+        timeframes = {item['timeframe'] for watchlist in scheduler_service.get_all_watchlists().values()
+                      for item in watchlist} | {'1d'}
+        end = exchange.recorded_end(timeframes)
+        if end is None:
+            parser.error(f"{args.archive} has no candles for the timeframes {sorted(timeframes)}")
+    start = _parse_time(args.start) if args.start else end - args.days * 86400
+    clock.advance_to(start)
+
+    result = replay(scheduler_service, start, end, args.notification_interval, args.scanner_interval or None, clock)
+    write_messages(result['messages'], args.output)
+    if tmp_dir:
+        os.remove(os.path.join(tmp_dir, 'bot_data.json'))
+        os.rmdir(tmp_dir)
+
+    summary = {k: v for k, v in result.items() if k != 'messages'}
+    summary['messages'] = len(result['messages'])
+    summary['messages_per_chat'] = dict(Counter(m['chat_id'] for m in result['messages']).most_common(10))
+    summary['start'] = datetime.fromtimestamp(start, tz=timezone.utc).isoformat()
+    summary['end'] = datetime.fromtimestamp(end, tz=timezone.utc).isoformat()
+    summary['output'] = args.output
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,46 @@
 # src/bot/services/analysis_service.py
 import logging
-from src.core.analysis import AdvancedSMC
 from datetime import datetime
+from src.core.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
 
 class BotAnalysisService:
-    def __init__(self):
-        self.smc_analyzer = AdvancedSMC()
+    def __init__(self, exchange_name: str = 'binance', shared_cache: bool = True):
+        self.exchange_name = exchange_name
+        # False: không dùng SHARED_CACHE (replay chạy trên đồng hồ giả lập)
+        self.shared_cache = shared_cache
+        self._smc_analyzer = None
 
+    @property
+    def smc_analyzer(self):
+        # Import pandas/ccxt lần đầu cần đến (hoặc trong luồng warm-up), không phải lúc khởi động bot
+        if self._smc_analyzer is None:
+            from src.core.analysis import AdvancedSMC
+            self._smc_analyzer = AdvancedSMC(self.exchange_name)
+        return self._smc_analyzer
+
+    @profiled('get_analysis_for_symbol')
     def get_analysis_for_symbol(self, symbol: str, timeframe: str) -> dict:
         """
         Lấy phân tích chi tiết từ lõi và tạo thông tin chi tiết cho bot.
         """
         logger.info(f"Bắt đầu phân tích chi tiết cho '{symbol}' ({timeframe}).")
 
-        analysis_data = self.smc_analyzer.get_trading_signals(symbol, timeframe)
+        analysis_data = self.get_trading_signals(symbol, timeframe)
+        return self.build_bot_result(analysis_data, symbol)
+
+    def get_trading_signals(self, symbol: str, timeframe: str):
+        """Kết quả phân tích lõi, qua cache dùng chung giữa các tiến trình nếu có (SHARED_CACHE)."""
+        if not self.shared_cache:
+            return self.smc_analyzer.get_trading_signals(symbol, timeframe)
+        from src.core.shared_cache import cached_analysis
+        return cached_analysis(self.exchange_name, symbol, timeframe,
+                               lambda: self.smc_analyzer.get_trading_signals(symbol, timeframe))
 
+    def build_bot_result(self, analysis_data: dict, symbol: str) -> dict:
+        """Gắn gợi ý giao dịch vào kết quả phân tích lõi (không gọi sàn)."""
         if not analysis_data:
             return {'error': True, 'message': f'Không thể phân tích {symbol}.'}
 
@@ -36,6 +59,24 @@ class BotAnalysisService:
             logger.error(f"Lỗi khi xử lý và tạo thông tin chi tiết cho bot: {e}", exc_info=True)
             return {'error': True, 'message': 'Lỗi xử lý dữ liệu sau khi phân tích.'}
 
+    @profiled('get_confluence')
+    def get_confluence(self, symbol: str) -> dict:
+        """
+        Phân tích đa khung (15m -> 1w) của một symbol trong một lần: nến các khung được tải song song,
+        4h / 3d dựng lại từ nến 1h / 1d (src/core/confluence.py).
+        """
+        from src.core.confluence import analyze_confluence
+        logger.info(f"Bắt đầu phân tích đa khung cho '{symbol}'.")
+        try:
+            return confluence_result(analyze_confluence(self.smc_analyzer, symbol))
+        except Exception as e:
+            logger.error(f"Lỗi phân tích đa khung {symbol}: {e}", exc_info=True)
+            return {'error': True, 'message': f'Không thể phân tích {symbol}.'}
+
+    def get_key_levels(self, result: dict) -> list:
+        """Mức giá quan trọng (OB, vùng thanh khoản) của một kết quả phân tích."""
+        return self.smc_analyzer.get_key_levels(result.get('smc_analysis', {}))
+
     def _get_trading_suggestion(self, smc: dict, indicators: dict, trading_signals: dict) -> str:
         """
         Logic để tạo gợi ý giao dịch chi tiết, kết hợp nhiều yếu tố.
@@ -64,4 +105,11 @@ class BotAnalysisService:
             return "\n".join([f"• {s}" for s in suggestions])
         except Exception as e:
             logger.error(f"Lỗi trong hàm _get_trading_suggestion: {e}")
-            return "⚠️ Không thể tạo gợi ý - Không đủ dữ liệu."
\ No newline at end of file
+            return "⚠️ Không thể tạo gợi ý - Không đủ dữ liệu."
+
+
+def confluence_result(view: dict) -> dict:
+    """Kết quả đa khung cho bot: lỗi nếu không khung nào phân tích được."""
+    if not view['analyzed']:
+        return {'error': True, 'message': f"Không thể phân tích {view['symbol']}."}
+    return dict(view, error=False)
@@ -0,0 +1,193 @@
+# src/bot/services/async_analysis_service.py
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from src.core.metrics import STAGE_SECONDS
+from src.core.profiling import profiled
+from .analysis_service import BotAnalysisService, confluence_result
+from .scanner_service import MarketScannerService, aborted_scan_states, scan_error_budget
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", os.cpu_count() or 2))
+SCAN_CONCURRENCY = 20
+
+
+class AsyncAnalysisService:
+    """
+    Async counterpart of BotAnalysisService/MarketScannerService for the asyncio runtime.
+    Exchange I/O runs on the event loop (ccxt.async_support); the CPU-bound SMC code runs
+    in a process pool so it never blocks the loop.
+    """
+
+    def __init__(self, exchange_name: str = 'binance', exchange=None, executor: Executor = None,
+                 candle_limit: int = 200):
+        self.exchange_name = exchange_name
+        self.candle_limit = candle_limit
+        self._exchange = exchange
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._bot_service = BotAnalysisService(exchange_name)
+        self._scanner = MarketScannerService(exchange_name)
+        # (symbol, timeframe) -> Task, so concurrent taps on the same pair share one analysis
+        self._inflight = {}
+
+    @property
+    def exchange(self):
+        if self._exchange is None:
+            from src.core.data_fetcher import create_async_exchange
+            self._exchange = create_async_exchange(self.exchange_name)
+        return self._exchange
+
+    async def load_markets(self):
+        """
+        Load market metadata off the request path. With a snapshot the markets are already
+        usable; they are re-fetched in the background without going through load_markets(),
+        whose shared future would make the first requests wait for the reload.
+        """
+        from src.core.data_fetcher import save_markets_snapshot
+
+        exchange = self.exchange
+        if not hasattr(exchange, 'set_markets'):
+            # The router reloads (and snapshots) the markets of each of its sources
+            await exchange.load_markets(reload=True)
+            return
+        try:
+            if not exchange.markets:
+                await exchange.load_markets()
+            else:
+                currencies = await exchange.fetch_currencies() if exchange.has.get('fetchCurrencies') is True else None
+                exchange.set_markets(await exchange.fetch_markets(), currencies)
+            save_markets_snapshot(exchange)
+            logger.info(f"Refreshed {len(exchange.markets)} {self.exchange_name} markets.")
+        except Exception as e:
+            logger.error(f"Error loading {self.exchange_name} markets: {e}")
+
+    async def warm_up(self):
+        """Start the analysis workers (importing pandas/numpy in each) and load markets before the first request."""
+        from src.bot.startup import import_analysis
+
+        loop = asyncio.get_running_loop()
+        workers = getattr(self.executor, '_max_workers', 1)
+        await asyncio.gather(self.load_markets(),
+                             *(loop.run_in_executor(self.executor, import_analysis) for _ in range(workers)),
+                             return_exceptions=True)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=ANALYSIS_WORKERS,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    async def get_analysis_for_symbol(self, symbol: str, timeframe: str) -> dict:
+        """Same result as BotAnalysisService.get_analysis_for_symbol, without blocking the loop."""
+        key = (symbol, timeframe)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze(symbol, timeframe))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _analyze(self, symbol: str, timeframe: str) -> dict:
+        from src.core.shared_cache import get_shared_cache
+
+        logger.info(f"Bắt đầu phân tích chi tiết cho '{symbol}' ({timeframe}).")
+        cache = get_shared_cache()
+        if cache is None:
+            analysis_data = await self._trading_signals(symbol, timeframe)
+        else:
+            analysis_data = await cache.get_or_compute_async(self.exchange_name, symbol, timeframe,
+                                                             lambda: self._trading_signals(symbol, timeframe))
+        return self._bot_service.build_bot_result(analysis_data, symbol)
+
+    async def _trading_signals(self, symbol: str, timeframe: str):
+        # src.core (pandas/ccxt) không được import lúc khởi động; lần gọi đầu tiên mới import
+        from src.core.analysis import analyze_ohlcv
+        from src.core.data_fetcher import fetch_ohlcv_async
+
+        ohlcv = await fetch_ohlcv_async(self.exchange, symbol, timeframe, self.candle_limit)
+        analysis_data = None
+        if ohlcv:
+            loop = asyncio.get_running_loop()
+            try:
+                # Stage timings inside the worker process stay there; the parent sees the round trip
+                with STAGE_SECONDS.labels(stage='analysis_worker', exchange=self.exchange_name,
+                                          timeframe=timeframe).time():
+                    analysis_data = await loop.run_in_executor(self.executor, analyze_ohlcv, ohlcv, symbol, timeframe)
+            except Exception as e:
+                logger.error(f"Error in SMC analysis worker for {symbol}: {e}")
+        if analysis_data:
+            # The worker does not know the exchange; the router records the source it picked
+            analysis_data['source'] = getattr(ohlcv, 'source', None) or self.exchange_name
+        return analysis_data
+
+    @profiled('get_confluence')
+    async def get_confluence(self, symbol: str) -> dict:
+        """Async BotAnalysisService.get_confluence: fetches on the loop, one worker task per timeframe."""
+        from src.core.confluence import (
+            CONFLUENCE_TIMEFRAMES, analyze_confluence_ohlcv, confluence_view, fetch_plan, resample_ohlcv, split_candles
+        )
+        from src.core.data_fetcher import fetch_ohlcv_async
+
+        logger.info(f"Bắt đầu phân tích đa khung cho '{symbol}'.")
+        plan = fetch_plan(CONFLUENCE_TIMEFRAMES, self.candle_limit)
+        fetched = await asyncio.gather(*(fetch_ohlcv_async(self.exchange, symbol, tf, n) for tf, n in plan.items()))
+        candles = split_candles(dict(zip(plan, fetched)), CONFLUENCE_TIMEFRAMES, self.candle_limit, resample_ohlcv)
+        loop = asyncio.get_running_loop()
+
+        async def _row(timeframe, ohlcv):
+            if not ohlcv:
+                return None
+            try:
+                return await loop.run_in_executor(self.executor, analyze_confluence_ohlcv, ohlcv, symbol, timeframe)
+            except Exception as e:
+                logger.error(f"Error in confluence worker for {symbol} {timeframe}: {e}")
+                return None
+
+        rows = await asyncio.gather(*(_row(tf, ohlcv) for tf, ohlcv in candles.items()))
+        return confluence_result(confluence_view(symbol, dict(zip(candles, rows))))
+
+    def get_key_levels(self, result: dict) -> list:
+        return self._bot_service.get_key_levels(result)
+
+    @profiled('run_scan')
+    async def run_scan(self, previous_states: dict, timeframe='1d', symbol_filter=None) -> (list, dict):
+        """Async variant of MarketScannerService.run_scan with bounded concurrency."""
+        from src.core.data_fetcher import get_top_symbols_by_volume_async
+
+        flipped_tokens = []
+        new_states = {}
+        scores = []
+        symbols = await get_top_symbols_by_volume_async(self.exchange, 250)
+        if symbol_filter is not None:
+            symbols = [s for s in symbols if symbol_filter(s)]
+        semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+        budget = scan_error_budget(len(symbols), self.exchange.id)
+
+        async def _scan_one(symbol):
+            async with semaphore:
+                if budget.exhausted():
+                    return
+                result = await self.get_analysis_for_symbol(symbol, timeframe)
+            if result.get('error'):
+                budget.record_error()
+                return
+            self._scanner.evaluate_symbol(symbol, result, previous_states, new_states, flipped_tokens, scores)
+
+        await asyncio.gather(*(_scan_one(s) for s in symbols))
+        await asyncio.to_thread(self._scanner.save_scores, scores, timeframe)
+        if budget.exhausted():
+            logger.warning(f"--- SCAN ABORTED after {len(new_states)}/{len(symbols)} symbols, {budget.errors} errors ---")
+            return flipped_tokens, aborted_scan_states(previous_states, new_states)
+        return flipped_tokens, new_states
+
+    async def close(self):
+        if self._exchange is not None and hasattr(self._exchange, 'close'):
+            await self._exchange.close()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+# src/bot/services/hot_symbol_service.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.bot import constants as const
+from src.bot.formatters import format_analysis_result
+from src.core.metrics import CACHE_REQUESTS
+from src.core.timeframes import next_candle_close
+
+logger = logging.getLogger(__name__)
+
+# Một cặp ngoài menu trở thành "hot" khi có ít nhất N yêu cầu trong cửa sổ thời gian
+HOT_SYMBOL_MIN_REQUESTS = int(os.getenv('HOT_SYMBOL_MIN_REQUESTS', '5'))
+HOT_SYMBOL_WINDOW_SECONDS = int(os.getenv('HOT_SYMBOL_WINDOW_SECONDS', '3600'))
+HOT_SYMBOL_MAX_PAIRS = int(os.getenv('HOT_SYMBOL_MAX_PAIRS', '20'))
+# Chờ vài giây sau khi nến đóng để sàn kịp công bố nến đã đóng
+CANDLE_CLOSE_DELAY = 3
+
+Pair = Tuple[str, str]
+
+_WARM_TAPS = CACHE_REQUESTS.labels(cache='hot_symbol', result='hit')
+_COLD_TAPS = CACHE_REQUESTS.labels(cache='hot_symbol', result='miss')
+
+
+def menu_pairs() -> List[Pair]:
+    """Các cặp có nút bấm trên menu chính và menu cặp phổ biến."""
+    symbols = dict.fromkeys(const.MAIN_MENU_PAIRS + const.POPULAR_PAIRS)
+    return [(symbol, const.MENU_TIMEFRAME) for symbol in symbols]
+
+
+def seconds_until_next_run(now: float) -> float:
+    """Delay until the next whole minute + CANDLE_CLOSE_DELAY (every candle closes on a minute)."""
+    return 60 - now % 60 + CANDLE_CLOSE_DELAY
+
+
+class WarmEntry(NamedTuple):
+    result: dict
+    text: str
+    expires_at: float  # close time of the candle the analysis was computed in
+
+
+class HotSymbolService:
+    """
+    Keeps the analyses of the menu pairs, plus the pairs requested most in the recent
+    window, computed and rendered in memory. Each entry is recomputed right after its
+    candle closes; until then, taps on that pair are answered without touching the exchange.
+    """
+
+    def __init__(self, pinned: Optional[List[Pair]] = None, min_requests: int = HOT_SYMBOL_MIN_REQUESTS,
+                 window_seconds: int = HOT_SYMBOL_WINDOW_SECONDS, max_pairs: int = HOT_SYMBOL_MAX_PAIRS,
+                 clock=time.time):
+        self.pinned = list(pinned if pinned is not None else menu_pairs())
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.max_pairs = max_pairs
+        self.clock = clock
+        self._entries: Dict[Pair, WarmEntry] = {}
+        self._requests = deque()  # (time, pair) trong cửa sổ thống kê
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self.taps = 0
+        self.warm_taps = 0
+
+    # --- Request stats ---
+    def _prune(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._requests and self._requests[0][0] < cutoff:
+            _, pair = self._requests.popleft()
+            self._counts[pair] -= 1
+            if not self._counts[pair]:
+                del self._counts[pair]
+
+    def record_request(self, symbol: str, timeframe: str):
+        """Count a request for the popularity stats without looking up the cache."""
+        now = self.clock()
+        with self._lock:
+            self._requests.append((now, (symbol, timeframe)))
+            self._counts[(symbol, timeframe)] += 1
+            self._prune(now)
+
+    def get_warm(self, symbol: str, timeframe: str) -> Optional[WarmEntry]:
+        """Record a tap and return its pre-rendered analysis if it is still for the current candle."""
+        self.record_request(symbol, timeframe)
+        now = self.clock()
+        with self._lock:
+            self.taps += 1
+            entry = self._entries.get((symbol, timeframe))
+            if entry is None or entry.expires_at <= now:
+                _COLD_TAPS.inc()
+                return None
+            self.warm_taps += 1
+        _WARM_TAPS.inc()
+        return entry
+
+    def hot_pairs(self) -> List[Pair]:
+        """Menu pairs first, then the most requested pairs above the threshold."""
+        with self._lock:
+            self._prune(self.clock())
+            popular = [pair for pair, count in self._counts.most_common() if count >= self.min_requests]
+        pairs = dict.fromkeys(self.pinned)
+        for pair in popular:
+            if len(pairs) >= len(self.pinned) + self.max_pairs:
+                break
+            pairs.setdefault(pair)
+        return list(pairs)
+
+    # --- Pre-computation ---
+    def due_pairs(self) -> List[Pair]:
+        """Hot pairs with no analysis for the current candle. Pairs no longer hot are dropped."""
+        hot = self.hot_pairs()
+        now = self.clock()
+        with self._lock:
+            for pair in set(self._entries) - set(hot):
+                del self._entries[pair]
+            return [pair for pair in hot if pair not in self._entries or self._entries[pair].expires_at <= now]
+
+    def store(self, symbol: str, timeframe: str, result: dict) -> bool:
+        if not result or result.get('error'):
+            return False
+        entry = WarmEntry(result, format_analysis_result(result), next_candle_close(timeframe, self.clock()))
+        with self._lock:
+            self._entries[(symbol, timeframe)] = entry
+        return True
+
+    def refresh(self, analysis_service) -> int:
+        """Recompute the due pairs with the sync BotAnalysisService. Returns the number refreshed."""
+        refreshed = 0
+        for symbol, timeframe in self.due_pairs():
+            refreshed += self.store(symbol, timeframe, analysis_service.get_analysis_for_symbol(symbol, timeframe))
+        return refreshed
+
+    async def refresh_async(self, analysis_service) -> int:
+        """Same as refresh() with the AsyncAnalysisService; all due pairs run concurrently."""
+        pairs = self.due_pairs()
+        results = await asyncio.gather(*(analysis_service.get_analysis_for_symbol(s, tf) for s, tf in pairs))
+        return sum(self.store(s, tf, result) for (s, tf), result in zip(pairs, results))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'taps': self.taps,
+                'warm_taps': self.warm_taps,
+                'warm_share': round(self.warm_taps / self.taps, 3) if self.taps else 0.0,
+                'warm_pairs': len(self._entries),
+            }
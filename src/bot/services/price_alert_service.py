@@ -0,0 +1,289 @@
+# src/bot/services/price_alert_service.py
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from src.core.file_lock import file_lock, file_signature, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+PRICE_ALERTS_FILE = os.getenv('PRICE_ALERTS_FILE', 'price_alerts.json')
+# Số cảnh báo giá tối đa mỗi người dùng
+PRICE_ALERTS_PER_USER = int(os.getenv('PRICE_ALERTS_PER_USER', '10'))
+# Chu kỳ lấy giá (giây) để kiểm tra cảnh báo
+PRICE_ALERT_INTERVAL = int(os.getenv('PRICE_ALERT_INTERVAL', '30'))
+
+
+class PriceAlert(NamedTuple):
+    id: int
+    user_id: int
+    symbol: str
+    price: float
+    kind: str  # 'custom', 'order_block' or 'liquidity'
+    label: str
+    created_at: float
+
+
+class _SymbolAlerts:
+    """Alert prices of one symbol kept sorted, with the alert id at the same index."""
+    __slots__ = ('prices', 'ids', 'last_price')
+
+    def __init__(self):
+        self.prices: List[float] = []
+        self.ids: List[int] = []
+        self.last_price: Optional[float] = None
+
+    def insert(self, price: float, alert_id: int):
+        i = bisect.bisect_right(self.prices, price)
+        self.prices.insert(i, price)
+        self.ids.insert(i, alert_id)
+
+    def remove(self, price: float, alert_id: int):
+        i = bisect.bisect_left(self.prices, price)
+        while i < len(self.prices) and self.prices[i] == price:
+            if self.ids[i] == alert_id:
+                del self.prices[i], self.ids[i]
+                return
+            i += 1
+
+    def crossed(self, price: float) -> List[int]:
+        """Pop the ids of the alerts between the last price and `price` (the level itself included)."""
+        previous, self.last_price = self.last_price, price
+        if previous is None or previous == price:
+            return []
+        if price > previous:
+            lo, hi = bisect.bisect_right(self.prices, previous), bisect.bisect_right(self.prices, price)
+        else:
+            lo, hi = bisect.bisect_left(self.prices, price), bisect.bisect_left(self.prices, previous)
+        fired = self.ids[lo:hi]
+        del self.prices[lo:hi], self.ids[lo:hi]
+        return fired
+
+
+def nearest_key_levels(levels: List[dict], current_price: float) -> List[dict]:
+    """From AdvancedSMC.get_key_levels: the order-block and liquidity level nearest to the current price."""
+    nearest = {}
+    for level in levels:
+        price = level.get('price')
+        if price is None or price != price or price <= 0:
+            continue
+        best = nearest.get(level['type'])
+        if best is None or abs(price - current_price) < abs(best['price'] - current_price):
+            nearest[level['type']] = level
+    return [nearest[t] for t in ('order_block', 'liquidity') if t in nearest]
+
+
+class PriceAlertService:
+    """
+    One-shot price alerts: an alert fires (and is removed) the first time the price crosses
+    its level. Each price update bisects the sorted levels of its symbol between the previous
+    and the new price, so a tick costs O(log n + k) whatever the number of alerts.
+    """
+
+    def __init__(self, persistence_file: str = PRICE_ALERTS_FILE, max_per_user: int = PRICE_ALERTS_PER_USER,
+                 clock=time.time):
+        self.persistence_file = persistence_file
+        self.max_per_user = max_per_user
+        self.clock = clock
+        self._alerts: Dict[int, PriceAlert] = {}
+        self._by_symbol: Dict[str, _SymbolAlerts] = {}
+        self._by_user: Dict[int, set] = {}
+        self._next_id = 1
+        self._dirty = False
+        self._fired = set()  # ids fired here and not saved yet: not reloaded from the file
+        self._signature = None
+        self._lock = threading.Lock()
+        self._load_data()
+
+    # --- Persistence ---
+    # The file is shared by the bot replicas: reads first pick up the changes of the others
+    # (one stat call), changes are read-modify-write under the file lock.
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.persistence_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Error loading price alerts from {self.persistence_file}: {e}")
+            return None
+
+    def _load_data(self):
+        """(Re)build the alerts from the file if it changed; keeps the last prices and skips the alerts fired here."""
+        if not self.persistence_file:
+            return
+        signature = file_signature(self.persistence_file)
+        if signature is None or signature == self._signature:
+            return
+        data = self._read()
+        with self._lock:
+            self._signature = signature
+            if data is None:
+                return
+            last_prices = dict(data.get('last_prices', {}))
+            last_prices.update((s, a.last_price) for s, a in self._by_symbol.items() if a.last_price is not None)
+            self._alerts, self._by_symbol, self._by_user = {}, {}, {}
+            # In price order every insert appends, so loading stays linear in the number of alerts
+            for row in sorted(data.get('alerts', []), key=lambda r: r['price']):
+                if row['id'] not in self._fired:
+                    self._insert(PriceAlert(**row))
+            for symbol, symbol_alerts in self._by_symbol.items():
+                symbol_alerts.last_price = last_prices.get(symbol)
+            self._next_id = max(self._next_id, data.get('next_id', 1), max(self._alerts, default=0) + 1)
+
+    def reload(self):
+        """Pick up the alerts added or removed by other replicas."""
+        self._load_data()
+
+    def _save(self):
+        """Write the alerts (callers hold the file lock and reloaded first)."""
+        if not self.persistence_file:
+            with self._lock:
+                self._fired.clear()
+                self._dirty = False
+            return
+        with self._lock:
+            data = {
+                'next_id': self._next_id,
+                'alerts': [a._asdict() for a in self._alerts.values()],
+                'last_prices': {s: a.last_price for s, a in self._by_symbol.items() if a.last_price is not None},
+            }
+            fired, self._fired = self._fired, set()
+            self._dirty = False
+        try:
+            write_json_atomic(self.persistence_file, data)
+            self._signature = file_signature(self.persistence_file)
+        except IOError as e:
+            with self._lock:
+                self._fired |= fired
+                self._dirty = True
+            logger.error(f"Cannot save price alerts to {self.persistence_file}: {e}")
+
+    def save_if_dirty(self):
+        """Write the fired alerts' removal (called by the job, not per change), merged with the file."""
+        if not self._dirty:
+            return
+        with file_lock(self.persistence_file):
+            self._load_data()
+            self._save()
+
+    # --- Alerts ---
+    def _insert(self, alert: PriceAlert):
+        self._alerts[alert.id] = alert
+        self._by_symbol.setdefault(alert.symbol, _SymbolAlerts()).insert(alert.price, alert.id)
+        self._by_user.setdefault(alert.user_id, set()).add(alert.id)
+
+    def _discard(self, alert: PriceAlert):
+        del self._alerts[alert.id]
+        self._by_user[alert.user_id].discard(alert.id)
+        if not self._by_user[alert.user_id]:
+            del self._by_user[alert.user_id]
+
+    def add(self, user_id: int, symbol: str, price: float, kind: str = 'custom', label: str = '',
+            current_price: Optional[float] = None) -> dict:
+        """
+        Subscribe `user_id` to `symbol` crossing `price`. `current_price` (if known) seeds the
+        previous price of the symbol so a crossing before the next update is not missed.
+        """
+        if price <= 0:
+            return {'success': False, 'message': 'Giá cảnh báo phải lớn hơn 0.'}
+        with file_lock(self.persistence_file):
+            result = self._add(user_id, symbol, price, kind, label, current_price)
+            if result['success']:
+                self._save()
+        if result['success']:
+            alert = result['alert']
+            logger.info(f"User {user_id} added price alert #{alert.id} {symbol} @ {price} ({kind}).")
+        return result
+
+    def _add(self, user_id: int, symbol: str, price: float, kind: str, label: str,
+             current_price: Optional[float]) -> dict:
+        self._load_data()
+        with self._lock:
+            user_alerts = self._by_user.get(user_id, set())
+            if len(user_alerts) >= self.max_per_user:
+                return {'success': False, 'message': f'Đã đủ {self.max_per_user} cảnh báo giá. Xóa bớt bằng /alert remove <id>.'}
+            if any(self._alerts[i].symbol == symbol and self._alerts[i].price == price for i in user_alerts):
+                return {'success': False, 'message': f'Đã có cảnh báo {symbol} tại giá này.'}
+            alert = PriceAlert(self._next_id, user_id, symbol, float(price), kind, label, self.clock())
+            self._next_id += 1
+            self._insert(alert)
+            symbol_alerts = self._by_symbol[symbol]
+            if symbol_alerts.last_price is None and current_price:
+                symbol_alerts.last_price = float(current_price)
+        return {'success': True, 'message': f'Đã thêm cảnh báo #{alert.id}.', 'alert': alert}
+
+    def add_key_levels(self, user_id: int, symbol: str, timeframe: str, levels: List[dict],
+                       current_price: float) -> List[dict]:
+        """Alerts on the nearest order-block and liquidity level of an analysis (see nearest_key_levels)."""
+        return [
+            self.add(user_id, symbol, level['price'], level['type'], f"{level['direction']} {timeframe}", current_price)
+            for level in nearest_key_levels(levels, current_price)
+        ]
+
+    def remove(self, user_id: int, alert_id: int) -> bool:
+        with file_lock(self.persistence_file):
+            self._load_data()
+            with self._lock:
+                alert = self._alerts.get(alert_id)
+                if alert is None or alert.user_id != user_id:
+                    return False
+                self._by_symbol[alert.symbol].remove(alert.price, alert.id)
+                self._discard(alert)
+            self._save()
+            return True
+
+    def clear(self, user_id: int) -> int:
+        with file_lock(self.persistence_file):
+            self._load_data()
+            with self._lock:
+                alerts = [self._alerts[i] for i in self._by_user.get(user_id, ())]
+                for alert in alerts:
+                    self._by_symbol[alert.symbol].remove(alert.price, alert.id)
+                    self._discard(alert)
+            if alerts:
+                self._save()
+            return len(alerts)
+
+    def get_user_alerts(self, user_id: int) -> List[PriceAlert]:
+        self._load_data()
+        with self._lock:
+            return sorted((self._alerts[i] for i in self._by_user.get(user_id, ())), key=lambda a: (a.symbol, a.price))
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one pending alert (the ones whose price must be polled); reloads the file."""
+        self._load_data()
+        with self._lock:
+            return [symbol for symbol, alerts in self._by_symbol.items() if alerts.ids]
+
+    # --- Price updates ---
+    def update_price(self, symbol: str, price: float) -> List[PriceAlert]:
+        """Feed the latest price of a symbol; returns (and removes) the alerts it crossed."""
+        with self._lock:
+            symbol_alerts = self._by_symbol.get(symbol)
+            if symbol_alerts is None:
+                return []
+            fired = [self._alerts[i] for i in symbol_alerts.crossed(float(price))]
+            for alert in fired:
+                self._discard(alert)
+                self._fired.add(alert.id)
+            if fired:
+                self._dirty = True
+            if not symbol_alerts.ids:
+                del self._by_symbol[symbol]
+            return fired
+
+    def update_prices(self, prices: Dict[str, float]) -> List[PriceAlert]:
+        fired = []
+        for symbol, price in prices.items():
+            fired.extend(self.update_price(symbol, price))
+        return fired
+
+    def stats(self) -> dict:
+        self._load_data()
+        with self._lock:
+            return {'alerts': len(self._alerts), 'symbols': len(self._by_symbol), 'users': len(self._by_user)}
@@ -1,12 +1,45 @@
 import logging
-from src.core.analysis import AdvancedSMC
-from src.core.data_fetcher import get_top_symbols_by_volume
+import os
+import time
+from src.core.profiling import profiled
+from src.core.rate_limiter import priority
 
 logger = logging.getLogger(__name__)
 
+# Dừng lượt quét khi số symbol lỗi vượt quá tỉ lệ này (tối thiểu SCANNER_MIN_ERRORS)
+SCANNER_ERROR_BUDGET = float(os.getenv('SCANNER_ERROR_BUDGET', '0.2'))
+SCANNER_MIN_ERRORS = int(os.getenv('SCANNER_MIN_ERRORS', '10'))
+
+def scan_error_budget(total: int, exchange_name: str):
+    from src.core.circuit_breaker import ErrorBudget
+    return ErrorBudget(total, SCANNER_ERROR_BUDGET, SCANNER_MIN_ERRORS, exchange_name)
+
+def aborted_scan_states(previous_states: dict, new_states: dict) -> dict:
+    """States after an aborted pass: the symbols not scanned keep their last known state."""
+    return dict(previous_states, **new_states)
+
 class MarketScannerService:
-    def __init__(self):
-        self.smc_analyzer = AdvancedSMC()
+    def __init__(self, exchange_name: str = 'binance', shared_cache: bool = True):
+        self.exchange_name = exchange_name
+        # False: bypass SHARED_CACHE (the replay runs on a simulated clock)
+        self.shared_cache = shared_cache
+        self._smc_analyzer = None
+
+    @property
+    def smc_analyzer(self):
+        # Import pandas/ccxt lần đầu cần đến (hoặc trong luồng warm-up), không phải lúc khởi động bot
+        if self._smc_analyzer is None:
+            from src.core.analysis import AdvancedSMC
+            self._smc_analyzer = AdvancedSMC(self.exchange_name)
+        return self._smc_analyzer
+
+    def get_trading_signals(self, symbol: str, timeframe: str):
+        """Analysis of one symbol, shared with the other bot processes through SHARED_CACHE if set."""
+        if not self.shared_cache:
+            return self.smc_analyzer.get_trading_signals(symbol, timeframe)
+        from src.core.shared_cache import cached_analysis
+        return cached_analysis(self.exchange_name, symbol, timeframe,
+                               lambda: self.smc_analyzer.get_trading_signals(symbol, timeframe))
 
     def _determine_market_state(self, smc: dict, trading_signals: dict) -> str:
         """
@@ -29,45 +62,104 @@ class MarketScannerService:
         
         return "Neutral"
 
-    def run_scan(self, previous_states: dict, timeframe='1d') -> (list, dict):
+    @profiled('run_scan')
+    @priority('scanner')
+    def run_scan(self, previous_states: dict, timeframe='1d', symbol_filter=None) -> (list, dict):
         """
         Scan 200 tokens, compare states and return tokens with changes.
+        symbol_filter: only scan the symbols it accepts (this replica's shard).
         """
         flipped_tokens = []
         new_states = {}
+        scores = []
 
-        top_250_symbols = get_top_symbols_by_volume('binance', 250)
+        from src.core.data_fetcher import get_top_symbols_by_volume
+        top_250_symbols = get_top_symbols_by_volume(self.exchange_name, 250)
+        if symbol_filter is not None:
+            top_250_symbols = [s for s in top_250_symbols if symbol_filter(s)]
+        budget = scan_error_budget(len(top_250_symbols), self.exchange_name)
 
         for i, symbol in enumerate(top_250_symbols):
+            if budget.exhausted():
+                logger.warning(f"--- SCAN ABORTED after {i}/{len(top_250_symbols)} symbols, {budget.errors} errors ---")
+                self.save_scores(scores, timeframe)
+                return flipped_tokens, aborted_scan_states(previous_states, new_states)
             logger.info(f"[SCAN {i+1}/{len(top_250_symbols)}] Analyzing {symbol}...")
             try:
                 # Get most detailed analysis data
-                analysis = self.smc_analyzer.get_trading_signals(symbol, timeframe)
+                analysis = self.get_trading_signals(symbol, timeframe)
                 if not analysis:
+                    budget.record_error()
                     continue
-
-                current_state = self._determine_market_state(
-                    analysis.get('smc_analysis', {}),
-                    analysis.get('trading_signals', {})
-                )
-                previous_state = previous_states.get(symbol)
-                
-                # Save new state
-                new_states[symbol] = current_state
-                
-                # Compare with previous state
-                if previous_state and current_state != previous_state:
-                    if current_state != 'Neutral' and previous_state != 'Neutral':
-                        flipped_tokens.append({
-                            'symbol': symbol,
-                            'from': previous_state,
-                            'to': current_state,
-                            'price': analysis.get('current_price', 0)
-                        })
-                        logger.warning(f"SIGNAL REVERSAL: {symbol} from {previous_state} -> {current_state}")
+                self.evaluate_symbol(symbol, analysis, previous_states, new_states, flipped_tokens, scores)
 
             except Exception as e:
+                budget.record_error()
                 logger.error(f"Error scanning token {symbol}: {e}")
                 continue
-                
-        return flipped_tokens, new_states
\ No newline at end of file
+
+        self.save_scores(scores, timeframe)
+        return flipped_tokens, new_states
+
+    def evaluate_symbol(self, symbol: str, analysis: dict, previous_states: dict,
+                        new_states: dict, flipped_tokens: list, scores: list = None):
+        """
+        Record the new state of one symbol and append it to flipped_tokens if it reversed
+        (and its scan table row to scores, if given).
+        """
+        if scores is not None:
+            scores.append(self.score_symbol(symbol, analysis))
+        current_state = self._determine_market_state(
+            analysis.get('smc_analysis', {}),
+            analysis.get('trading_signals', {})
+        )
+        previous_state = previous_states.get(symbol)
+        
+        # Save new state
+        new_states[symbol] = current_state
+        
+        # Compare with previous state
+        if previous_state and current_state != previous_state:
+            if current_state != 'Neutral' and previous_state != 'Neutral':
+                flipped_tokens.append({
+                    'symbol': symbol,
+                    'from': previous_state,
+                    'to': current_state,
+                    'price': analysis.get('current_price', 0)
+                })
+                logger.warning(f"SIGNAL REVERSAL: {symbol} from {previous_state} -> {current_state}")
+
+    def score_symbol(self, symbol: str, analysis: dict) -> dict:
+        """The scan table row (src/core/scan_table.py) of one analyzed symbol."""
+        from src.core.scan_table import TRENDS
+        smc = analysis.get('smc_analysis', {})
+        indicators = analysis.get('indicators', {})
+        price = analysis.get('current_price', 0)
+        bos = smc.get('break_of_structure') or ()
+        signals = analysis.get('trading_signals') or {}
+        # CHoCH ngược chiều là tín hiệu thoát lệnh: exit_long = CHoCH giảm, exit_short = CHoCH tăng
+        chochs = [(s['time'], -1) for s in signals.get('exit_long', ())] + \
+                 [(s['time'], 1) for s in signals.get('exit_short', ())]
+        choch_time, choch = max(chochs) if chochs else (0, 0)
+        levels = self.smc_analyzer.get_key_levels(smc)
+        distances = [abs(level['price'] - price) / price * 100 for level in levels if price]
+        return {
+            'symbol': symbol, 'price': price,
+            'strength': self.smc_analyzer.calculate_signal_strength(smc, indicators),
+            'rsi': indicators.get('rsi', 50),
+            'trend': TRENDS[self.smc_analyzer.determine_trend(smc)],
+            'bos_time': bos[-1]['time'] if bos else 0,
+            'choch': choch, 'choch_time': choch_time,
+            'level_distance': min(distances) if distances else float('nan'),
+            'scanned_at': int(time.time()),
+        }
+
+    def save_scores(self, scores: list, timeframe: str):
+        """Write the rows of a scan pass to the scan table read by /top."""
+        if not scores:
+            return
+        try:
+            from src.core.scan_table import get_scan_table
+            get_scan_table().update(scores, timeframe)
+        except Exception as e:
+            logger.error(f"Error saving the scan table: {e}")
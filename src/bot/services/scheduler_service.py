@@ -3,6 +3,8 @@ import json
 from typing import Dict, List, Any
 import os
 
+from src.core.file_lock import file_lock, file_signature, write_json_atomic
+
 logger = logging.getLogger(__name__)
 
 # Define file path and watchlist limit
@@ -10,39 +12,56 @@ PERSISTENCE_FILE = 'bot_data.json'
 WATCHLIST_LIMIT = 3
 
 class SchedulerService:
-    """Manage Watchlist and Subscribers list with file persistence."""
+    """
+    Manage Watchlist and Subscribers list with file persistence.
+    The file is shared by the bot replicas: every read picks up the changes of the others,
+    every change is a read-modify-write under the file lock.
+    """
 
-    def __init__(self):
+    def __init__(self, persistence_file: str = PERSISTENCE_FILE):
+        self.persistence_file = persistence_file
+        self._signature = None
         self.db = self._load_data()
 
     def _load_data(self) -> Dict[str, Any]:
-        """Load data from JSON file on startup."""
-        if os.path.exists(PERSISTENCE_FILE):
+        """Load data from JSON file."""
+        self._signature = file_signature(self.persistence_file)
+        if os.path.exists(self.persistence_file):
             try:
-                with open(PERSISTENCE_FILE, 'r') as f:
+                with open(self.persistence_file, 'r') as f:
                     data = json.load(f)
                     # Convert watchlist keys to int
                     if 'watchlists' in data:
                         data['watchlists'] = {int(k): v for k, v in data['watchlists'].items()}
                     return data
             except (json.JSONDecodeError, IOError) as e:
-                logger.error(f"Error loading data from {PERSISTENCE_FILE}: {e}")
+                logger.error(f"Error loading data from {self.persistence_file}: {e}")
         # Return default structure if file doesn't exist
         return {"watchlists": {}, "scanner_subscribers": []}
 
+    def reload(self):
+        """Re-read the file if another replica changed it (one stat call otherwise)."""
+        if file_signature(self.persistence_file) != self._signature:
+            self.db = self._load_data()
+
     def _save_data(self):
-        """Save current state to JSON file."""
+        """Save current state to JSON file (callers hold the file lock and reloaded first)."""
         try:
-            with open(PERSISTENCE_FILE, 'w') as f:
-                json.dump(self.db, f, indent=4)
+            write_json_atomic(self.persistence_file, self.db, indent=4)
+            self._signature = file_signature(self.persistence_file)
         except IOError as e:
-            logger.error(f"Cannot save data to {PERSISTENCE_FILE}: {e}")
+            logger.error(f"Cannot save data to {self.persistence_file}: {e}")
 
     # --- Watchlist Methods ---
     def get_user_watchlist(self, user_id: int) -> List[Dict[str, Any]]:
+        self.reload()
         return self.db.get("watchlists", {}).get(user_id, [])
 
     def add_to_watchlist(self, user_id: int, symbol: str, timeframe: str) -> Dict[str, Any]:
+        with file_lock(self.persistence_file):
+            return self._add_to_watchlist(user_id, symbol, timeframe)
+
+    def _add_to_watchlist(self, user_id: int, symbol: str, timeframe: str) -> Dict[str, Any]:
         watchlist = self.get_user_watchlist(user_id)
         if len(watchlist) >= WATCHLIST_LIMIT:
             return {'success': False, 'message': f'Watchlist is full! (Maximum {WATCHLIST_LIMIT} tokens).'}
@@ -55,41 +74,45 @@ class SchedulerService:
         return {'success': True, 'message': f'Added {symbol} ({timeframe}) to watchlist.'}
 
     def remove_from_watchlist(self, user_id: int, symbol: str, timeframe: str) -> bool:
-        # Logic remains the same, just need to save
-        watchlist = self.get_user_watchlist(user_id)
-        item_to_remove = next((item for item in watchlist if item['symbol'] == symbol and item['timeframe'] == timeframe), None)
-        if item_to_remove:
-            watchlist.remove(item_to_remove)
-            self._save_data()
-            return True
-        return False
+        with file_lock(self.persistence_file):
+            watchlist = self.get_user_watchlist(user_id)
+            item_to_remove = next((item for item in watchlist if item['symbol'] == symbol and item['timeframe'] == timeframe), None)
+            if item_to_remove:
+                watchlist.remove(item_to_remove)
+                self._save_data()
+                return True
+            return False
         
     def get_all_watchlists(self) -> Dict[int, List[Dict[str, Any]]]:
+        self.reload()
         return self.db.get("watchlists", {})
 
     # --- Scanner Subscriber Methods ---
     def get_scanner_subscribers(self) -> List[int]:
         """Get list of user IDs who have subscribed."""
+        self.reload()
         return self.db.get("scanner_subscribers", [])
 
     def add_scanner_subscriber(self, user_id: int) -> bool:
         """Add user to subscription list."""
-        subscribers = self.get_scanner_subscribers()
-        if user_id not in subscribers:
-            subscribers.append(user_id)
-            self.db["scanner_subscribers"] = subscribers
-            self._save_data()
-            logger.info(f"User {user_id} subscribed to market scan notifications.")
-            return True
-        return False # Already subscribed
+        with file_lock(self.persistence_file):
+            subscribers = self.get_scanner_subscribers()
+            if user_id not in subscribers:
+                subscribers.append(user_id)
+                self.db["scanner_subscribers"] = subscribers
+                self._save_data()
+                logger.info(f"User {user_id} subscribed to market scan notifications.")
+                return True
+            return False # Already subscribed
 
     def remove_scanner_subscriber(self, user_id: int) -> bool:
         """Remove user from subscription list."""
-        subscribers = self.get_scanner_subscribers()
-        if user_id in subscribers:
-            subscribers.remove(user_id)
-            self.db["scanner_subscribers"] = subscribers
-            self._save_data()
-            logger.info(f"User {user_id} unsubscribed from market scan notifications.")
-            return True
-        return False # Not in the list
\ No newline at end of file
+        with file_lock(self.persistence_file):
+            subscribers = self.get_scanner_subscribers()
+            if user_id in subscribers:
+                subscribers.remove(user_id)
+                self.db["scanner_subscribers"] = subscribers
+                self._save_data()
+                logger.info(f"User {user_id} unsubscribed from market scan notifications.")
+                return True
+            return False # Not in the list
\ No newline at end of file
@@ -0,0 +1,72 @@
+# src/bot/startup.py
+"""
+Startup timing and background warm-up.
+ccxt, pandas and numpy are not imported when the bot starts: the warm-up thread imports
+them and loads the exchange markets (snapshot first, then a refresh) while the bot is
+already answering updates.
+"""
+import logging
+import threading
+import time
+
+from src.core.metrics import STARTUP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# main.py imports this module first, so this is (almost) the process start
+PROCESS_START = time.monotonic()
+
+_marks = {}
+_marks_lock = threading.Lock()
+
+
+def mark(name: str) -> float:
+    """Record the first time `name` happened, in seconds since startup."""
+    with _marks_lock:
+        if name not in _marks:
+            _marks[name] = round(time.monotonic() - PROCESS_START, 3)
+            STARTUP_SECONDS.labels(event=name).set(_marks[name])
+        return _marks[name]
+
+
+def startup_report() -> dict:
+    with _marks_lock:
+        return dict(_marks)
+
+
+def record_first_reply():
+    """Mark time-to-first-reply once; called after an update has been handled."""
+    if 'first_reply' in _marks:
+        return
+    mark('first_reply')
+    logger.info(f"Startup timings (s): {startup_report()}")
+
+
+def first_reply_handler(update, context):
+    """Dispatcher handler (group 1, runs after the reply has been sent) for record_first_reply."""
+    record_first_reply()
+
+
+def import_analysis():
+    """Run in analysis worker processes so they import pandas/numpy before the first request."""
+    import src.core.analysis  # noqa: F401
+
+
+def warm_up(exchange_name: str = 'binance'):
+    """Import the analysis stack and load the exchange markets."""
+    try:
+        import_analysis()
+        from src.core.data_fetcher import get_exchange, refresh_markets
+        mark('imports_warm')
+        if get_exchange(exchange_name).markets:
+            mark('markets_from_snapshot')
+        if refresh_markets(exchange_name):
+            mark('markets_refreshed')
+    except Exception as e:
+        logger.error(f"Error during warm-up: {e}", exc_info=True)
+
+
+def start_warm_up(exchange_name: str = 'binance') -> threading.Thread:
+    thread = threading.Thread(target=warm_up, args=(exchange_name,), name='warm-up', daemon=True)
+    thread.start()
+    return thread
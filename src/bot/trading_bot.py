@@ -1,103 +1,531 @@
+import asyncio
 import logging
-from telegram.ext import Updater, CommandHandler, CallbackQueryHandler, MessageHandler, Filters, CallbackContext
+import signal
+import threading
+import time
+from telegram import Update
+from telegram.ext import (
+    Updater, CommandHandler, CallbackQueryHandler, MessageHandler, TypeHandler, Filters, CallbackContext
+)
+from src.core.coordination import create_coordinator
+from src.core.metrics import SEND_FAILURES, STAGE_SECONDS
+from src.core.profiling import profiled
+from src.core.rate_limiter import priority
+from . import startup
 from .services.analysis_service import BotAnalysisService
 from .services.scheduler_service import SchedulerService
 from .services.scanner_service import MarketScannerService
-from .handlers import command_handlers, callback_handlers, message_handlers, error_handlers
-from .formatters import format_analysis_result, format_scanner_notification
+from .services.async_analysis_service import AsyncAnalysisService
+from .services.hot_symbol_service import HotSymbolService, seconds_until_next_run
+from .services.price_alert_service import PRICE_ALERT_INTERVAL, PriceAlertService
+from .handlers import command_handlers, callback_handlers, message_handlers, error_handlers, async_handlers
+from .formatters import (
+    format_analysis_result, format_price_alert, format_scanner_notification, get_render_cache_stats
+)
 
 logger = logging.getLogger(__name__)
 
+_SEND_SECONDS = STAGE_SECONDS.labels(stage='send_message', exchange='', timeframe='')
+
 # --- JOB FUNCTIONS ---
+def group_watchlists(all_watchlists: dict) -> dict:
+    """Invert {user: [items]} into {(symbol, timeframe): [user_ids]} so each pair is analyzed once."""
+    groups = {}
+    for user_id, watchlist in all_watchlists.items():
+        for item in watchlist:
+            groups.setdefault((item['symbol'], item['timeframe']), []).append(user_id)
+    return groups
+
+def runs_jobs(bot_data: dict) -> bool:
+    """False in a replica that must leave the scheduled jobs to another one (COORDINATION)."""
+    coordinator = bot_data.get('coordinator')
+    return coordinator is None or coordinator.runs_jobs()
+
+def owns(bot_data: dict, key: str) -> bool:
+    """Whether this replica handles `key` (a watched pair, scanner or alert symbol) in the jobs."""
+    coordinator = bot_data.get('coordinator')
+    return coordinator is None or coordinator.owns(key)
+
+# Keys sharded across replicas: a watched pair, a scanned symbol, a symbol with price alerts
+def watch_key(symbol: str, timeframe: str) -> str:
+    return f"watch:{symbol}:{timeframe}"
+
+def scan_key(symbol: str) -> str:
+    return f"scan:{symbol}"
+
+def alert_key(symbol: str) -> str:
+    return f"alert:{symbol}"
+
+def _send(bot, user_id, text: str, what: str = 'notification'):
+    try:
+        with _SEND_SECONDS.time():
+            bot.send_message(chat_id=user_id, text=text, parse_mode='Markdown')
+    except Exception as e:
+        SEND_FAILURES.labels(method='sendMessage').inc()
+        logger.error(f"Error sending {what} to user {user_id}: {e}")
+
+def notify_watchers(bot, analysis_service: BotAnalysisService, symbol: str, timeframe: str, user_ids: list):
+    """Analyze one watched pair and send the result to the users watching it."""
+    logger.info(f"Analyzing {symbol} ({timeframe}) for {len(user_ids)} users")
+    result = analysis_service.get_analysis_for_symbol(symbol, timeframe)
+
+    if not result.get('error'):
+        suggestion = result.get('analysis', {}).get('suggestion', '')
+        # Only send notification if there's a clear BUY or SELL signal in the suggestion
+        # if "BUY signal detected" in suggestion or "SELL signal detected" in suggestion:
+        message_text = "🔔 **Watchlist Alert** 🔔\n\n" + format_analysis_result(result)
+        for user_id in user_ids:
+            _send(bot, user_id, message_text)
+
+@profiled('notification_job')
+@priority('watchlist')
 def notification_job(context: CallbackContext):
     """Scheduled job that runs periodically to check and send notifications."""
-    bot = context.bot
+    if not runs_jobs(context.bot_data):
+        return
     scheduler_service: SchedulerService = context.bot_data['scheduler_service']
     analysis_service: BotAnalysisService = context.bot_data['analysis_service']
     
     all_watchlists = scheduler_service.get_all_watchlists()
     logger.info(f"Running notification job for {len(all_watchlists)} users.")
     
-    for user_id, watchlist in all_watchlists.items():
-        for item in watchlist:
-            symbol = item['symbol']
-            timeframe = item['timeframe']
-            
-            logger.info(f"Analyzing {symbol} ({timeframe}) for user {user_id}")
-            result = analysis_service.get_analysis_for_symbol(symbol, timeframe)
-            
-            if not result.get('error'):
-                suggestion = result.get('analysis', {}).get('suggestion', '')
-                # Only send notification if there's a clear BUY or SELL signal in the suggestion
-                # if "BUY signal detected" in suggestion or "SELL signal detected" in suggestion:
-                message_text = "🔔 **Watchlist Alert** 🔔\n\n" + format_analysis_result(result)
-                try:
-                    bot.send_message(chat_id=user_id, text=message_text, parse_mode='Markdown')
-                except Exception as e:
-                    logger.error(f"Error sending notification to user {user_id}: {e}")
+    for (symbol, timeframe), user_ids in group_watchlists(all_watchlists).items():
+        if owns(context.bot_data, watch_key(symbol, timeframe)):
+            notify_watchers(context.bot, analysis_service, symbol, timeframe, user_ids)
+    logger.info(f"Render cache: {get_render_cache_stats()}")
+
+@priority('watchlist')
+def hot_symbol_job(context: CallbackContext):
+    """Re-analyze the hot pairs whose candle has closed since their last analysis."""
+    hot_symbol_service: HotSymbolService = context.bot_data['hot_symbol_service']
+    refreshed = hot_symbol_service.refresh(context.bot_data['analysis_service'])
+    if refreshed:
+        logger.info(f"Hot symbols: refreshed {refreshed} pairs, {hot_symbol_service.stats()}")
+
+# Markets are loaded once per process (shared exchange instance); reload them for new listings
+MARKETS_REFRESH_INTERVAL = 6 * 3600
+
+@priority('backfill')
+def markets_refresh_job(context: CallbackContext):
+    from src.core.data_fetcher import refresh_markets
+    refresh_markets(context.job.context)
+
+@priority('watchlist')
+def price_alert_job(context: CallbackContext):
+    """Poll the last prices of the symbols with alerts and notify the alerts they crossed."""
+    from src.core.data_fetcher import get_last_prices
+
+    if not runs_jobs(context.bot_data):
+        return
+    price_alert_service: PriceAlertService = context.bot_data['price_alert_service']
+    symbols = [s for s in price_alert_service.symbols() if owns(context.bot_data, alert_key(s))]
+    if symbols:
+        prices = get_last_prices(context.bot_data['analysis_service'].exchange_name, symbols)
+        send_price_alerts(context.bot, price_alert_service.update_prices(prices), prices)
+    price_alert_service.save_if_dirty()
+
+def send_price_alerts(bot, fired: list, prices: dict):
+    for alert in fired:
+        _send(bot, alert.user_id, format_price_alert(alert, prices[alert.symbol]), 'price alert')
 
 def market_scanner_job(context: CallbackContext):
     """
     Market scanner job that finds reversal signals and sends them to subscribers.
     """
+    if not runs_jobs(context.bot_data):
+        return
     bot = context.bot
     scanner_service: MarketScannerService = context.bot_data['scanner_service']
     scheduler_service: SchedulerService = context.bot_data['scheduler_service']
     previous_states = context.bot_data.get('scanner_states', {})
     
     logger.info("--- STARTING MARKET SCAN (4H) ---")
-    flipped_tokens, new_states = scanner_service.run_scan(previous_states, timeframe='1d')
+    flipped_tokens, new_states = scanner_service.run_scan(
+        previous_states, timeframe='1d', symbol_filter=lambda s: owns(context.bot_data, scan_key(s)))
     context.bot_data['scanner_states'] = new_states
     logger.info(f"--- SCAN COMPLETE, FOUND {len(flipped_tokens)} REVERSAL SIGNALS ---")
+    send_scanner_flips(bot, scheduler_service, flipped_tokens)
 
-    # If there are signals, send notifications to all subscribed users
+def send_scanner_flips(bot, scheduler_service: SchedulerService, flipped_tokens: list):
+    """If there are signals, send notifications to all subscribed users."""
     if flipped_tokens:
         subscribers = scheduler_service.get_scanner_subscribers()
         if subscribers:
             message = format_scanner_notification(flipped_tokens, '4h')
             logger.info(f"Sending market scan notifications to {len(subscribers)} users...")
             for user_id in subscribers:
-                try:
-                    bot.send_message(chat_id=user_id, text=message, parse_mode='Markdown')
-                except Exception as e:
-                    logger.error(f"Error sending market scan notification to user {user_id}: {e}")
+                _send(bot, user_id, message, 'market scan notification')
         else:
             logger.info("No users subscribed to market scan notifications.")
 
 class TradingBot:
-    def __init__(self, token: str):
-        self.updater = Updater(token, use_context=True)
+    def __init__(self, token: str, base_url: str = None, scheduler_service: SchedulerService = None,
+                 exchange_name: str = 'binance', candle_feed=None, enable_market_scanner: bool = False,
+                 coordinator=None):
+        """
+        candle_feed: None keeps the timer jobs; 'poll' (or a CandleFeed instance) runs the
+        watchlist, price alert and scanner jobs when their candles close (see feed_consumers).
+        coordinator: backend URL (or a Coordinator) shared by the replicas of the bot; the
+        scheduled jobs then run in the leader only, or sharded (src/core/coordination.py).
+        """
+        self.exchange_name = exchange_name
+        self.coordinator = create_coordinator(coordinator)
+        self.enable_market_scanner = enable_market_scanner
+        if candle_feed == 'poll':
+            from src.core.candle_feed import PollingCandleFeed
+            candle_feed = PollingCandleFeed(exchange_name)
+        self.candle_feed = candle_feed
+        self.updater = Updater(token, use_context=True, base_url=base_url)
         self.dispatcher = self.updater.dispatcher
-        self._setup_bot_data()
+        self._webhook_server = None
+        self._update_processors = None
+        self._setup_bot_data(scheduler_service or SchedulerService())
         self._setup_handlers()
         self._setup_jobs()
+        if self.candle_feed is not None:
+            from .feed_consumers import subscribe_consumers
+            subscribe_consumers(self.candle_feed, self.updater.bot, self.dispatcher.bot_data, enable_market_scanner)
 
-    def _setup_bot_data(self):
+    def _setup_bot_data(self, scheduler_service: SchedulerService):
         """Initialize and inject services into bot context."""
-        self.dispatcher.bot_data['analysis_service'] = BotAnalysisService()
-        self.dispatcher.bot_data['scheduler_service'] = SchedulerService()
-        self.dispatcher.bot_data['scanner_service'] = MarketScannerService()
+        self.dispatcher.bot_data['analysis_service'] = BotAnalysisService(self.exchange_name)
+        self.dispatcher.bot_data['scheduler_service'] = scheduler_service
+        self.dispatcher.bot_data['scanner_service'] = MarketScannerService(self.exchange_name)
+        self.dispatcher.bot_data['hot_symbol_service'] = HotSymbolService()
+        self.dispatcher.bot_data['price_alert_service'] = PriceAlertService()
         self.dispatcher.bot_data['user_states'] = {}
         self.dispatcher.bot_data['scanner_states'] = {}
+        self.dispatcher.bot_data['coordinator'] = self.coordinator
         
     def _setup_handlers(self):
         """Register all handlers for the bot."""
         self.dispatcher.add_handler(CommandHandler('start', command_handlers.start_command))
         self.dispatcher.add_handler(CommandHandler('watchlist', command_handlers.watchlist_command))
         self.dispatcher.add_handler(CommandHandler('analysis', command_handlers.analysis_command))
+        self.dispatcher.add_handler(CommandHandler('profile', command_handlers.profile_command))
+        self.dispatcher.add_handler(CommandHandler('alert', command_handlers.alert_command))
+        self.dispatcher.add_handler(CommandHandler('top', command_handlers.top_command))
+        self.dispatcher.add_handler(CommandHandler('confluence', command_handlers.confluence_command))
         
         self.dispatcher.add_handler(CallbackQueryHandler(callback_handlers.handle_callback))
         self.dispatcher.add_handler(MessageHandler(Filters.text & ~Filters.command, message_handlers.handle_message))
         self.dispatcher.add_error_handler(error_handlers.error_handler)
+        # Group 1 runs after the reply of group 0 has been sent
+        self.dispatcher.add_handler(TypeHandler(Update, startup.first_reply_handler), group=1)
 
     def _setup_jobs(self):
         """Schedule background jobs."""
         job_queue = self.updater.job_queue
-        job_queue.run_repeating(notification_job, interval=300, first=10)
-        # job_queue.run_repeating(market_scanner_job, interval=14400, first=20)
+        if self.candle_feed is None:
+            job_queue.run_repeating(notification_job, interval=300, first=10)
+            job_queue.run_repeating(price_alert_job, interval=PRICE_ALERT_INTERVAL, first=PRICE_ALERT_INTERVAL)
+            if self.enable_market_scanner:
+                job_queue.run_repeating(market_scanner_job, interval=14400, first=20)
+        # Warm the menu pairs at startup, then once a minute right after candle closes
+        job_queue.run_once(hot_symbol_job, when=1)
+        job_queue.run_repeating(hot_symbol_job, interval=60, first=seconds_until_next_run(time.time()))
+        job_queue.run_repeating(markets_refresh_job, interval=MARKETS_REFRESH_INTERVAL, first=MARKETS_REFRESH_INTERVAL,
+                                context=self.exchange_name)
+
+    def _start_background(self):
+        if self.coordinator is not None:
+            self.coordinator.start()
+        if self.candle_feed is not None:
+            self.candle_feed.start()
+
+    def _stop_background(self):
+        if self.candle_feed is not None:
+            self.candle_feed.stop()
+        if self.coordinator is not None:
+            self.coordinator.stop()
 
     def run(self):
         """Start running the bot."""
         self.updater.start_polling()
+        self._start_background()
+        startup.mark('bot_ready')
+        startup.start_warm_up(self.exchange_name)
         logger.info("Bot has started and is running...")
-        self.updater.idle()
\ No newline at end of file
+        self.updater.idle()
+        self._stop_background()
+
+    def start_webhook(self, webhook_url: str, listen: str = '0.0.0.0', port: int = 8443,
+                      url_path: str = 'telegram', secret_token: str = None, update_processors: int = 4):
+        """
+        Start webhook ingestion (non-blocking): an HTTP listener acks update batches and
+        hands them to `update_processors` threads that run the dispatcher.
+        """
+        from .webhook import UpdateProcessorPool, WebhookServer
+
+        self._update_processors = UpdateProcessorPool(self.dispatcher, self.updater.bot, update_processors)
+        self._webhook_server = WebhookServer(listen, port, url_path, self._update_processors.submit, secret_token)
+        self._update_processors.start()
+        self._webhook_server.start()
+        self.updater.job_queue.start()
+        self._start_background()
+        startup.mark('bot_ready')
+        startup.start_warm_up(self.exchange_name)
+        if webhook_url:
+            self.updater.bot.set_webhook(url=f"{webhook_url.rstrip('/')}/{url_path.strip('/')}",
+                                         secret_token=secret_token, max_connections=100,
+                                         allowed_updates=['message', 'callback_query'])
+        logger.info(f"Bot has started in webhook mode with {update_processors} update processors...")
+
+    def stop_webhook(self):
+        self._webhook_server.stop()
+        self._update_processors.stop()
+        self.updater.job_queue.stop()
+        self._stop_background()
+
+    def run_webhook(self, webhook_url: str, **kwargs):
+        """Start running the bot in webhook mode; blocks until SIGINT/SIGTERM."""
+        stop_event = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop_event.set())
+        self.start_webhook(webhook_url, **kwargs)
+        stop_event.wait()
+        logger.info("Stopping webhook mode...")
+        self.stop_webhook()
+
+
+# --- ASYNC RUNTIME ---
+# Bot API sends in a job run are capped to stay below Telegram's global flood limit.
+ASYNC_SEND_CONCURRENCY = 20
+
+
+async def _send_many(context, chat_ids, text: str):
+    """Send the same message to many chats concurrently, with a bounded number in flight."""
+    semaphore = asyncio.Semaphore(ASYNC_SEND_CONCURRENCY)
+
+    async def _send(chat_id):
+        async with semaphore:
+            if await context.client.send_message(chat_id, text, parse_mode='Markdown') is None:
+                logger.error(f"Error sending notification to user {chat_id}")
+
+    await asyncio.gather(*(_send(chat_id) for chat_id in chat_ids))
+
+
+@profiled('notification_job')
+async def async_notification_job(context):
+    """Async version of notification_job: all watchlist analyses run concurrently."""
+    if not runs_jobs(context.bot_data):
+        return
+    scheduler_service: SchedulerService = context.bot_data['scheduler_service']
+    analysis_service = context.bot_data['async_analysis_service']
+
+    all_watchlists = scheduler_service.get_all_watchlists()
+    logger.info(f"Running notification job for {len(all_watchlists)} users.")
+
+    async def _notify(symbol, timeframe, user_ids):
+        logger.info(f"Analyzing {symbol} ({timeframe}) for {len(user_ids)} users")
+        result = await analysis_service.get_analysis_for_symbol(symbol, timeframe)
+        if not result.get('error'):
+            message_text = "🔔 **Watchlist Alert** 🔔\n\n" + format_analysis_result(result)
+            await _send_many(context, user_ids, message_text)
+
+    # @priority() would leave the context before the coroutine runs; the tasks copy it from here
+    with priority('watchlist'):
+        await asyncio.gather(*(
+            _notify(symbol, timeframe, user_ids)
+            for (symbol, timeframe), user_ids in group_watchlists(all_watchlists).items()
+            if owns(context.bot_data, watch_key(symbol, timeframe))
+        ))
+    logger.info(f"Render cache: {get_render_cache_stats()}")
+
+
+async def async_hot_symbol_job(context):
+    """Async version of hot_symbol_job."""
+    hot_symbol_service: HotSymbolService = context.bot_data['hot_symbol_service']
+    with priority('watchlist'):
+        refreshed = await hot_symbol_service.refresh_async(context.bot_data['async_analysis_service'])
+    if refreshed:
+        logger.info(f"Hot symbols: refreshed {refreshed} pairs, {hot_symbol_service.stats()}")
+
+
+async def async_price_alert_job(context):
+    """Async version of price_alert_job."""
+    from src.core.data_fetcher import get_last_prices_async
+
+    if not runs_jobs(context.bot_data):
+        return
+    price_alert_service: PriceAlertService = context.bot_data['price_alert_service']
+    symbols = [s for s in price_alert_service.symbols() if owns(context.bot_data, alert_key(s))]
+    if symbols:
+        with priority('watchlist'):
+            prices = await get_last_prices_async(context.bot_data['async_analysis_service'].exchange, symbols)
+        semaphore = asyncio.Semaphore(ASYNC_SEND_CONCURRENCY)
+
+        async def _send(alert):
+            async with semaphore:
+                text = format_price_alert(alert, prices[alert.symbol])
+                if await context.client.send_message(alert.user_id, text, parse_mode='Markdown') is None:
+                    logger.error(f"Error sending price alert to user {alert.user_id}")
+
+        await asyncio.gather(*(_send(alert) for alert in price_alert_service.update_prices(prices)))
+    price_alert_service.save_if_dirty()
+
+
+async def async_markets_refresh_job(context):
+    with priority('backfill'):
+        await context.bot_data['async_analysis_service'].load_markets()
+
+
+async def async_market_scanner_job(context):
+    """Async version of market_scanner_job."""
+    if not runs_jobs(context.bot_data):
+        return
+    analysis_service = context.bot_data['async_analysis_service']
+    scheduler_service: SchedulerService = context.bot_data['scheduler_service']
+    previous_states = context.bot_data.get('scanner_states', {})
+
+    logger.info("--- STARTING MARKET SCAN (4H) ---")
+    with priority('scanner'):
+        flipped_tokens, new_states = await analysis_service.run_scan(
+            previous_states, timeframe='1d', symbol_filter=lambda s: owns(context.bot_data, scan_key(s)))
+    context.bot_data['scanner_states'] = new_states
+    logger.info(f"--- SCAN COMPLETE, FOUND {len(flipped_tokens)} REVERSAL SIGNALS ---")
+
+    if flipped_tokens:
+        subscribers = scheduler_service.get_scanner_subscribers()
+        if subscribers:
+            logger.info(f"Sending market scan notifications to {len(subscribers)} users...")
+            await _send_many(context, subscribers, format_scanner_notification(flipped_tokens, '4h'))
+        else:
+            logger.info("No users subscribed to market scan notifications.")
+
+
+class AsyncTradingBot:
+    """
+    Asyncio runtime: one event loop handles polling, handlers and jobs.
+    Exchange calls are awaited instead of holding a thread and the SMC analysis is
+    offloaded to a process pool, so thousands of pending requests need only a few threads.
+    """
+
+    def __init__(self, token: str, base_url: str = None, analysis_service=None, scheduler_service=None,
+                 max_concurrent_updates: int = 1000, poll_timeout: int = 30,
+                 enable_market_scanner: bool = False, exchange_name: str = 'binance', coordinator=None):
+        # aiohttp is only needed by this runtime
+        from .async_client import AsyncBotClient, LoopBotProxy, DEFAULT_BASE_URL
+
+        self.client = AsyncBotClient(token, base_url or DEFAULT_BASE_URL)
+        self.bot = LoopBotProxy(self.client)
+        self.bot_data = {}
+        self.context = async_handlers.AsyncContext(self.bot, self.client, self.bot_data)
+        self.poll_timeout = poll_timeout
+        self.max_concurrent_updates = max_concurrent_updates
+        self.enable_market_scanner = enable_market_scanner
+        self.coordinator = create_coordinator(coordinator)
+        self._setup_bot_data(analysis_service or AsyncAnalysisService(exchange_name), scheduler_service or SchedulerService())
+        self._tasks = []
+        self._update_slots = None
+        self._chat_locks = {}
+        self._stopping = None
+
+    def _setup_bot_data(self, analysis_service, scheduler_service):
+        """Initialize and inject services into bot context."""
+        self.bot_data['async_analysis_service'] = analysis_service
+        self.bot_data['scheduler_service'] = scheduler_service
+        self.bot_data['hot_symbol_service'] = HotSymbolService()
+        self.bot_data['price_alert_service'] = PriceAlertService()
+        self.bot_data['user_states'] = {}
+        self.bot_data['scanner_states'] = {}
+        self.bot_data['coordinator'] = self.coordinator
+
+    def _setup_jobs(self):
+        """Schedule background jobs (same intervals as TradingBot._setup_jobs)."""
+        self._tasks.append(asyncio.create_task(self._run_repeating(async_notification_job, interval=300, first=10)))
+        self._tasks.append(asyncio.create_task(self._run_hot_symbol_job()))
+        self._tasks.append(asyncio.create_task(self._run_repeating(
+            async_price_alert_job, interval=PRICE_ALERT_INTERVAL, first=PRICE_ALERT_INTERVAL)))
+        self._tasks.append(asyncio.create_task(self._run_repeating(
+            async_markets_refresh_job, interval=MARKETS_REFRESH_INTERVAL, first=MARKETS_REFRESH_INTERVAL)))
+        if self.enable_market_scanner:
+            self._tasks.append(asyncio.create_task(self._run_repeating(async_market_scanner_job, interval=14400, first=20)))
+
+    async def _run_repeating(self, job, interval: float, first: float):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(first)
+        while True:
+            started = loop.time()
+            try:
+                await job(self.context)
+            except Exception as e:
+                logger.error(f"Error in job {job.__name__}: {e}", exc_info=True)
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
+    async def _run_hot_symbol_job(self):
+        """Warm the menu pairs at startup, then run right after every minute (candle) boundary."""
+        while True:
+            try:
+                await async_hot_symbol_job(self.context)
+            except Exception as e:
+                logger.error(f"Error in job async_hot_symbol_job: {e}", exc_info=True)
+            await asyncio.sleep(seconds_until_next_run(time.time()))
+
+    def process_update(self, data: dict) -> asyncio.Task:
+        """Parse a raw update and handle it in its own task. Updates of one chat run in order."""
+        update = Update.de_json(data, self.bot)
+        return asyncio.create_task(self._handle_update(update))
+
+    async def _handle_update(self, update: Update):
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        entry = self._chat_locks.setdefault(chat_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0], self._update_slots:
+                await async_handlers.dispatch_update(update, self.context.for_update())
+            startup.record_first_reply()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._chat_locks.pop(chat_id, None)
+
+    async def _poll_updates(self):
+        offset = None
+        while not self._stopping.is_set():
+            updates = await self.client.get_updates(offset=offset, timeout=self.poll_timeout)
+            if updates is None:
+                await asyncio.sleep(1)
+                continue
+            for data in updates:
+                offset = data['update_id'] + 1
+                self.process_update(data)
+
+    async def start(self):
+        """Start the client, polling loop and jobs on the running event loop."""
+        self._stopping = asyncio.Event()
+        self._update_slots = asyncio.Semaphore(self.max_concurrent_updates)
+        await self.client.start()
+        self._tasks.append(asyncio.create_task(self._poll_updates()))
+        self._tasks.append(asyncio.create_task(self.bot_data['async_analysis_service'].warm_up()))
+        if self.coordinator is not None:
+            await asyncio.to_thread(self.coordinator.start)
+        self._setup_jobs()
+        startup.mark('bot_ready')
+        logger.info("Async bot has started and is running...")
+
+    async def stop(self):
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.client.close()
+        await self.bot_data['async_analysis_service'].close()
+        if self.coordinator is not None:
+            await asyncio.to_thread(self.coordinator.stop)
+
+    async def run_async(self):
+        await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stopping.set)
+            except NotImplementedError:
+                pass
+        await self._stopping.wait()
+        await self.stop()
+
+    def run(self):
+        """Start running the bot (blocks until SIGINT/SIGTERM)."""
+        asyncio.run(self.run_async())
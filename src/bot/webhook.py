@@ -0,0 +1,157 @@
+# src/bot/webhook.py
+import hmac
+import json
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+MAX_BODY_BYTES = 1 << 20
+# Telegram may redeliver an update; remember this many recent ids to drop duplicates
+RECENT_UPDATE_IDS = 10000
+
+
+def _shard_key(data: dict):
+    """Chat id of a raw update, so all updates of one chat go to the same processor."""
+    message = data.get('message') or data.get('edited_message') or {}
+    if message:
+        return message.get('chat', {}).get('id')
+    query = data.get('callback_query') or {}
+    if query:
+        return (query.get('message') or {}).get('chat', {}).get('id') or query.get('from', {}).get('id')
+    return data.get('update_id')
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Telegram opens up to `max_connections` parallel connections; the default backlog is 5
+    request_queue_size = 128
+
+
+class UpdateProcessorPool:
+    """
+    N worker threads feeding updates to `dispatcher.process_update`.
+    Updates are sharded by chat id: chats are processed in parallel while the updates
+    of a single chat keep their order (as with the single dispatcher thread).
+    """
+
+    def __init__(self, dispatcher, bot, workers: int = 4):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = max(1, workers)
+        self._queues = [queue.Queue() for _ in range(self.workers)]
+        self._threads = []
+
+    def start(self):
+        for i, q in enumerate(self._queues):
+            thread = threading.Thread(target=self._run, args=(q,), name=f'update-processor-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for q in self._queues:
+            q.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def submit(self, updates: List[dict]):
+        for data in updates:
+            self._queues[hash(_shard_key(data)) % self.workers].put(data)
+
+    def _run(self, q: queue.Queue):
+        while True:
+            data = q.get()
+            if data is None:
+                return
+            try:
+                self.dispatcher.process_update(Update.de_json(data, self.bot))
+            except Exception as e:
+                logger.error(f"Error processing update {data.get('update_id')}: {e}", exc_info=True)
+
+
+class WebhookServer:
+    """
+    Threaded HTTP listener for Telegram webhooks. A POST body may hold one update or a
+    batch (JSON list). The handler only checks the secret token and the payload shape,
+    hands the updates to `submit` and acknowledges; processing happens elsewhere.
+    """
+
+    def __init__(self, listen: str, port: int, url_path: str, submit: Callable[[List[dict]], None],
+                 secret_token: Optional[str] = None):
+        self.url_path = '/' + url_path.strip('/')
+        self.secret_token = secret_token
+        self.submit = submit
+        self._recent_ids = OrderedDict()
+        self._recent_lock = threading.Lock()
+        self._httpd = _HTTPServer((listen, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='webhook-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Webhook listener on port {self.port}, path {self.url_path}")
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _is_new(self, update_id: int) -> bool:
+        with self._recent_lock:
+            if update_id in self._recent_ids:
+                return False
+            self._recent_ids[update_id] = None
+            if len(self._recent_ids) > RECENT_UPDATE_IDS:
+                self._recent_ids.popitem(last=False)
+            return True
+
+    def handle_body(self, headers, body: bytes) -> int:
+        """Validate one webhook request and queue its updates. Returns the HTTP status."""
+        if self.secret_token is not None:
+            received = headers.get(SECRET_HEADER) or ''
+            if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+                return 403
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400
+        updates = payload if isinstance(payload, list) else [payload]
+        if not all(isinstance(u, dict) and isinstance(u.get('update_id'), int) for u in updates):
+            return 400
+        self.submit([u for u in updates if self._is_new(u['update_id'])])
+        return 200
+
+    def _make_handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                if self.path.split('?', 1)[0] != server.url_path:
+                    return self._reply(404)
+                length = int(self.headers.get('Content-Length') or 0)
+                if length <= 0 or length > MAX_BODY_BYTES:
+                    return self._reply(413 if length > MAX_BODY_BYTES else 400)
+                self._reply(server.handle_body(self.headers, self.rfile.read(length)))
+
+            def _reply(self, status: int):
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug("webhook: " + format, *args)
+
+        return _Handler
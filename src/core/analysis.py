@@ -5,75 +5,92 @@ from datetime import datetime
 import logging
 from functools import reduce
 # FIXED IMPORT TO MATCH STRUCTURE
-from .data_fetcher import fetch_ohlcv, calculate_indicators
+from .data_fetcher import fetch_ohlcv, calculate_indicators, ohlcv_to_dataframe
+from .metrics import STAGE_SECONDS
+from .smc_arrays import (
+    DEFAULT_OB_LOOKBACK, DEFAULT_SWEEP_WINDOW, DEFAULT_SWING_LOOKBACK, ENTER_TAGS,
+    bos_choch_columns, bos_choch_signal, enter_tag_codes, entry_exit_signals, fair_value_gaps,
+    liquidity_sweeps, order_blocks, smc_features, swing_points
+)
+from .smc_results import (
+    EntrySignal, ExitSignal, FairValueGap, LiquidityZone, OrderBlock, SMCAnalysis, StructureBreak, TradingSignals
+)
 
 logger = logging.getLogger(__name__)
 
-def analyze_smc_features(df: pd.DataFrame, swing_lookback: int = 20) -> pd.DataFrame:
+SMC_COLUMNS = ['swing_high', 'swing_low', 'bos_choch_signal', 'BOS', 'CHOCH', 'OB',
+               'Top_OB', 'Bottom_OB', 'FVG', 'Top_FVG', 'Bottom_FVG', 'Swept']
+
+def smc_swings(df: pd.DataFrame, swing_lookback: int = DEFAULT_SWING_LOOKBACK) -> pd.DataFrame:
+    """--- 1. Identify Swing Highs & Swing Lows ---"""
+    df['swing_high'], df['swing_low'] = swing_points(df['high'].to_numpy(), df['low'].to_numpy(), swing_lookback)
+    return df
+
+def smc_bos_choch(df: pd.DataFrame) -> pd.DataFrame:
+    """--- 2. Identify Break of Structure (BOS) and Change of Character (CHoCH) ---"""
+    signal = bos_choch_signal(df['high'].to_numpy(), df['low'].to_numpy(),
+                              df['swing_high'].to_numpy(), df['swing_low'].to_numpy())
+    df['bos_choch_signal'] = signal
+    df['BOS'], df['CHOCH'] = bos_choch_columns(signal)
+    return df
+
+def smc_order_blocks(df: pd.DataFrame, ob_lookback: int = DEFAULT_OB_LOOKBACK) -> pd.DataFrame:
+    """--- 3. Identify Order Blocks (OB) ---"""
+    df['OB'], df['Top_OB'], df['Bottom_OB'] = order_blocks(
+        df['open'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(),
+        df['bos_choch_signal'].to_numpy(), ob_lookback)
+    return df
+
+def smc_fair_value_gaps(df: pd.DataFrame) -> pd.DataFrame:
+    """--- 4. Identify Fair Value Gaps (FVG) ---"""
+    df['FVG'], df['Top_FVG'], df['Bottom_FVG'] = fair_value_gaps(df['high'].to_numpy(), df['low'].to_numpy())
+    return df
+
+def smc_liquidity_sweeps(df: pd.DataFrame, sweep_window: int = DEFAULT_SWEEP_WINDOW) -> pd.DataFrame:
+    """--- 5. Identify Liquidity Sweeps ---"""
+    df['Swept'] = liquidity_sweeps(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), sweep_window)
+    return df
+
+# Stages of analyze_smc_features, in order (timed separately by benchmarks/smc_core.py)
+SMC_STAGES = (
+    ('swings', smc_swings),
+    ('bos_choch', smc_bos_choch),
+    ('order_blocks', smc_order_blocks),
+    ('fair_value_gaps', smc_fair_value_gaps),
+    ('liquidity_sweeps', smc_liquidity_sweeps),
+)
+
+def analyze_smc_features(df: pd.DataFrame, swing_lookback: int = DEFAULT_SWING_LOOKBACK,
+                         ob_lookback: int = DEFAULT_OB_LOOKBACK, sweep_window: int = DEFAULT_SWEEP_WINDOW) -> pd.DataFrame:
     """
     This function analyzes and adds SMC columns to the DataFrame.
+    ob_lookback: bars searched back for the order block of a BOS/CHoCH; sweep_window: bars of the swept high/low.
     """
     if len(df) < swing_lookback * 2 + 1:
-        cols = ['swing_high', 'swing_low', 'bos_choch_signal', 'BOS', 'CHOCH', 'OB', 
-                'Top_OB', 'Bottom_OB', 'FVG', 'Top_FVG', 'Bottom_FVG', 'Swept']
-        for col in cols:
-            df[col] = 0 if col not in ['Top_OB', 'Bottom_OB', 'Top_FVG', 'Bottom_FVG'] else np.nan
+        for col in SMC_COLUMNS:
+            df[col] = np.zeros(len(df), dtype=np.int8) if col not in ['Top_OB', 'Bottom_OB', 'Top_FVG', 'Bottom_FVG'] else np.nan
         return df
 
-    # --- 1. Identify Swing Highs & Swing Lows ---
-    df['swing_high'] = df['high'].rolling(window=swing_lookback*2+1, center=True).max() == df['high']
-    df['swing_low'] = df['low'].rolling(window=swing_lookback*2+1, center=True).min() == df['low']
-    
-    # --- 2. Identify Break of Structure (BOS) and Change of Character (CHoCH) ---
-    last_swing_high, last_swing_low, trend, bos_choch = np.nan, np.nan, 0, []
-    for i in range(len(df)):
-        is_swing_high, is_swing_low = df['swing_high'].iloc[i], df['swing_low'].iloc[i]
-        current_high, current_low = df['high'].iloc[i], df['low'].iloc[i]
-        signal = 0
-        if is_swing_high: last_swing_high = current_high
-        if is_swing_low: last_swing_low = current_low
-        if trend == 1 and not np.isnan(last_swing_low) and current_low < last_swing_low:
-            signal = -2; trend = -1; last_swing_high = np.nan
-        elif trend == -1 and not np.isnan(last_swing_high) and current_high > last_swing_high:
-            signal = 2; trend = 1; last_swing_low = np.nan
-        elif not np.isnan(last_swing_high) and current_high > last_swing_high:
-            signal = 1; trend = 1; last_swing_low = np.nan
-        elif not np.isnan(last_swing_low) and current_low < last_swing_low:
-            signal = -1; trend = -1; last_swing_high = np.nan
-        bos_choch.append(signal)
-    df['bos_choch_signal'] = bos_choch
-    df['BOS'] = df['bos_choch_signal'].apply(lambda x: 1 if x == 1 else (-1 if x == -1 else 0))
-    df['CHOCH'] = df['bos_choch_signal'].apply(lambda x: 1 if x == 2 else (-1 if x == -2 else 0))
-
-    # --- 3. Identify Order Blocks (OB) ---
-    df['OB'], df['Top_OB'], df['Bottom_OB'] = 0, np.nan, np.nan
-    for i in range(1, len(df)):
-        if df['bos_choch_signal'].iloc[i] in [1, 2]:
-            for j in range(i - 1, max(0, i - 10), -1):
-                if df['close'].iloc[j] < df['open'].iloc[j]:
-                    df.loc[df.index[j], ['OB', 'Top_OB', 'Bottom_OB']] = [1, df['high'].iloc[j], df['low'].iloc[j]]
-                    break
-        elif df['bos_choch_signal'].iloc[i] in [-1, -2]:
-            for j in range(i - 1, max(0, i - 10), -1):
-                if df['close'].iloc[j] > df['open'].iloc[j]:
-                    df.loc[df.index[j], ['OB', 'Top_OB', 'Bottom_OB']] = [-1, df['high'].iloc[j], df['low'].iloc[j]]
-                    break
-    
-    # --- 4. Identify Fair Value Gaps (FVG) ---
-    df['FVG'], df['Top_FVG'], df['Bottom_FVG'] = 0, np.nan, np.nan
-    for i in range(2, len(df)):
-        if df['low'].iloc[i-2] > df['high'].iloc[i]:
-            df.loc[df.index[i-1], ['FVG', 'Top_FVG', 'Bottom_FVG']] = [1, df['low'].iloc[i-2], df['high'].iloc[i]]
-        elif df['high'].iloc[i-2] < df['low'].iloc[i]:
-            df.loc[df.index[i-1], ['FVG', 'Top_FVG', 'Bottom_FVG']] = [-1, df['high'].iloc[i-2], df['low'].iloc[i]]
-
-    # --- 5. Identify Liquidity Sweeps ---
-    df['Swept'] = 0
-    recent_high = df['high'].rolling(5).max().shift(1)
-    recent_low = df['low'].rolling(5).min().shift(1)
-    df.loc[(df['high'] > recent_high) & (df['close'] < recent_high), 'Swept'] = -1
-    df.loc[(df['low'] < recent_low) & (df['close'] > recent_low), 'Swept'] = 1
-    return df
+    df = smc_swings(df, swing_lookback)
+    df = smc_bos_choch(df)
+    df = smc_order_blocks(df, ob_lookback)
+    df = smc_fair_value_gaps(df)
+    return smc_liquidity_sweeps(df, sweep_window)
+
+def smc_working_set(df: pd.DataFrame, swing_lookback: int = DEFAULT_SWING_LOOKBACK,
+                    ob_lookback: int = DEFAULT_OB_LOOKBACK, sweep_window: int = DEFAULT_SWEEP_WINDOW) -> dict:
+    """
+    analyze_smc_features + populate_entry_trend_simple / populate_exit_trend without touching df:
+    {column: array} of the derived columns (int8 flags, categorical enter_tag, levels in the
+    candles' float dtype) plus read-only views of the candle columns. Nothing is copied.
+    """
+    candles = {col: df[col].to_numpy() for col in ('timestamp', 'open', 'high', 'low', 'close')}
+    features = smc_features(candles['open'], candles['high'], candles['low'], candles['close'],
+                            swing_lookback, ob_lookback, sweep_window)
+    features.update(entry_exit_signals(features, candles['high'], candles['low']))
+    features['enter_tag'] = pd.Categorical.from_codes(
+        enter_tag_codes(features['enter_long'], features['enter_short']), ENTER_TAGS)
+    return {**candles, **features}
 
 class AdvancedSMC:
     def __init__(self, exchange_name='binance'):
@@ -89,28 +106,18 @@ class AdvancedSMC:
 
     def analyze_smc_structure(self, df):
         if df is None or len(df) < 50:
-            return {
-                'order_blocks': [], 'liquidity_zones': [], 'fair_value_gaps': [],
-                'break_of_structure': [], 'trading_signals': {
-                    'entry_long': [], 'entry_short': [], 'exit_long': [], 'exit_short': []
-                }
-            }
-        df_analyzed = analyze_smc_features(df.copy())
-        df_analyzed = self.populate_entry_trend_simple(df_analyzed)
-        df_analyzed = self.populate_exit_trend(df_analyzed)
-        return {
-            'order_blocks': self.extract_order_blocks(df_analyzed),
-            'liquidity_zones': self.extract_liquidity_zones(df_analyzed),
-            'fair_value_gaps': self.extract_fair_value_gaps(df_analyzed),
-            'break_of_structure': self.extract_break_of_structure(df_analyzed),
-            'trading_signals': self.extract_recent_signals(df_analyzed)
-        }
+            return SMCAnalysis()
+        working_set = smc_working_set(df)
+        return SMCAnalysis(
+            order_blocks=self.extract_order_blocks(working_set),
+            liquidity_zones=self.extract_liquidity_zones(working_set),
+            fair_value_gaps=self.extract_fair_value_gaps(working_set),
+            break_of_structure=self.extract_break_of_structure(working_set),
+            trading_signals=self.extract_recent_signals(working_set)
+        )
     
     def populate_entry_trend_simple(self, dataframe):
         try:
-            dataframe['enter_long'] = 0
-            dataframe['enter_short'] = 0
-            dataframe['enter_tag'] = ''
             long_conditions = (
                 (dataframe['BOS'] == 1) & (dataframe['Swept'] == 1) & 
                 (((dataframe['low'] <= dataframe['Top_OB']) & (dataframe['high'] >= dataframe['Bottom_OB']) & (dataframe['OB'] == 1)) |
@@ -121,10 +128,10 @@ class AdvancedSMC:
                 (((dataframe['low'] <= dataframe['Top_OB']) & (dataframe['high'] >= dataframe['Bottom_OB']) & (dataframe['OB'] == -1)) |
                  ((dataframe['low'] <= dataframe['Top_FVG']) & (dataframe['high'] >= dataframe['Bottom_FVG']) & (dataframe['FVG'] == -1)))
             )
-            dataframe.loc[long_conditions, 'enter_long'] = 1
-            dataframe.loc[long_conditions, 'enter_tag'] = 'long_smc_simple'
-            dataframe.loc[short_conditions, 'enter_short'] = 1
-            dataframe.loc[short_conditions, 'enter_tag'] = 'short_smc_simple'
+            dataframe['enter_long'] = long_conditions.to_numpy().astype(np.int8)
+            dataframe['enter_short'] = short_conditions.to_numpy().astype(np.int8)
+            dataframe['enter_tag'] = pd.Categorical.from_codes(
+                enter_tag_codes(dataframe['enter_long'].to_numpy(), dataframe['enter_short'].to_numpy()), ENTER_TAGS)
             return dataframe
         except Exception as e:
             logger.error(f"Error in populate_entry_trend_simple: {e}")
@@ -132,10 +139,8 @@ class AdvancedSMC:
 
     def populate_exit_trend(self, dataframe):
         try:
-            dataframe['exit_long'] = 0
-            dataframe['exit_short'] = 0
-            dataframe.loc[(dataframe['CHOCH'] == -1), 'exit_long'] = 1
-            dataframe.loc[(dataframe['CHOCH'] == 1), 'exit_short'] = 1
+            dataframe['exit_long'] = (dataframe['CHOCH'] == -1).to_numpy().astype(np.int8)
+            dataframe['exit_short'] = (dataframe['CHOCH'] == 1).to_numpy().astype(np.int8)
             return dataframe
         except Exception as e:
             logger.error(f"Error in populate_exit_trend: {e}")
@@ -145,20 +150,28 @@ class AdvancedSMC:
         try:
             df = self.get_market_data(symbol, timeframe)
             if df is None: return None
-            smc_analysis = self.analyze_smc_structure(df)
-            indicators = calculate_indicators(df, df.tail(200).copy())
-            return {
-                'symbol': symbol, 'timeframe': timeframe,
-                'timestamp': int(df.iloc[-1]['timestamp'].timestamp()),
-                'current_price': float(df.iloc[-1]['close']),
-                'smc_analysis': smc_analysis,
-                'trading_signals': smc_analysis['trading_signals'],
-                'indicators': indicators
-            }
+            return self.build_trading_signals(df, symbol, timeframe)
         except Exception as e:
             logger.error(f"Error in SMC analysis: {e}")
             return None
 
+    def build_trading_signals(self, df, symbol, timeframe):
+        """Run the SMC analysis on already fetched candles (no I/O)."""
+        labels = {'exchange': self.exchange_name, 'timeframe': timeframe}
+        with STAGE_SECONDS.labels(stage='smc_analysis', **labels).time():
+            smc_analysis = self.analyze_smc_structure(df)
+        with STAGE_SECONDS.labels(stage='indicators', **labels).time():
+            indicators = calculate_indicators(df, df.tail(200).copy())
+        return {
+            'symbol': symbol, 'timeframe': timeframe,
+            'source': df.attrs.get('source', self.exchange_name),
+            'timestamp': int(df.iloc[-1]['timestamp'].timestamp()),
+            'current_price': float(df.iloc[-1]['close']),
+            'smc_analysis': smc_analysis,
+            'trading_signals': smc_analysis.trading_signals,
+            'indicators': indicators
+        }
+
     def get_telegram_summary(self, symbol, timeframe='4h'):
         """Get brief summary for Telegram."""
         try:
@@ -211,48 +224,81 @@ class AdvancedSMC:
         elif signal_strength > 5 and rsi > 60: return "📉 SELL"
         else: return "⏸️ HOLD/WAIT"
         
-    def extract_recent_signals(self, df):
-        signals = {'entry_long': [], 'entry_short': [], 'exit_long': [], 'exit_short': []}
-        recent_df = df.tail(50)
-        for _, row in recent_df.iterrows():
-            timestamp = int(row['timestamp'].timestamp())
-            if row.get('enter_long', 0) == 1:
-                signals['entry_long'].append({'time': timestamp, 'price': row['close'], 'tag': row.get('enter_tag', 'long_smc')})
-            if row.get('enter_short', 0) == 1:
-                signals['entry_short'].append({'time': timestamp, 'price': row['close'], 'tag': row.get('enter_tag', 'short_smc')})
-            if row.get('exit_long', 0) == 1:
-                signals['exit_long'].append({'time': timestamp, 'price': row['close']})
-            if row.get('exit_short', 0) == 1:
-                signals['exit_short'].append({'time': timestamp, 'price': row['close']})
-        return signals
-
-    def extract_order_blocks(self, df):
-        order_blocks = []
-        for _, row in df.iterrows():
-            if row.get('OB', 0) != 0:
-                order_blocks.append({'type': 'bullish_ob' if row['OB'] == 1 else 'bearish_ob', 'high': row.get('Top_OB'), 'low': row.get('Bottom_OB'), 'time': int(row['timestamp'].timestamp()), 'strength': 'high'})
-        return order_blocks[-10:]
-
-    def extract_liquidity_zones(self, df):
-        liquidity_zones = []
-        swing_highs = df[df.get('swing_high', False) == True]
-        swing_lows = df[df.get('swing_low', False) == True]
-        for _, row in swing_highs.iterrows():
-            liquidity_zones.append({'type': 'buy_side_liquidity', 'price': row['high'], 'time': int(row['timestamp'].timestamp()), 'strength': 'high'})
-        for _, row in swing_lows.iterrows():
-            liquidity_zones.append({'type': 'sell_side_liquidity', 'price': row['low'], 'time': int(row['timestamp'].timestamp()), 'strength': 'high'})
-        return liquidity_zones[-10:]
-
-    def extract_fair_value_gaps(self, df):
-        fvgs = []
-        for _, row in df.iterrows():
-            if row.get('FVG', 0) != 0:
-                fvgs.append({'type': 'bullish_fvg' if row['FVG'] == 1 else 'bearish_fvg', 'top': row.get('Top_FVG'), 'bottom': row.get('Bottom_FVG'), 'time': int(row['timestamp'].timestamp()), 'filled': False})
-        return fvgs[-20:]
-
-    def extract_break_of_structure(self, df):
-        bos_signals = []
-        for _, row in df.iterrows():
-            if row.get('BOS', 0) != 0:
-                bos_signals.append({'type': 'bullish_bos' if row['BOS'] == 1 else 'bearish_bos', 'price': row['close'], 'time': int(row['timestamp'].timestamp()), 'strength': 'confirmed'})
-        return bos_signals[-10:]
\ No newline at end of file
+    # The extract_* methods take a working set (smc_working_set) or an analyzed DataFrame
+    def extract_recent_signals(self, data):
+        recent = {col: np.asarray(_tail(data[col], 50)) for col in
+                  ('timestamp', 'close', 'enter_tag', 'enter_long', 'enter_short', 'exit_long', 'exit_short') if col in data}
+        times, close = _epoch_seconds(recent), recent['close']
+        tags = recent.get('enter_tag')
+
+        def flagged(column):
+            return np.flatnonzero(recent[column] == 1) if column in recent else ()
+
+        def entries(column, default_tag):
+            return tuple(EntrySignal(int(times[i]), float(close[i]), tags[i] if tags is not None else default_tag)
+                         for i in flagged(column))
+
+        def exits(column):
+            return tuple(ExitSignal(int(times[i]), float(close[i])) for i in flagged(column))
+
+        return TradingSignals(entries('enter_long', 'long_smc'), entries('enter_short', 'short_smc'),
+                              exits('exit_long'), exits('exit_short'))
+
+    def extract_order_blocks(self, data):
+        if 'OB' not in data:
+            return ()
+        ob = np.asarray(data['OB'])
+        rows = np.flatnonzero(ob != 0)[-10:]
+        times, top, bottom = _epoch_seconds(data, rows), np.asarray(data['Top_OB']), np.asarray(data['Bottom_OB'])
+        return tuple(OrderBlock('bullish_ob' if ob[i] == 1 else 'bearish_ob', float(top[i]), float(bottom[i]), int(t))
+                     for i, t in zip(rows, times))
+
+    def extract_liquidity_zones(self, data):
+        found = []
+        for column, price_column, zone_type in (('swing_high', 'high', 'buy_side_liquidity'),
+                                                ('swing_low', 'low', 'sell_side_liquidity')):
+            if column in data:
+                found.extend((zone_type, price_column, i) for i in np.flatnonzero(np.asarray(data[column]) == True))
+        found = found[-10:]
+        times = _epoch_seconds(data, [i for _, _, i in found])
+        return tuple(LiquidityZone(zone_type, float(np.asarray(data[price_column])[i]), int(t))
+                     for (zone_type, price_column, i), t in zip(found, times))
+
+    def extract_fair_value_gaps(self, data):
+        if 'FVG' not in data:
+            return ()
+        fvg = np.asarray(data['FVG'])
+        rows = np.flatnonzero(fvg != 0)[-20:]
+        times, top, bottom = _epoch_seconds(data, rows), np.asarray(data['Top_FVG']), np.asarray(data['Bottom_FVG'])
+        return tuple(FairValueGap('bullish_fvg' if fvg[i] == 1 else 'bearish_fvg', float(top[i]), float(bottom[i]), int(t))
+                     for i, t in zip(rows, times))
+
+    def extract_break_of_structure(self, data):
+        if 'BOS' not in data:
+            return ()
+        bos = np.asarray(data['BOS'])
+        rows = np.flatnonzero(bos != 0)[-10:]
+        times, close = _epoch_seconds(data, rows), np.asarray(data['close'])
+        return tuple(StructureBreak('bullish_bos' if bos[i] == 1 else 'bearish_bos', float(close[i]), int(t))
+                     for i, t in zip(rows, times))
+
+def _epoch_seconds(data, rows=None) -> np.ndarray:
+    """Unix seconds of the 'timestamp' column, or of its `rows` (what Timestamp.timestamp() gave row by row)."""
+    timestamps = np.asarray(data['timestamp'])
+    if rows is not None:
+        timestamps = timestamps[np.asarray(rows, dtype=np.intp)]
+    return timestamps.astype('datetime64[s]').astype(np.int64)
+
+def _tail(column, n: int):
+    return column.iloc[-n:] if isinstance(column, pd.Series) else column[-n:]
+
+def analyze_ohlcv(ohlcv, symbol, timeframe):
+    """
+    Process-pool entry point: build the frame from raw OHLCV rows and run the full analysis.
+    Kept at module level so it can be pickled by ProcessPoolExecutor.
+    """
+    try:
+        return AdvancedSMC().build_trading_signals(ohlcv_to_dataframe(ohlcv), symbol, timeframe)
+    except Exception as e:
+        logger.error(f"Error in SMC analysis: {e}")
+        return None
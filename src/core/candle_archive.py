@@ -0,0 +1,204 @@
+# src/core/candle_archive.py
+"""
+Compact read-only candle archive opened with numpy.memmap.
+
+Layout of one file:
+    8 bytes   magic b'SMCARCH1'
+    8 bytes   little-endian uint64: length of the JSON index
+    ...       JSON index {"value_dtype", "rows", "blocks": [{symbol, timeframe, start, rows, first, last}]}
+    padding   to a 64-byte boundary
+    int64     timestamps (ms) of every row
+    value     (rows, 5) open/high/low/close/volume as float32 or float64
+
+Each (symbol, timeframe) is one contiguous block of rows sorted by time, so a
+[since, until) slice is two binary searches and a view of the mapped file: nothing
+else is read, and processes opening the same archive share its pages in the OS cache.
+
+    python -m src.core.candle_archive convert --input candles.json --output candles.smca
+    python -m src.core.candle_archive backfill --exchange binance --top 250 --timeframes 1h --bars 26280 --output binance-1h.smca
+    python -m src.core.candle_archive info candles.smca
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SMCARCH1'
+ALIGNMENT = 64
+VALUE_DTYPES = ('float32', 'float64')
+
+
+class CandleArchive:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a candle archive")
+            (index_length,) = struct.unpack('<Q', f.read(8))
+            index = json.loads(f.read(index_length).decode('utf-8'))
+        data_offset = _aligned(len(MAGIC) + 8 + index_length)
+        total = index['rows']
+        self.value_dtype = np.dtype(index['value_dtype'])
+        self.blocks: Dict[Tuple[str, str], dict] = {(b['symbol'], b['timeframe']): b for b in index['blocks']}
+        if total:
+            self._timestamps = np.memmap(path, dtype='<i8', mode='r', offset=data_offset, shape=(total,))
+            self._values = np.memmap(path, dtype=self.value_dtype.newbyteorder('<'), mode='r',
+                                     offset=data_offset + total * 8, shape=(total, 5))
+        else:
+            self._timestamps = np.empty(0, dtype=np.int64)
+            self._values = np.empty((0, 5), dtype=self.value_dtype)
+
+    def __contains__(self, key) -> bool:
+        return tuple(key) in self.blocks
+
+    def keys(self):
+        return list(self.blocks)
+
+    def symbols(self, timeframe: Optional[str] = None) -> list:
+        return [s for s, tf in self.blocks if timeframe is None or tf == timeframe]
+
+    def timeframes(self, symbol: str) -> list:
+        return [tf for s, tf in self.blocks if s == symbol]
+
+    def _bounds(self, symbol: str, timeframe: str, since: Optional[int], until: Optional[int]) -> Tuple[int, int]:
+        block = self.blocks[(symbol, timeframe)]
+        start, end = block['start'], block['start'] + block['rows']
+        timestamps = self._timestamps[start:end]
+        lo = int(np.searchsorted(timestamps, since, side='left')) if since is not None else 0
+        hi = int(np.searchsorted(timestamps, until, side='left')) if until is not None else len(timestamps)
+        return start + lo, start + max(lo, hi)
+
+    def candles(self, symbol: str, timeframe: str, since: Optional[int] = None,
+                until: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, ohlcv) of [since, until) in ms, as read-only views of the mapped file."""
+        lo, hi = self._bounds(symbol, timeframe, since, until)
+        return self._timestamps[lo:hi], self._values[lo:hi]
+
+    def rows(self, symbol: str, timeframe: str, since: Optional[int] = None, until: Optional[int] = None,
+             limit: Optional[int] = None) -> list:
+        """ccxt-style rows ([ms, o, h, l, c, v]) of [since, until), the first `limit` of them."""
+        timestamps, values = self.candles(symbol, timeframe, since, until)
+        if limit is not None:
+            timestamps, values = timestamps[:limit], values[:limit]
+        return [[t] + v for t, v in zip(timestamps.tolist(), values.astype(np.float64).tolist())]
+
+    def array(self, symbol: str, timeframe: str, since: Optional[int] = None, until: Optional[int] = None) -> np.ndarray:
+        """(n, 6) float64 copy: timestamp, open, high, low, close, volume (the synthetic_ohlcv layout)."""
+        timestamps, values = self.candles(symbol, timeframe, since, until)
+        return np.column_stack([timestamps.astype(np.float64), values.astype(np.float64)])
+
+    def dataframe(self, symbol: str, timeframe: str, since: Optional[int] = None, until: Optional[int] = None):
+        from .data_fetcher import ohlcv_to_dataframe
+        return ohlcv_to_dataframe(self.rows(symbol, timeframe, since, until))
+
+    def info(self) -> dict:
+        return {
+            'path': self.path, 'value_dtype': str(self.value_dtype), 'rows': len(self._timestamps),
+            'bytes': os.path.getsize(self.path),
+            'blocks': [{k: b[k] for k in ('symbol', 'timeframe', 'rows', 'first', 'last')} for b in self.blocks.values()],
+        }
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_archive(path: str, series: Dict[Tuple[str, str], object], value_dtype: str = 'float32') -> dict:
+    """
+    Write {(symbol, timeframe): candles} (ccxt rows or an (n, 6) array) as an archive.
+    Rows are sorted by time and duplicate timestamps dropped. Written to a temp file, then renamed.
+    """
+    if value_dtype not in VALUE_DTYPES:
+        raise ValueError(f"value_dtype must be one of {VALUE_DTYPES}")
+    arrays, blocks, start = {}, [], 0
+    for (symbol, timeframe), candles in series.items():
+        candles = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        _, first_rows = np.unique(candles[:, 0], return_index=True)
+        candles = candles[first_rows]  # np.unique sorts by timestamp
+        arrays[(symbol, timeframe)] = candles
+        blocks.append({'symbol': symbol, 'timeframe': timeframe, 'start': start, 'rows': len(candles),
+                       'first': int(candles[0, 0]) if len(candles) else None,
+                       'last': int(candles[-1, 0]) if len(candles) else None})
+        start += len(candles)
+
+    index = json.dumps({'value_dtype': value_dtype, 'rows': start, 'blocks': blocks}).encode('utf-8')
+    data_offset = _aligned(len(MAGIC) + 8 + len(index))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(index)) + index)
+        f.write(b'\0' * (data_offset - f.tell()))
+        for block in blocks:
+            f.write(arrays[(block['symbol'], block['timeframe'])][:, 0].astype('<i8').tobytes())
+        for block in blocks:
+            f.write(arrays[(block['symbol'], block['timeframe'])][:, 1:].astype(np.dtype(value_dtype).newbyteorder('<')).tobytes())
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote {len(blocks)} series, {start} candles to {path}")
+    return {'series': len(blocks), 'rows': start, 'bytes': os.path.getsize(path)}
+
+
+def convert_recording(json_path: str, archive_path: str, value_dtype: str = 'float32') -> dict:
+    """Convert a record_candles() JSON file ({symbol: {timeframe: rows}}) into an archive."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        recording = json.load(f)
+    series = {(symbol, tf): rows for symbol, by_tf in recording.items() for tf, rows in by_tf.items()}
+    return write_archive(archive_path, series, value_dtype)
+
+
+def backfill(exchange, symbols: Iterable[str], timeframes: Iterable[str], bars: int, archive_path: str,
+             value_dtype: str = 'float32') -> dict:
+    """Page the last `bars` candles of each pair from an exchange into an archive."""
+    from .fake_exchange import fetch_history
+
+    series = {}
+    for symbol in symbols:
+        for timeframe in timeframes:
+            try:
+                series[(symbol, timeframe)] = fetch_history(exchange, symbol, timeframe, bars)
+            except Exception as e:
+                logger.error(f"Error backfilling {symbol} {timeframe}: {e}")
+    return write_archive(archive_path, series, value_dtype)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and inspect memory-mapped candle archives.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert = sub.add_parser('convert', help='from a record_candles() JSON file')
+    convert.add_argument('--input', required=True)
+    convert.add_argument('--output', required=True)
+    convert.add_argument('--dtype', choices=VALUE_DTYPES, default='float32')
+    fill = sub.add_parser('backfill', help='from an exchange')
+    fill.add_argument('--exchange', default='binance')
+    fill.add_argument('--symbols', help='comma-separated pairs (default: --top by volume)')
+    fill.add_argument('--top', type=int, default=50)
+    fill.add_argument('--timeframes', default='1h')
+    fill.add_argument('--bars', type=int, default=1000)
+    fill.add_argument('--output', required=True)
+    fill.add_argument('--dtype', choices=VALUE_DTYPES, default='float32')
+    show = sub.add_parser('info')
+    show.add_argument('path')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'convert':
+        print(json.dumps(convert_recording(args.input, args.output, args.dtype)))
+    elif args.command == 'backfill':
+        from .data_fetcher import get_exchange, get_top_symbols_by_volume, register_exchange
+        from .fake_exchange import HISTORY_BARS, FakeExchange
+
+        if args.exchange == 'fake' and args.bars > HISTORY_BARS:
+            register_exchange('fake', lambda: FakeExchange(history_bars=args.bars))
+        symbols = args.symbols.split(',') if args.symbols else get_top_symbols_by_volume(args.exchange, args.top)
+        print(json.dumps(backfill(get_exchange(args.exchange), symbols, args.timeframes.split(','),
+                                  args.bars, args.output, args.dtype)))
+    else:
+        print(json.dumps(CandleArchive(args.path).info(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
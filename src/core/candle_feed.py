@@ -0,0 +1,384 @@
+# src/core/candle_feed.py
+"""
+Push-based "candle closed" events per (symbol, timeframe).
+
+Consumers subscribe with a handler and the keys they care about; each subscription has
+its own bounded queue and thread, so a slow consumer never holds up the others, and the
+events of one key reach a handler in close order. When a queue is full the oldest event
+is dropped (and counted): a newer close of the same data supersedes it.
+
+Backends:
+- PollingCandleFeed: waits for the next candle close of the subscribed keys and fetches
+  only the keys that just closed, concurrently, two candles each;
+- ReplayCandleFeed: publishes recorded candles in close order on a simulated clock (tests,
+  replays).
+A streaming backend (exchange websockets) only has to call publish().
+
+The delay from candle close to handler is recorded per consumer in CANDLE_FEED_LATENCY.
+"""
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .circuit_breaker import guarded
+from .metrics import CANDLE_FEED_DROPPED, CANDLE_FEED_LATENCY
+from .rate_limiter import priority, throttled
+from .timeframes import candle_open, next_candle_close
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+# Sự kiện tối đa chờ trong hàng đợi của mỗi consumer
+CANDLE_FEED_QUEUE_SIZE = int(os.getenv('CANDLE_FEED_QUEUE_SIZE', '1000'))
+# Số request fetch_ohlcv song song khi nhiều cặp cùng đóng nến
+CANDLE_FEED_FETCH_WORKERS = int(os.getenv('CANDLE_FEED_FETCH_WORKERS', '8'))
+# Chờ vài giây sau khi nến đóng để sàn kịp công bố nến đã đóng
+CANDLE_FEED_CLOSE_DELAY = float(os.getenv('CANDLE_FEED_CLOSE_DELAY', '3'))
+# New subscriptions / keys are picked up at least this often
+MAX_IDLE_SECONDS = 5.0
+# A key whose closed candle is not published yet is retried this long, then skipped
+MAX_CLOSE_WAIT_SECONDS = 60.0
+
+
+class CandleClosed(NamedTuple):
+    symbol: str
+    timeframe: str
+    candle: tuple       # (open time ms, open, high, low, close, volume)
+    close_time: float   # unix seconds
+    emitted_at: float   # clock() when the feed published it
+
+    @property
+    def key(self) -> Key:
+        return self.symbol, self.timeframe
+
+    @property
+    def close(self) -> float:
+        return self.candle[4]
+
+
+class Subscription:
+    """
+    One consumer: a bounded FIFO of events and a thread calling `handler`.
+    With batch=True the handler gets every queued event as one list (e.g. all 1d closes at once).
+    """
+
+    def __init__(self, name: str, handler: Callable, keys=None, max_queue: int = CANDLE_FEED_QUEUE_SIZE,
+                 batch: bool = False, clock=time.time):
+        self.name = name
+        self.handler = handler
+        self._keys = keys  # None (every event), a set of keys, or a callable returning keys
+        self.max_queue = max_queue
+        self.batch = batch
+        self.clock = clock
+        self.events = 0
+        self.dropped = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self._queue = deque()
+        self._busy = False
+        self._stopping = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._latency = CANDLE_FEED_LATENCY.labels(consumer=name)
+        self._dropped = CANDLE_FEED_DROPPED.labels(consumer=name)
+
+    def keys(self) -> Optional[set]:
+        """Keys to poll for this consumer; None means it takes whatever is published."""
+        if self._keys is None:
+            return None
+        return set(self._keys() if callable(self._keys) else self._keys)
+
+    def wants(self, key: Key) -> bool:
+        return self._keys is None or key in self.keys()
+
+    def put(self, event: CandleClosed):
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+                self._dropped.inc()
+            self._queue.append(event)
+            self._cond.notify()
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name=f"candle-feed-{self.name}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been handled. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._queue:
+                    return
+                if self.batch:
+                    events = list(self._queue)
+                    self._queue.clear()
+                else:
+                    events = [self._queue.popleft()]
+                self._busy = True
+            now = self.clock()
+            for event in events:
+                latency = max(0.0, now - event.close_time)
+                self._latency.observe(latency)
+                self.latency_sum += latency
+                self.latency_max = max(self.latency_max, latency)
+            self.events += len(events)
+            try:
+                self.handler(events if self.batch else events[0])
+            except Exception as e:
+                logger.error(f"Candle feed consumer {self.name} failed: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            'events': self.events, 'dropped': self.dropped, 'queued': queued,
+            'avg_latency': round(self.latency_sum / self.events, 3) if self.events else 0.0,
+            'max_latency': round(self.latency_max, 3),
+        }
+
+
+class CandleFeed:
+    """Fan-out of CandleClosed events to subscriptions; backends call publish()."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.published = 0
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def subscribe(self, handler: Callable, keys=None, name: Optional[str] = None,
+                  max_queue: int = CANDLE_FEED_QUEUE_SIZE, batch: bool = False) -> Subscription:
+        """
+        keys: set of (symbol, timeframe), a callable returning them (re-read every poll, e.g.
+        the watchlists), or None to receive every published event without asking for any key.
+        """
+        subscription = Subscription(name or getattr(handler, '__name__', 'consumer'), handler, keys,
+                                    max_queue, batch, self.clock)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        if self._running:
+            subscription.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.remove(subscription)
+        subscription.stop()
+
+    def subscriptions(self) -> List[Subscription]:
+        with self._lock:
+            return list(self._subscriptions)
+
+    def keys(self) -> set:
+        """Union of the keys asked for by the subscriptions."""
+        keys = set()
+        for subscription in self.subscriptions():
+            try:
+                keys |= subscription.keys() or set()
+            except Exception as e:
+                logger.error(f"Error reading the keys of consumer {subscription.name}: {e}")
+        return keys
+
+    def publish(self, event: CandleClosed, keys_by_subscription: Optional[Dict[Subscription, set]] = None):
+        """Queue `event` for every subscription that wants its key."""
+        self.published += 1
+        for subscription in self.subscriptions():
+            if keys_by_subscription is not None and subscription in keys_by_subscription:
+                keys = keys_by_subscription[subscription]
+                wanted = keys is None or event.key in keys
+            else:
+                wanted = subscription.wants(event.key)
+            if wanted:
+                subscription.put(event)
+
+    def start(self):
+        self._running = True
+        for subscription in self.subscriptions():
+            subscription.start()
+
+    def stop(self):
+        self._running = False
+        for subscription in self.subscriptions():
+            subscription.stop()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every subscription has handled its queued events."""
+        return all(subscription.join(timeout) for subscription in self.subscriptions())
+
+    def stats(self) -> dict:
+        return {'published': self.published, 'consumers': {s.name: s.stats() for s in self.subscriptions()}}
+
+
+class PollingCandleFeed(CandleFeed):
+    """
+    Polls fetch_ohlcv, but only for the keys whose candle has just closed: a 4h key costs one
+    small request every 4 hours, and all keys closing together are fetched concurrently.
+    """
+
+    def __init__(self, exchange_name: str, fetch_workers: int = CANDLE_FEED_FETCH_WORKERS,
+                 close_delay: float = CANDLE_FEED_CLOSE_DELAY, clock=time.time):
+        super().__init__(clock)
+        self.exchange_name = exchange_name
+        self.fetch_workers = fetch_workers
+        self.close_delay = close_delay
+        self.fetches = 0
+        self._next_close: Dict[Key, float] = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def start(self):
+        super().start()
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(self.fetch_workers, thread_name_prefix='candle-feed-fetch')
+        self._thread = threading.Thread(target=self._run, name='candle-feed-poll', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        super().stop()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                wait = self.poll_once()
+            except Exception as e:
+                logger.error(f"Candle feed poll failed: {e}", exc_info=True)
+                wait = MAX_IDLE_SECONDS
+            self._stop_event.wait(wait)
+
+    def poll_once(self) -> float:
+        """Fetch and publish the keys that closed; returns the seconds until the next close is due."""
+        keys_by_subscription = {s: s.keys() for s in self.subscriptions()}
+        keys = set().union(*(k for k in keys_by_subscription.values() if k))
+        now = self.clock()
+        for key in set(self._next_close) - keys:
+            del self._next_close[key]
+        for key in keys - set(self._next_close):
+            # New keys start at the candle closing next; no history is replayed
+            self._next_close[key] = next_candle_close(key[1], now)
+
+        due = [key for key, close in self._next_close.items() if close + self.close_delay <= now]
+        if due:
+            for key, candle in zip(due, self._executor.map(self._fetch_closed, due)):
+                close_time = self._next_close[key]
+                if candle is not None:
+                    self.publish(CandleClosed(key[0], key[1], candle, close_time, self.clock()), keys_by_subscription)
+                elif now - close_time < MAX_CLOSE_WAIT_SECONDS:
+                    continue  # not published by the exchange yet: retry on the next poll
+                else:
+                    logger.warning(f"Candle feed: no closed candle for {key} at {close_time}, skipped")
+                self._next_close[key] = next_candle_close(key[1], max(now, close_time))
+
+        if not self._next_close:
+            return MAX_IDLE_SECONDS
+        next_due = min(self._next_close.values()) + self.close_delay
+        return min(MAX_IDLE_SECONDS, max(0.5, next_due - self.clock()))
+
+    def _fetch_closed(self, key: Key) -> Optional[tuple]:
+        """The candle that closed at _next_close[key], or None if the exchange has not got it yet."""
+        from .data_fetcher import get_exchange
+
+        symbol, timeframe = key
+        open_ms = int(candle_open(timeframe, self._next_close[key] - 1) * 1000)
+        try:
+            self.fetches += 1
+            exchange = get_exchange(self.exchange_name)
+            with priority('watchlist'):
+                rows = guarded(self.exchange_name, lambda: throttled(
+                    exchange, 'fetch_ohlcv', lambda: exchange.fetch_ohlcv(symbol, timeframe, since=open_ms, limit=2),
+                    limit=2), symbol)
+        except Exception as e:
+            logger.error(f"Candle feed: error fetching {symbol} {timeframe}: {e}")
+            return None
+        for row in rows or ():
+            if int(row[0]) == open_ms:
+                return tuple(row)
+        return None
+
+
+class ReplayCandleFeed(CandleFeed):
+    """
+    Publishes recorded candles in close order. With lockstep=True every close time is handled
+    by all consumers before the clock moves on, so a replay is deterministic.
+    """
+
+    def __init__(self, candles: Dict[Key, Iterable], clock=None, lockstep: bool = True):
+        """candles: {(symbol, timeframe): ccxt rows}; clock: e.g. replay.SimulatedClock (advanced to each close)."""
+        super().__init__(clock or time.time)
+        self.candles = candles
+        self.lockstep = lockstep
+
+    @classmethod
+    def from_archive(cls, archive, keys: Optional[Iterable[Key]] = None, since: Optional[int] = None,
+                     until: Optional[int] = None, **kwargs) -> 'ReplayCandleFeed':
+        """From a candle_archive.CandleArchive; since/until are open times in ms."""
+        keys = list(keys) if keys is not None else archive.keys()
+        return cls({key: archive.rows(key[0], key[1], since, until) for key in keys if key in archive}, **kwargs)
+
+    def _events(self):
+        return heapq.merge(*(_closes(symbol, timeframe, rows) for (symbol, timeframe), rows in self.candles.items()))
+
+    def run(self, until: Optional[float] = None) -> int:
+        """Publish every candle closing up to `until` (unix seconds). Returns the number published."""
+        self.start()
+        published, current, keys_by_subscription = 0, None, None
+        for close_time, symbol, timeframe, candle in self._events():
+            if until is not None and close_time > until:
+                break
+            if close_time != current:
+                if self.lockstep and current is not None:
+                    self.join()
+                current = close_time
+                if hasattr(self.clock, 'advance_to'):
+                    self.clock.advance_to(close_time)
+                keys_by_subscription = {s: s.keys() for s in self.subscriptions()}
+            self.publish(CandleClosed(symbol, timeframe, candle, close_time, self.clock()), keys_by_subscription)
+            published += 1
+        self.join()
+        return published
+
+
+def _closes(symbol: str, timeframe: str, rows: Iterable):
+    for row in rows:
+        yield next_candle_close(timeframe, row[0] / 1000), symbol, timeframe, tuple(row)
@@ -0,0 +1,214 @@
+# src/core/circuit_breaker.py
+"""
+Circuit breakers around exchange calls: one per exchange and one per (exchange, symbol).
+
+closed     calls go through; BREAKER_FAILURES consecutive failures open the breaker.
+open       calls fail at once with CircuitOpenError (no request, no 30 s ccxt timeout)
+           for BREAKER_RESET_SECONDS.
+half_open  one probe request is let through, the other callers still fail fast; its
+           success closes the breaker, its failure opens it again.
+
+Connection-level errors (timeouts, maintenance, 5xx, 429) count against the exchange
+breaker; errors about the request (unknown symbol, bad request) only against the symbol,
+so one delisted pair does not cut off the exchange. The state of every breaker is the
+gauge trading_bot_circuit_state (0 closed, 1 half open, 2 open).
+
+ErrorBudget lets a bulk pass (the market scanner) stop cleanly once too many of its
+items have failed instead of working through 250 failures.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from .metrics import CIRCUIT_REJECTIONS, CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+
+# Số lỗi liên tiếp để ngắt mạch, và thời gian ngắt trước khi thử lại (giây)
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', '60'))
+# Per-symbol breakers trip on fewer failures and stay open longer (a pair, not the exchange, is broken)
+SYMBOL_BREAKER_FAILURES = 3
+SYMBOL_BREAKER_RESET_SECONDS = 300.0
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the exchange while a breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, exchange: str, symbol: str = '', failure_threshold: int = BREAKER_FAILURES,
+                 reset_seconds: float = BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._gauge = CIRCUIT_STATE.labels(exchange=exchange, symbol=symbol)
+
+    @property
+    def name(self) -> str:
+        return f"{self.exchange} {self.symbol}".strip()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"Circuit breaker {self.name}: {self.state} -> {state}")
+            self.state = state
+        self._gauge.set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """True if a call may go out now (in half open: only the single probe)."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        CIRCUIT_REJECTIONS.labels(exchange=self.exchange).inc()
+        return False
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == OPEN and self.clock() - self.opened_at < self.reset_seconds
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+                self.failures = 0
+                self._set_state(OPEN)
+            self._probing = False
+
+    def release(self):
+        """The call was let through but not made (another breaker refused it): free the probe slot."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            retry_in = max(0.0, self.reset_seconds - (self.clock() - self.opened_at)) if self.state == OPEN else 0.0
+            return {'state': self.state, 'failures': self.failures, 'retry_in': round(retry_in, 1)}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(exchange: str, symbol: Optional[str] = None) -> CircuitBreaker:
+    key = (exchange, symbol or '')
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                if symbol:
+                    breaker = CircuitBreaker(exchange, symbol, SYMBOL_BREAKER_FAILURES, SYMBOL_BREAKER_RESET_SECONDS)
+                else:
+                    breaker = CircuitBreaker(exchange)
+                _breakers[key] = breaker
+    return breaker
+
+
+def is_request_error(error: Exception) -> bool:
+    """Errors caused by the request itself (unknown / delisted symbol, bad parameters), not the exchange."""
+    import ccxt
+
+    return isinstance(error, (ccxt.BadRequest, ccxt.BadSymbol)) and not isinstance(error, ccxt.DDoSProtection)
+
+
+def _admit(exchange: str, symbol: Optional[str]):
+    exchange_breaker = get_breaker(exchange)
+    if not exchange_breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {exchange}")
+    symbol_breaker = get_breaker(exchange, symbol) if symbol else None
+    if symbol_breaker is not None and not symbol_breaker.allow():
+        exchange_breaker.release()
+        raise CircuitOpenError(f"Circuit open for {symbol} on {exchange}")
+    return exchange_breaker, symbol_breaker
+
+
+def _record(exchange_breaker: CircuitBreaker, symbol_breaker: Optional[CircuitBreaker],
+            error: Optional[Exception] = None):
+    if error is None:
+        exchange_breaker.record_success()
+        if symbol_breaker is not None:
+            symbol_breaker.record_success()
+    elif is_request_error(error):
+        # The exchange answered: it is healthy even though this symbol is not
+        exchange_breaker.record_success()
+        if symbol_breaker is not None:
+            symbol_breaker.record_failure()
+    else:
+        exchange_breaker.record_failure()
+        if symbol_breaker is not None:
+            symbol_breaker.release()
+
+
+def guarded(exchange: str, call: Callable, symbol: Optional[str] = None):
+    """Run call() through the exchange (and symbol) breakers; CircuitOpenError while one is open."""
+    exchange_breaker, symbol_breaker = _admit(exchange, symbol)
+    try:
+        result = call()
+    except Exception as e:
+        _record(exchange_breaker, symbol_breaker, e)
+        raise
+    _record(exchange_breaker, symbol_breaker)
+    return result
+
+
+async def guarded_async(exchange: str, call: Callable, symbol: Optional[str] = None):
+    """guarded() for a coroutine function."""
+    exchange_breaker, symbol_breaker = _admit(exchange, symbol)
+    try:
+        result = await call()
+    except Exception as e:
+        _record(exchange_breaker, symbol_breaker, e)
+        raise
+    _record(exchange_breaker, symbol_breaker)
+    return result
+
+
+def breaker_stats() -> dict:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers if b.state != CLOSED or not b.symbol}
+
+
+class ErrorBudget:
+    """Stop a bulk pass after more than max(min_errors, rate * total) failed items."""
+
+    def __init__(self, total: int, rate: float, min_errors: int, exchange: Optional[str] = None):
+        self.limit = max(min_errors, int(rate * total))
+        self.exchange = exchange
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def exhausted(self) -> bool:
+        """True once the budget is spent, or at once while the exchange breaker is open."""
+        if self.exchange and get_breaker(self.exchange).is_open():
+            return True
+        with self._lock:
+            return self.errors > self.limit
@@ -0,0 +1,206 @@
+# src/core/confluence.py
+"""
+Multi-timeframe ("confluence") view of one symbol: the timeframes of the timeframe keyboard
+analyzed together and summarized as one row each (trend, last BOS / CHoCH, latest entry,
+nearest support / resistance).
+
+The candles are fetched concurrently, so the latency is the slowest fetch, not the sum,
+and timeframes that are whole multiples of another one are built from its candles instead
+of being fetched: 4h from 1h (x4), 3d from 1d (x3). Six timeframes cost four requests:
+
+    15m x200, 1h x800 (-> 4h x200), 1d x600 (-> 3d x200), 1w x200
+
+Resampled candles are aligned on multiples of the timeframe since the epoch (what the
+exchanges use for 4h / 3d); the first, incomplete bucket is dropped and the last one is the
+candle in progress, like the exchange's own.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .data_fetcher import fetch_ohlcv
+from .timeframes import timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+CONFLUENCE_TIMEFRAMES = ('15m', '1h', '4h', '1d', '3d', '1w')
+# timeframe -> (base timeframe): built from the base's candles when both are requested
+DERIVED_TIMEFRAMES = {'4h': '1h', '3d': '1d'}
+# Most exchanges serve at most this many candles per request
+MAX_FETCH_LIMIT = 1000
+
+
+def _factor(timeframe: str, base: str) -> int:
+    return timeframe_to_seconds(timeframe) // timeframe_to_seconds(base)
+
+
+def fetch_plan(timeframes: Iterable[str] = CONFLUENCE_TIMEFRAMES, limit: int = 200) -> Dict[str, int]:
+    """{timeframe to fetch: candles}: derived timeframes raise their base's limit instead of being fetched."""
+    timeframes = list(timeframes)
+    plan = {}
+    for timeframe in timeframes:
+        base = DERIVED_TIMEFRAMES.get(timeframe)
+        # +1 bucket: the first one is usually incomplete and dropped
+        if base in timeframes and (limit + 1) * _factor(timeframe, base) <= MAX_FETCH_LIMIT:
+            plan[base] = max(plan.get(base, limit), (limit + 1) * _factor(timeframe, base))
+        else:
+            plan[timeframe] = max(plan.get(timeframe, limit), limit)
+    return plan
+
+
+def resample_arrays(timestamps: np.ndarray, values: np.ndarray, timeframe: str):
+    """
+    (timestamps in ms, (n, 5) OHLCV) of a finer timeframe -> the same of `timeframe`,
+    buckets aligned on the epoch; the first bucket is dropped if it is incomplete.
+    """
+    step = timeframe_to_seconds(timeframe) * 1000
+    if not len(timestamps):
+        return timestamps, values
+    buckets = timestamps // step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if timestamps[0] != buckets[0] * step:
+        starts = starts[1:]
+        if not len(starts):
+            return timestamps[:0], values[:0]
+        timestamps, values, buckets = timestamps[starts[0]:], values[starts[0]:], buckets[starts[0]:]
+        starts = starts - starts[0]
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+    resampled = np.column_stack((
+        values[starts, 0],
+        np.maximum.reduceat(values[:, 1], starts),
+        np.minimum.reduceat(values[:, 2], starts),
+        values[ends, 3],
+        np.add.reduceat(values[:, 4], starts),
+    ))
+    return buckets[starts] * step, resampled
+
+
+def resample_ohlcv(ohlcv: List[list], timeframe: str) -> List[list]:
+    """Raw ccxt OHLCV rows -> rows of the coarser `timeframe` (see resample_arrays)."""
+    rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+    timestamps, values = resample_arrays(rows[:, 0].astype(np.int64), rows[:, 1:], timeframe)
+    return [[int(t), *v] for t, v in zip(timestamps.tolist(), values.tolist())]
+
+
+def resample_dataframe(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """The candles of fetch_ohlcv -> the DataFrame of the coarser `timeframe` (see resample_arrays)."""
+    timestamps = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+    values = df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
+    timestamps, values = resample_arrays(timestamps, values, timeframe)
+    resampled = pd.DataFrame(values, columns=['open', 'high', 'low', 'close', 'volume'])
+    resampled.insert(0, 'timestamp', pd.to_datetime(timestamps, unit='ms'))
+    resampled.attrs = dict(df.attrs)
+    return resampled
+
+
+def _tail(data, n: int):
+    return data.iloc[-n:].reset_index(drop=True) if isinstance(data, pd.DataFrame) else data[-n:]
+
+
+def split_candles(fetched: dict, timeframes: Iterable[str], limit: int, resample) -> dict:
+    """
+    {timeframe: candles} of every requested timeframe from the fetched ones (None if missing):
+    `limit` candles each, derived timeframes through resample(candles, timeframe).
+    """
+    candles = {}
+    for timeframe in timeframes:
+        data = fetched.get(timeframe)
+        if timeframe not in fetched:
+            data = fetched.get(DERIVED_TIMEFRAMES.get(timeframe))
+            data = resample(data, timeframe) if data is not None and len(data) else None
+        # The plan may have fetched more of a base timeframe than it needs itself
+        candles[timeframe] = _tail(data, limit) if data is not None and len(data) else None
+    return candles
+
+
+def fetch_confluence_candles(exchange_name: str, symbol: str, timeframes: Iterable[str] = CONFLUENCE_TIMEFRAMES,
+                             limit: int = 200) -> Dict[str, Optional[pd.DataFrame]]:
+    """{timeframe: DataFrame or None}, the fetches of fetch_plan running in parallel threads."""
+    timeframes = list(timeframes)
+    plan = fetch_plan(timeframes, limit)
+    with ThreadPoolExecutor(len(plan), thread_name_prefix='confluence-fetch') as pool:
+        futures = {tf: pool.submit(fetch_ohlcv, exchange_name, symbol, tf, n) for tf, n in plan.items()}
+        fetched = {tf: future.result() for tf, future in futures.items()}
+    return split_candles(fetched, timeframes, limit, resample_dataframe)
+
+
+def _latest(signals, kind: str) -> Optional[tuple]:
+    return max(((s['time'], kind) for s in signals), default=None)
+
+
+def confluence_row(result: Optional[dict], smc_analyzer) -> Optional[dict]:
+    """
+    One timeframe of the view from a build_trading_signals result: trend, last BOS and
+    CHoCH, latest entry as (direction, bars ago), nearest support / resistance among the
+    key levels. None if the timeframe could not be analyzed.
+    """
+    if not result:
+        return None
+    smc = result.get('smc_analysis', {})
+    signals = result.get('trading_signals') or {}
+    price, last_time = result['current_price'], result['timestamp']
+    step = timeframe_to_seconds(result['timeframe'])
+
+    def bars_ago(event):
+        return None if event is None else (event[1], int((last_time - event[0]) // step))
+
+    bos = smc.get('break_of_structure') or ()
+    latest_bos = (bos[-1]['time'], 'bullish' if bos[-1]['type'] == 'bullish_bos' else 'bearish') if bos else None
+    # CHoCH ngược chiều là tín hiệu thoát lệnh: exit_long = CHoCH giảm, exit_short = CHoCH tăng
+    choch = max(filter(None, (_latest(signals.get('exit_long', ()), 'bearish'),
+                              _latest(signals.get('exit_short', ()), 'bullish'))), default=None)
+    entry = max(filter(None, (_latest(signals.get('entry_long', ()), 'long'),
+                              _latest(signals.get('entry_short', ()), 'short'))), default=None)
+    prices = [level['price'] for level in smc_analyzer.get_key_levels(smc)]
+    return {
+        'timeframe': result['timeframe'],
+        'price': price,
+        'rsi': result.get('indicators', {}).get('rsi', 50),
+        'trend': smc_analyzer.determine_trend(smc),
+        'bos': bars_ago(latest_bos),
+        'choch': bars_ago(choch),
+        'entry': bars_ago(entry),
+        'support': max((p for p in prices if p <= price), default=None),
+        'resistance': min((p for p in prices if p > price), default=None),
+    }
+
+
+def confluence_view(symbol: str, rows: Dict[str, Optional[dict]]) -> dict:
+    """{'symbol', 'price', 'rows': {timeframe: row or None}, 'bullish', 'bearish', 'analyzed'}."""
+    analyzed = [row for row in rows.values() if row]
+    return {
+        'symbol': symbol,
+        # Giá của khung nhỏ nhất phân tích được (mới nhất)
+        'price': analyzed[0]['price'] if analyzed else None,
+        'rows': rows,
+        'bullish': sum(row['trend'] == 'bullish' for row in analyzed),
+        'bearish': sum(row['trend'] == 'bearish' for row in analyzed),
+        'analyzed': len(analyzed),
+    }
+
+
+def analyze_confluence(smc_analyzer, symbol: str, timeframes: Iterable[str] = CONFLUENCE_TIMEFRAMES,
+                       limit: int = 200) -> dict:
+    """Fetch (concurrently) and analyze every timeframe of `symbol`; see confluence_view."""
+    candles = fetch_confluence_candles(smc_analyzer.exchange_name, symbol, timeframes, limit)
+    rows = {}
+    for timeframe, df in candles.items():
+        try:
+            result = smc_analyzer.build_trading_signals(df, symbol, timeframe) if df is not None else None
+            rows[timeframe] = confluence_row(result, smc_analyzer)
+        except Exception as e:
+            logger.error(f"Error in confluence analysis of {symbol} {timeframe}: {e}")
+            rows[timeframe] = None
+    return confluence_view(symbol, rows)
+
+
+def analyze_confluence_ohlcv(ohlcv, symbol: str, timeframe: str) -> Optional[dict]:
+    """
+    Process-pool entry point of the async runtime: raw OHLCV rows of one timeframe ->
+    its confluence_row (small to send back, unlike the full analysis).
+    """
+    from .analysis import AdvancedSMC, analyze_ohlcv
+    return confluence_row(analyze_ohlcv(ohlcv, symbol, timeframe), AdvancedSMC())
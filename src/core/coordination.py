@@ -0,0 +1,260 @@
+# src/core/coordination.py
+"""
+Coordination of horizontally scaled bot replicas (COORDINATION), so the scheduled jobs
+(watchlist notifications, price alerts, market scan) run once, not once per replica.
+
+Every replica heartbeats its membership and tries to take a lease every LEASE_SECONDS/3:
+
+    leader   (COORDINATION_MODE=leader, default) the holder of the lease runs all the
+             scheduled jobs; the others only answer users. If the leader dies its lease
+             expires after LEASE_SECONDS and another replica takes over.
+    shard    every replica runs the jobs, each on the keys (watched pairs, scanner
+             symbols, alert symbols) it owns on a consistent-hash ring of the live
+             replicas; when one dies, only its keys move to the others.
+
+A replica that cannot reach the backend stops acting as leader when its lease runs out,
+so two replicas never both believe they lead. Backends: `sqlite:///path` (the processes
+of one host, through SQLite's file locks), others with register_lease_backend().
+"""
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .metrics import COORDINATION_LEADER, COORDINATION_MEMBERS
+
+logger = logging.getLogger(__name__)
+
+# Backend điều phối giữa các replica: "sqlite:///.cache/coordination.db"; để trống để tắt
+COORDINATION = os.getenv('COORDINATION', '')
+# leader: chỉ replica giữ lease chạy job định kỳ; shard: mỗi replica chạy job trên phần key của nó
+COORDINATION_MODE = os.getenv('COORDINATION_MODE', 'leader')
+# Thời hạn lease / heartbeat (giây); replica chết được thay thế sau khoảng này
+LEASE_SECONDS = float(os.getenv('LEASE_SECONDS', '15'))
+REPLICA_ID = os.getenv('REPLICA_ID', '')
+# Points per replica on the hash ring (more points: more even shards)
+VIRTUAL_NODES = 64
+JOBS_LEASE = 'scheduled_jobs'
+MODES = ('leader', 'shard')
+
+
+class SQLiteLeaseBackend:
+    """Leases and membership in one SQLite file shared by the replicas of a host."""
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, '
+                         'expires_at REAL NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS members (member TEXT PRIMARY KEY, expires_at REAL NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        """Take or renew the lease `name`; True if `holder` has it for the next `ttl` seconds."""
+        now = self.clock()
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT holder, expires_at FROM leases WHERE name = ?', (name,)).fetchone()
+            acquired = row is None or row[0] == holder or row[1] <= now
+            if acquired:
+                db.execute('INSERT OR REPLACE INTO leases VALUES (?, ?, ?)', (name, holder, now + ttl))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return acquired
+
+    def release(self, name: str, holder: str):
+        self._db().execute('DELETE FROM leases WHERE name = ? AND holder = ?', (name, holder))
+
+    def heartbeat(self, member: str, ttl: float):
+        self._db().execute('INSERT OR REPLACE INTO members VALUES (?, ?)', (member, self.clock() + ttl))
+
+    def leave(self, member: str):
+        self._db().execute('DELETE FROM members WHERE member = ?', (member,))
+
+    def members(self) -> List[str]:
+        rows = self._db().execute('SELECT member FROM members WHERE expires_at > ? ORDER BY member', (self.clock(),))
+        return [row[0] for row in rows]
+
+
+class MemoryLeaseBackend:
+    """Same interface inside one process (tests, several coordinators on threads)."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._leases: Dict[str, tuple] = {}
+        self._members: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        now = self.clock()
+        with self._lock:
+            current = self._leases.get(name)
+            if current is None or current[0] == holder or current[1] <= now:
+                self._leases[name] = (holder, now + ttl)
+                return True
+            return False
+
+    def release(self, name: str, holder: str):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == holder:
+                del self._leases[name]
+
+    def heartbeat(self, member: str, ttl: float):
+        with self._lock:
+            self._members[member] = self.clock() + ttl
+
+    def leave(self, member: str):
+        with self._lock:
+            self._members.pop(member, None)
+
+    def members(self) -> List[str]:
+        now = self.clock()
+        with self._lock:
+            return sorted(member for member, expires_at in self._members.items() if expires_at > now)
+
+
+LEASE_BACKENDS: Dict[str, Callable[[str], object]] = {
+    'sqlite': lambda url: SQLiteLeaseBackend(url[len('sqlite:///'):]),
+}
+
+
+def register_lease_backend(scheme: str, factory: Callable[[str], object]):
+    """Make COORDINATION=<scheme>://... use factory(url); the backend needs acquire, release,
+    heartbeat, leave and members (see SQLiteLeaseBackend)."""
+    LEASE_BACKENDS[scheme] = factory
+
+
+def backend_from_url(url: str):
+    scheme = url.split('://', 1)[0]
+    if scheme not in LEASE_BACKENDS:
+        raise ValueError(f"Unsupported COORDINATION {url!r}, expected one of {sorted(LEASE_BACKENDS)}")
+    return LEASE_BACKENDS[scheme](url)
+
+
+def _hash(key: str) -> int:
+    # Stable across processes (unlike hash()), so every replica builds the same ring
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hashing of keys onto members, VIRTUAL_NODES points per member."""
+
+    def __init__(self, members: List[str], vnodes: int = VIRTUAL_NODES):
+        points = sorted((_hash(f"{member}#{i}"), member) for member in members for i in range(vnodes))
+        self.members = sorted(members)
+        self._hashes = [h for h, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        return self._owners[bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)]
+
+
+class Coordinator:
+    def __init__(self, backend, mode: str = COORDINATION_MODE, replica_id: str = '',
+                 lease_seconds: float = LEASE_SECONDS, clock=time.time):
+        if mode not in MODES:
+            raise ValueError(f"Unknown COORDINATION_MODE {mode!r}, expected one of {MODES}")
+        self.backend = backend
+        self.mode = mode
+        self.replica_id = replica_id or REPLICA_ID or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._leader_until = 0.0
+        self._was_leader = False
+        self._ring = HashRing([self.replica_id])
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.clock() < self._leader_until
+
+    def tick(self):
+        """Heartbeat, take / renew the jobs lease and refresh the ring. Backend errors are logged."""
+        started = self.clock()
+        try:
+            self.backend.heartbeat(self.replica_id, self.lease_seconds)
+            if self.backend.acquire(JOBS_LEASE, self.replica_id, self.lease_seconds):
+                self._leader_until = started + self.lease_seconds
+            else:
+                self._leader_until = 0.0
+            members = self.backend.members()
+        except Exception as e:
+            logger.warning(f"Coordination backend unavailable: {e}")
+            members = None
+        if members is not None:
+            members = sorted(set(members) | {self.replica_id})
+            if members != self._ring.members:
+                logger.info(f"Replica {self.replica_id}: members {self._ring.members} -> {members}")
+                self._ring = HashRing(members)
+        if self.is_leader != self._was_leader:
+            logger.warning(f"Replica {self.replica_id} {'is now' if self.is_leader else 'is no longer'} the leader")
+            self._was_leader = self.is_leader
+        COORDINATION_LEADER.set(1 if self.is_leader else 0)
+        COORDINATION_MEMBERS.set(len(self._ring.members))
+
+    def runs_jobs(self) -> bool:
+        """Whether the scheduled jobs run in this replica (in shard mode: on its own keys)."""
+        return self.mode == 'shard' or self.is_leader
+
+    def owns(self, key: str) -> bool:
+        """Whether this replica handles `key` in its jobs (leader mode: the leader handles all)."""
+        if self.mode != 'shard':
+            return self.is_leader
+        return self._ring.owner(key) == self.replica_id
+
+    def start(self) -> 'Coordinator':
+        """First tick now (jobs know their role from the start), then every lease_seconds / 3."""
+        self.tick()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='coordinator', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            self.tick()
+
+    def stop(self):
+        """Hand over at once: release the lease and leave the ring."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.lease_seconds)
+        try:
+            self.backend.release(JOBS_LEASE, self.replica_id)
+            self.backend.leave(self.replica_id)
+        except Exception as e:
+            logger.warning(f"Could not release the coordination lease: {e}")
+        self._leader_until = 0.0
+        COORDINATION_LEADER.set(0)
+
+    def stats(self) -> dict:
+        return {'replica': self.replica_id, 'mode': self.mode, 'leader': self.is_leader,
+                'members': list(self._ring.members)}
+
+
+def create_coordinator(coordinator) -> Optional[Coordinator]:
+    """A Coordinator from a backend URL (or an instance, returned as is); None disables coordination."""
+    if not coordinator or isinstance(coordinator, Coordinator):
+        return coordinator or None
+    return Coordinator(backend_from_url(coordinator))
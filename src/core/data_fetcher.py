@@ -1,31 +1,187 @@
 # src/core/data_fetcher.py
-import ccxt
+# ccxt được import khi cần (get_exchange / luồng warm-up) vì import rất chậm
+import json
+import os
+import threading
 import pandas as pd
 import numpy as np
 import time
 import logging
+from .metrics import STAGE_SECONDS, EXCHANGE_ERRORS
+from .circuit_breaker import CircuitOpenError, guarded, guarded_async
+from .rate_limiter import throttled, throttled_async
 
 logger = logging.getLogger(__name__)
 
+# Returned when the exchange cannot list tickers
+FALLBACK_SYMBOLS = ("BTC/USDT", "ETH/USDT", "SOL/USDT", "BNB/USDT", "XRP/USDT")
+
+# Snapshot of each exchange's market metadata, so a restart does not wait for load_markets
+MARKETS_SNAPSHOT_DIR = os.getenv("MARKETS_SNAPSHOT_DIR", ".cache/markets")
+
+_exchanges = {}
+_exchanges_lock = threading.Lock()
+
+def _fake_exchange():
+    from .fake_exchange import FakeExchange
+    return FakeExchange()
+
+def _fake_async_exchange():
+    from .fake_exchange import AsyncFakeExchange
+    return AsyncFakeExchange()
+
+def _router_exchange():
+    from .exchange_router import ExchangeRouter
+    return ExchangeRouter()
+
+def _router_async_exchange():
+    from .exchange_router import AsyncExchangeRouter
+    return AsyncExchangeRouter()
+
+# name -> factory of a ccxt-compatible exchange object (fakes, recorded data...); checked before ccxt
+EXCHANGE_FACTORIES = {'fake': _fake_exchange, 'router': _router_exchange}
+ASYNC_EXCHANGE_FACTORIES = {'fake': _fake_async_exchange, 'router': _router_async_exchange}
+
+def register_exchange(name, factory, async_factory=None):
+    """Make `get_exchange(name)` (and so AdvancedSMC(exchange_name=name)) use factory()."""
+    with _exchanges_lock:
+        EXCHANGE_FACTORIES[name] = factory
+        if async_factory is not None:
+            ASYNC_EXCHANGE_FACTORIES[name] = async_factory
+        _exchanges.pop(name, None)
+
+def _markets_snapshot_path(exchange_id):
+    return os.path.join(MARKETS_SNAPSHOT_DIR, f"{exchange_id}.json")
+
+def load_markets_snapshot(exchange):
+    """Set the exchange's markets from the on-disk snapshot. Returns False if there is none."""
+    path = _markets_snapshot_path(exchange.id)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        exchange.set_markets(snapshot['markets'], snapshot.get('currencies'))
+        logger.info(f"Loaded {len(exchange.markets)} {exchange.id} markets from {path}")
+        return True
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable markets snapshot {path}: {e}")
+        return False
+
+def save_markets_snapshot(exchange):
+    """Write the exchange's loaded markets to the snapshot (atomic replace)."""
+    path = _markets_snapshot_path(exchange.id)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'markets': exchange.markets, 'currencies': exchange.currencies}, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"Error saving markets snapshot {path}: {e}")
+
+def get_exchange(exchange_name):
+    """
+    Shared ccxt instance per exchange (one rate limiter, markets loaded once).
+    Markets come from the on-disk snapshot when there is one; refresh_markets() updates them.
+    """
+    with _exchanges_lock:
+        exchange = _exchanges.get(exchange_name)
+        if exchange is None:
+            if exchange_name in EXCHANGE_FACTORIES:
+                exchange = EXCHANGE_FACTORIES[exchange_name]()
+            else:
+                import ccxt
+                exchange = getattr(ccxt, exchange_name)({
+                    'timeout': 30000,
+                    'enableRateLimit': True,
+                })
+                load_markets_snapshot(exchange)
+            _exchanges[exchange_name] = exchange
+        return exchange
+
+def refresh_markets(exchange_name):
+    """Reload the market metadata from the exchange and update the snapshot."""
+    try:
+        exchange = get_exchange(exchange_name)
+        throttled(exchange, 'load_markets', lambda: exchange.load_markets(reload=True))
+        save_markets_snapshot(exchange)
+        logger.info(f"Refreshed {len(exchange.markets)} {exchange_name} markets.")
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing {exchange_name} markets: {e}")
+        return False
+
+def _non_empty(ohlcv):
+    """Raise on an empty OHLCV answer (inside the guarded call, so the breaker counts it as a failure)."""
+    if not ohlcv:
+        import ccxt
+        raise ccxt.NetworkError("No OHLCV data returned")
+    return ohlcv
+
+async def _non_empty_async(call):
+    return _non_empty(await call)
+
 def fetch_ohlcv(exchange_name, symbol, timeframe, limit):
     """Fetch OHLCV data from specified exchange."""
     try:
-        exchange = getattr(ccxt, exchange_name)({
-            'timeout': 30000,
-            'enableRateLimit': True,
-        })
+        exchange = get_exchange(exchange_name)
         logger.info(f"Fetching {limit} candles of {symbol} {timeframe} from {exchange_name}...")
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        if not ohlcv:
-            raise ccxt.NetworkError("No OHLCV data returned")
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        with STAGE_SECONDS.labels(stage='fetch_ohlcv', exchange=exchange_name, timeframe=timeframe).time():
+            ohlcv = guarded(exchange_name, lambda: throttled(
+                exchange, 'fetch_ohlcv', lambda: _non_empty(exchange.fetch_ohlcv(symbol, timeframe, limit=limit)),
+                limit=limit), symbol)
+        df = ohlcv_to_dataframe(ohlcv)
+        # Exchange that served the candles (the router records the source it picked)
+        df.attrs['source'] = getattr(ohlcv, 'source', None) or exchange_name
         logger.info(f"Successfully fetched {len(df)} candles.")
         return df
+    except CircuitOpenError as e:
+        logger.info(f"Skipped fetching {symbol}: {e}")
+        return None
+    except Exception as e:
+        EXCHANGE_ERRORS.labels(exchange=exchange_name, operation='fetch_ohlcv').inc()
+        logger.error(f"Error fetching data for {symbol}: {e}")
+        return None
+
+def ohlcv_to_dataframe(ohlcv):
+    """Convert raw ccxt OHLCV rows into the DataFrame used by the analysis."""
+    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+async def fetch_ohlcv_async(exchange, symbol, timeframe, limit):
+    """
+    Fetch raw OHLCV rows with a ccxt.async_support exchange instance.
+    Returns the raw list (cheap to pickle for process-pool workers) or None.
+    """
+    try:
+        logger.info(f"Fetching {limit} candles of {symbol} {timeframe} from {exchange.id} (async)...")
+        with STAGE_SECONDS.labels(stage='fetch_ohlcv', exchange=exchange.id, timeframe=timeframe).time():
+            ohlcv = await guarded_async(exchange.id, lambda: throttled_async(
+                exchange, 'fetch_ohlcv', lambda: _non_empty_async(exchange.fetch_ohlcv(symbol, timeframe, limit=limit)),
+                limit=limit), symbol)
+        return ohlcv
+    except CircuitOpenError as e:
+        logger.info(f"Skipped fetching {symbol}: {e}")
+        return None
     except Exception as e:
+        EXCHANGE_ERRORS.labels(exchange=exchange.id, operation='fetch_ohlcv').inc()
         logger.error(f"Error fetching data for {symbol}: {e}")
         return None
 
+def create_async_exchange(exchange_name):
+    """Create a shared ccxt.async_support exchange instance (one per event loop)."""
+    if exchange_name in ASYNC_EXCHANGE_FACTORIES:
+        return ASYNC_EXCHANGE_FACTORIES[exchange_name]()
+    import ccxt.async_support as ccxt_async
+    exchange = getattr(ccxt_async, exchange_name)({
+        'timeout': 30000,
+        'enableRateLimit': True,
+    })
+    load_markets_snapshot(exchange)
+    return exchange
+
 def calculate_rsi(prices, period=14):
     """Calculate RSI."""
     if len(prices) < period:
@@ -67,23 +223,84 @@ def get_top_symbols_by_volume(exchange_name: str, limit: int = 100) -> list[str]
     """
     logger.info(f"Fetching top {limit} tokens by liquidity from {exchange_name}...")
     try:
-        exchange = getattr(ccxt, exchange_name)()
-        all_tickers = exchange.fetch_tickers()
-        
-        usdt_pairs = {
-            symbol: ticker for symbol, ticker in all_tickers.items()
-            if symbol.endswith('/USDT') and 
-               'USDC' not in symbol and 'BUSD' not in symbol and
-               'UP/' not in symbol and 'DOWN/' not in symbol
-        }
-        
-        sorted_pairs = sorted(usdt_pairs.values(), key=lambda t: t.get('quoteVolume', 0), reverse=True)
-        
-        top_symbols = [ticker['symbol'] for ticker in sorted_pairs[:limit]]
+        with STAGE_SECONDS.labels(stage='fetch_tickers', exchange=exchange_name, timeframe='').time():
+            exchange = get_exchange(exchange_name)
+            all_tickers = guarded(exchange_name, lambda: throttled(exchange, 'fetch_tickers', exchange.fetch_tickers))
+        top_symbols = _rank_usdt_pairs(all_tickers, limit)
         logger.info(f"Successfully fetched {len(top_symbols)} top tokens.")
         return top_symbols
         
+    except CircuitOpenError as e:
+        logger.info(f"Using the fallback token list: {e}")
+        return list(FALLBACK_SYMBOLS)
     except Exception as e:
+        EXCHANGE_ERRORS.labels(exchange=exchange_name, operation='fetch_tickers').inc()
         logger.error(f"Error fetching top tokens list: {e}")
         # Return fallback list if API fails
-        return ["BTC/USDT", "ETH/USDT", "SOL/USDT", "BNB/USDT", "XRP/USDT"]
\ No newline at end of file
+        return list(FALLBACK_SYMBOLS)
+
+async def get_top_symbols_by_volume_async(exchange, limit: int = 100) -> list[str]:
+    """Async variant of get_top_symbols_by_volume using a ccxt.async_support instance."""
+    logger.info(f"Fetching top {limit} tokens by liquidity from {exchange.id} (async)...")
+    try:
+        with STAGE_SECONDS.labels(stage='fetch_tickers', exchange=exchange.id, timeframe='').time():
+            all_tickers = await guarded_async(exchange.id, lambda: throttled_async(
+                exchange, 'fetch_tickers', exchange.fetch_tickers))
+        return _rank_usdt_pairs(all_tickers, limit)
+    except CircuitOpenError as e:
+        logger.info(f"Using the fallback token list: {e}")
+        return list(FALLBACK_SYMBOLS)
+    except Exception as e:
+        EXCHANGE_ERRORS.labels(exchange=exchange.id, operation='fetch_tickers').inc()
+        logger.error(f"Error fetching top tokens list: {e}")
+        return list(FALLBACK_SYMBOLS)
+
+def get_last_prices(exchange_name: str, symbols: list) -> dict:
+    """{symbol: last price} from one ticker snapshot; {} if the exchange call fails."""
+    try:
+        with STAGE_SECONDS.labels(stage='fetch_tickers', exchange=exchange_name, timeframe='').time():
+            exchange = get_exchange(exchange_name)
+            tickers = guarded(exchange_name, lambda: throttled(
+                exchange, 'fetch_tickers', lambda: exchange.fetch_tickers(symbols), symbols=symbols))
+        return _last_prices(tickers, symbols)
+    except CircuitOpenError as e:
+        logger.info(f"Skipped fetching last prices: {e}")
+        return {}
+    except Exception as e:
+        EXCHANGE_ERRORS.labels(exchange=exchange_name, operation='fetch_tickers').inc()
+        logger.error(f"Error fetching last prices: {e}")
+        return {}
+
+async def get_last_prices_async(exchange, symbols: list) -> dict:
+    """Async variant of get_last_prices using a ccxt.async_support instance."""
+    try:
+        with STAGE_SECONDS.labels(stage='fetch_tickers', exchange=exchange.id, timeframe='').time():
+            tickers = await guarded_async(exchange.id, lambda: throttled_async(
+                exchange, 'fetch_tickers', lambda: exchange.fetch_tickers(symbols), symbols=symbols))
+        return _last_prices(tickers, symbols)
+    except CircuitOpenError as e:
+        logger.info(f"Skipped fetching last prices: {e}")
+        return {}
+    except Exception as e:
+        EXCHANGE_ERRORS.labels(exchange=exchange.id, operation='fetch_tickers').inc()
+        logger.error(f"Error fetching last prices: {e}")
+        return {}
+
+def _last_prices(tickers: dict, symbols: list) -> dict:
+    wanted = set(symbols)
+    return {
+        symbol: float(ticker['last']) for symbol, ticker in tickers.items()
+        if symbol in wanted and ticker.get('last') is not None
+    }
+
+def _rank_usdt_pairs(all_tickers: dict, limit: int) -> list[str]:
+    """Filter USDT pairs (no stablecoin/leveraged tokens) and sort by 24h quote volume."""
+    usdt_pairs = {
+        symbol: ticker for symbol, ticker in all_tickers.items()
+        if symbol.endswith('/USDT') and 
+           'USDC' not in symbol and 'BUSD' not in symbol and
+           'UP/' not in symbol and 'DOWN/' not in symbol
+    }
+    
+    sorted_pairs = sorted(usdt_pairs.values(), key=lambda t: t.get('quoteVolume') or 0, reverse=True)
+    return [ticker['symbol'] for ticker in sorted_pairs[:limit]]
\ No newline at end of file
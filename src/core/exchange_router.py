@@ -0,0 +1,466 @@
+# src/core/exchange_router.py
+"""
+Data source router over several exchanges, registered as the exchange 'router'
+(EXCHANGE=router, EXCHANGE_SOURCES=binance,okx,bybit), so AdvancedSMC, the scanner and the
+alert jobs use it like any ccxt instance; AsyncExchangeRouter does the same over
+ccxt.async_support for BOT_RUNTIME=async.
+
+Each call goes to the fastest healthy source (median latency of its recent successful
+calls); a source is tried first until it has MIN_SAMPLES calls, so every source gets
+measured, in the configured order. If the source has not
+answered after its p95 latency, the same request is hedged to the next source and the
+first answer wins; if it fails, the next source is tried at once (failover). A source
+with ROUTER_FAILURES consecutive failures, or too high an error rate, is skipped for
+ROUTER_COOLDOWN seconds. A symbol the source does not list (BadSymbol, no candles) is a
+miss, not a failure: the request fails over but the source stays healthy.
+
+Symbols are mapped per source: EXCHANGE_SYMBOL_MAP overrides, otherwise the same unified
+symbol, otherwise the same base with an equivalent quote (USDT <-> USD / USDC). Results
+carry the source that served them: `rows.source` for fetch_ohlcv, `ticker['source']`.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from .circuit_breaker import is_request_error
+from .metrics import EXCHANGE_ERRORS, ROUTER_DECISIONS, STAGE_SECONDS
+from .rate_limiter import throttled, throttled_async
+
+logger = logging.getLogger(__name__)
+
+# Các sàn nguồn, theo thứ tự ưu tiên khi chưa có số liệu độ trễ
+EXCHANGE_SOURCES = os.getenv('EXCHANGE_SOURCES', 'binance,okx,bybit')
+# Ghi đè tên cặp theo sàn: "kraken:BTC/USDT=BTC/USD,okx:PEPE/USDT=PEPE/USDT"
+EXCHANGE_SYMBOL_MAP = os.getenv('EXCHANGE_SYMBOL_MAP', '')
+# Số lần lỗi liên tiếp trước khi tạm bỏ qua một sàn, và thời gian bỏ qua (giây)
+ROUTER_FAILURES = int(os.getenv('ROUTER_FAILURES', '3'))
+ROUTER_COOLDOWN = float(os.getenv('ROUTER_COOLDOWN', '30'))
+# Gửi thêm request tới sàn kế tiếp nếu sàn đang chờ chưa trả lời sau p95 độ trễ của nó
+ROUTER_HEDGE_DEFAULT = float(os.getenv('ROUTER_HEDGE_DEFAULT', '2'))  # until a source has MIN_SAMPLES
+ROUTER_HEDGE_MIN = float(os.getenv('ROUTER_HEDGE_MIN', '0.25'))
+ROUTER_WORKERS = int(os.getenv('ROUTER_WORKERS', '16'))
+# Rolling window of calls per source, and the samples needed before its statistics are used
+WINDOW = 200
+MIN_SAMPLES = 20
+MAX_ERROR_RATE = 0.5
+QUOTE_ALIASES = {'USDT': ('USD', 'USDC'), 'USD': ('USDT', 'USDC'), 'USDC': ('USDT', 'USD')}
+
+
+class SourcedRows(list):
+    """fetch_ohlcv rows that remember the exchange that served them."""
+    source = None
+
+
+def parse_symbol_map(text: str) -> Dict[str, Dict[str, str]]:
+    """'kraken:BTC/USDT=BTC/USD,...' -> {'kraken': {'BTC/USDT': 'BTC/USD'}}."""
+    symbol_map = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        try:
+            source, mapping = item.split(':', 1)
+            symbol, native = mapping.split('=', 1)
+        except ValueError:
+            logger.warning(f"Ignoring malformed EXCHANGE_SYMBOL_MAP entry {item!r}")
+            continue
+        symbol_map.setdefault(source.strip(), {})[symbol.strip()] = native.strip()
+    return symbol_map
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SourceHealth:
+    """Rolling latency / error rate of one source."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = deque(maxlen=WINDOW)  # (seconds, ok)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.misses = 0  # requests for symbols the source does not list
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool, now: float):
+        with self._lock:
+            self.calls.append((seconds, ok))
+            if ok:
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= ROUTER_FAILURES:
+                self.cooldown_until = now + ROUTER_COOLDOWN
+                self.consecutive_failures = 0
+                logger.warning(f"Router: {self.name} failing, skipped for {ROUTER_COOLDOWN:.0f}s")
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def _latencies(self) -> List[float]:
+        return [seconds for seconds, ok in self.calls if ok]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(1 for _, ok in self.calls if not ok) / len(self.calls) if self.calls else 0.0
+
+    def healthy(self, now: float) -> bool:
+        if now < self.cooldown_until:
+            return False
+        return len(self.calls) < MIN_SAMPLES or self.error_rate() <= MAX_ERROR_RATE
+
+    def latency(self, q: float) -> Optional[float]:
+        """q-quantile of the recent successful calls; None until MIN_SAMPLES of them."""
+        with self._lock:
+            latencies = self._latencies()
+        return _percentile(latencies, q) if len(latencies) >= MIN_SAMPLES else None
+
+    def stats(self, now: float) -> dict:
+        p50, p95 = self.latency(0.5), self.latency(0.95)
+        return {
+            'calls': len(self.calls), 'error_rate': round(self.error_rate(), 3), 'healthy': self.healthy(now),
+            'p50': round(p50, 4) if p50 is not None else None, 'p95': round(p95, 4) if p95 is not None else None,
+            'cooldown': round(max(0.0, self.cooldown_until - now), 1), 'misses': self.misses,
+        }
+
+
+def _record_decision(source: str, decision: str, operation: str, symbols: List[str]):
+    ROUTER_DECISIONS.labels(source=source, decision=decision).inc()
+    logger.info(f"Router: {decision} {operation} {' '.join(symbols)} to {source}")
+
+
+def _checked_rows(rows, native_symbol: str):
+    if not rows:
+        raise LookupError(f"No OHLCV data returned for {native_symbol}")
+    return rows
+
+
+def _sourced_rows(rows, source: str) -> SourcedRows:
+    rows = SourcedRows(rows)
+    rows.source = source
+    return rows
+
+
+def _unified_tickers(tickers: dict, source: str, mapping: Dict[str, str]) -> dict:
+    unified = {native: symbol for symbol, native in mapping.items()}
+    result = {}
+    for native, ticker in tickers.items():
+        symbol = unified.get(native, native)
+        result[symbol] = dict(ticker, symbol=symbol, source=source)
+    return result
+
+
+class ExchangeRouter:
+    """Blocking ccxt look-alike that spreads each call over EXCHANGE_SOURCES (what get_exchange('router') returns)."""
+    id = 'router'
+    has = {'fetchOHLCV': True, 'fetchTickers': True, 'fetchMarkets': True, 'fetchCurrencies': False}
+
+    def __init__(self, sources=None, symbol_map: Optional[Dict[str, Dict[str, str]]] = None,
+                 hedge_after: Optional[float] = None, workers: int = ROUTER_WORKERS,
+                 get_source: Optional[Callable] = None, clock=time.monotonic):
+        """
+        sources: exchange names for get_exchange() (default EXCHANGE_SOURCES).
+        hedge_after: fixed hedging delay in seconds instead of the p95 of each source (0 disables hedging).
+        workers: threads running the blocking calls (0: none, for AsyncExchangeRouter).
+        get_source: name -> exchange instance (default data_fetcher.get_exchange, resolved at first use).
+        """
+        if isinstance(sources, str):
+            sources = sources.split(',')
+        self.sources = [s.strip() for s in (sources or EXCHANGE_SOURCES.split(',')) if s.strip()]
+        self.symbol_map = symbol_map if symbol_map is not None else parse_symbol_map(EXCHANGE_SYMBOL_MAP)
+        self.hedge_after = hedge_after
+        self.clock = clock
+        self.currencies = {}
+        self.health = {source: SourceHealth(source) for source in self.sources}
+        self._get_source = get_source
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='exchange-router') if workers else None
+
+    def source(self, name: str):
+        if self._get_source is None:
+            # Not in __init__: the router itself is created under the get_exchange lock
+            from .data_fetcher import get_exchange
+            self._get_source = get_exchange
+        return self._get_source(name)
+
+    # --- Routing ---
+    def ranked(self) -> List[str]:
+        """Healthy sources, fastest first (not yet measured ones first), then the others."""
+        now = self.clock()
+
+        def rank(item):
+            index, source = item
+            health = self.health[source]
+            p50 = health.latency(0.5)
+            return not health.healthy(now), p50 or 0.0, index
+
+        return [source for _, source in sorted(enumerate(self.sources), key=rank)]
+
+    def map_symbol(self, source: str, symbol: str) -> Optional[str]:
+        """The symbol of `source` for the unified `symbol`; None if it does not list it."""
+        override = self.symbol_map.get(source, {}).get(symbol)
+        if override:
+            return override
+        markets = getattr(self.source(source), 'markets', None)
+        if not markets or symbol in markets:
+            return symbol
+        base, _, quote = symbol.partition('/')
+        for alias in QUOTE_ALIASES.get(quote, ()):
+            if f"{base}/{alias}" in markets:
+                return f"{base}/{alias}"
+        return None
+
+    def _hedge_delay(self, source: str) -> Optional[float]:
+        if self.hedge_after is not None:
+            return self.hedge_after or None
+        p95 = self.health[source].latency(0.95)
+        return max(ROUTER_HEDGE_MIN, p95) if p95 is not None else ROUTER_HEDGE_DEFAULT
+
+    def _timed(self, source: str, operation: str, timeframe: str, call: Callable, request: dict):
+        exchange = self.source(source)
+        started = time.perf_counter()
+        try:
+            with STAGE_SECONDS.labels(stage=operation, exchange=source, timeframe=timeframe).time():
+                result = throttled(exchange, operation, lambda: call(exchange), **request)
+        except Exception as e:
+            self._record(source, operation, time.perf_counter() - started, e)
+            raise
+        self._record(source, operation, time.perf_counter() - started)
+        return result
+
+    def _record(self, source: str, operation: str, seconds: float, error: Optional[Exception] = None):
+        """Health of a source after a call. A symbol it does not list is a miss, not a failure of the source."""
+        if error is None:
+            self.health[source].record(seconds, True, self.clock())
+        elif isinstance(error, LookupError) or is_request_error(error):
+            self.health[source].record_miss()
+        else:
+            self.health[source].record(seconds, False, self.clock())
+            EXCHANGE_ERRORS.labels(exchange=source, operation=operation).inc()
+
+    def candidates(self, symbols: List[str]) -> List[tuple]:
+        """(source, mapping) of the sources listing every symbol, best first; LookupError if none does."""
+        candidates = []
+        for source in self.ranked():
+            mapping = {symbol: self.map_symbol(source, symbol) for symbol in symbols}
+            if all(mapping.values()):
+                candidates.append((source, mapping))
+        if not candidates:
+            raise LookupError(f"None of {self.sources} lists {', '.join(symbols)}")
+        return candidates
+
+    def route(self, operation: str, symbols: List[str], call: Callable, timeframe: str = '',
+              request: Optional[dict] = None):
+        """
+        Run call(exchange, mapping) on the best source listing `symbols` (mapping: unified -> native
+        symbol), hedging and failing over as described above. Returns (result, source, mapping).
+        `request` (limit, symbols) sets the rate-limiter weight of the call.
+        """
+        candidates = self.candidates(symbols)
+        pending, errors, launched = {}, [], 0
+
+        def launch(decision: Optional[str] = None):
+            nonlocal launched
+            source, mapping = candidates[launched]
+            launched += 1
+            if decision:
+                _record_decision(source, decision, operation, symbols)
+            # The copied context carries the caller's rate-limiter priority into the worker thread
+            future = self._executor.submit(contextvars.copy_context().run, self._timed, source, operation, timeframe,
+                                           lambda ex: call(ex, mapping), request or {})
+            pending[future] = (source, mapping)
+
+        launch()
+        while pending:
+            last_source = candidates[launched - 1][0]
+            timeout = self._hedge_delay(last_source) if launched < len(candidates) else None
+            done, _ = wait(pending, timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launch('hedge')
+                continue
+            for future in done:
+                source, mapping = pending.pop(future)
+                try:
+                    return future.result(), source, mapping
+                except Exception as e:
+                    errors.append(e)
+                    logger.warning(f"Router: {operation} on {source} failed: {e}")
+            if not pending and launched < len(candidates):
+                launch('failover')
+        raise errors[-1]
+
+    # --- ccxt surface used by the bot ---
+    @property
+    def markets(self) -> dict:
+        markets = {}
+        for source in reversed(self.sources):
+            try:
+                markets.update(getattr(self.source(source), 'markets', None) or {})
+            except Exception as e:
+                logger.error(f"Router: cannot read {source} markets: {e}")
+        return markets
+
+    def load_markets(self, reload: bool = False) -> dict:
+        """Load the markets of every source (and update their snapshots, see data_fetcher.refresh_markets)."""
+        from .data_fetcher import save_markets_snapshot
+
+        for source in self.sources:
+            try:
+                exchange = self.source(source)
+                exchange.load_markets(reload=reload)
+                save_markets_snapshot(exchange)
+            except Exception as e:
+                logger.error(f"Router: error loading {source} markets: {e}")
+        return self.markets
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since=None, limit=None, params=None) -> SourcedRows:
+        def call(exchange, mapping):
+            return _checked_rows(exchange.fetch_ohlcv(mapping[symbol], timeframe, since=since, limit=limit,
+                                                      params=params or {}), mapping[symbol])
+
+        rows, source, _ = self.route('fetch_ohlcv', [symbol], call, timeframe, {'limit': limit})
+        return _sourced_rows(rows, source)
+
+    def fetch_ticker(self, symbol: str, params=None) -> dict:
+        ticker, source, _ = self.route('fetch_ticker', [symbol],
+                                       lambda exchange, mapping: exchange.fetch_ticker(mapping[symbol]))
+        return dict(ticker, symbol=symbol, source=source)
+
+    def fetch_tickers(self, symbols=None, params=None) -> dict:
+        """Tickers keyed by unified symbol. Without `symbols`, every ticker of the best source."""
+        symbols = list(symbols or ())
+
+        def call(exchange, mapping):
+            return exchange.fetch_tickers(list(mapping.values()) if symbols else None)
+
+        tickers, source, mapping = self.route('fetch_tickers', symbols, call, request={'symbols': symbols})
+        return _unified_tickers(tickers, source, mapping)
+
+    def stats(self) -> dict:
+        now = self.clock()
+        return {source: self.health[source].stats(now) for source in self.sources}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+class AsyncExchangeRouter(ExchangeRouter):
+    """
+    ExchangeRouter for the asyncio runtime (what create_async_exchange('router') returns):
+    the same ranking, hedging and failover over ccxt.async_support sources, as tasks on the
+    event loop instead of threads. Hedged requests that lose the race are cancelled.
+    """
+
+    def __init__(self, sources=None, symbol_map: Optional[Dict[str, Dict[str, str]]] = None,
+                 hedge_after: Optional[float] = None, get_source: Optional[Callable] = None, clock=time.monotonic):
+        """get_source: name -> async exchange instance (default: one data_fetcher.create_async_exchange per source)."""
+        super().__init__(sources, symbol_map, hedge_after, workers=0, get_source=get_source, clock=clock)
+        self._sources = {}
+
+    def source(self, name: str):
+        if self._get_source is not None:
+            return self._get_source(name)
+        if name not in self._sources:
+            from .data_fetcher import create_async_exchange
+            self._sources[name] = create_async_exchange(name)
+        return self._sources[name]
+
+    async def _timed(self, source: str, operation: str, timeframe: str, call: Callable, request: dict):
+        exchange = self.source(source)
+        started = time.perf_counter()
+        try:
+            with STAGE_SECONDS.labels(stage=operation, exchange=source, timeframe=timeframe).time():
+                result = await throttled_async(exchange, operation, lambda: call(exchange), **request)
+        except Exception as e:
+            self._record(source, operation, time.perf_counter() - started, e)
+            raise
+        self._record(source, operation, time.perf_counter() - started)
+        return result
+
+    async def route(self, operation: str, symbols: List[str], call: Callable, timeframe: str = '',
+                    request: Optional[dict] = None):
+        """ExchangeRouter.route with a coroutine function call(exchange, mapping)."""
+        candidates = self.candidates(symbols)
+        pending, errors, launched = {}, [], 0
+
+        def launch(decision: Optional[str] = None):
+            nonlocal launched
+            source, mapping = candidates[launched]
+            launched += 1
+            if decision:
+                _record_decision(source, decision, operation, symbols)
+            # The task copies the context, and with it the caller's rate-limiter priority
+            task = asyncio.ensure_future(self._timed(source, operation, timeframe,
+                                                     lambda ex: call(ex, mapping), request or {}))
+            pending[task] = (source, mapping)
+
+        launch()
+        try:
+            while pending:
+                last_source = candidates[launched - 1][0]
+                timeout = self._hedge_delay(last_source) if launched < len(candidates) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch('hedge')
+                    continue
+                for task in done:
+                    source, mapping = pending.pop(task)
+                    try:
+                        return task.result(), source, mapping
+                    except Exception as e:
+                        errors.append(e)
+                        logger.warning(f"Router: {operation} on {source} failed: {e}")
+                if not pending and launched < len(candidates):
+                    launch('failover')
+        finally:
+            for task in pending:
+                task.cancel()
+        raise errors[-1]
+
+    async def load_markets(self, reload: bool = False) -> dict:
+        """Load the markets of every source concurrently (and update their snapshots)."""
+        from .data_fetcher import save_markets_snapshot
+
+        async def load(source):
+            try:
+                exchange = self.source(source)
+                await throttled_async(exchange, 'load_markets', lambda: exchange.load_markets(reload=reload))
+                save_markets_snapshot(exchange)
+            except Exception as e:
+                logger.error(f"Router: error loading {source} markets: {e}")
+
+        await asyncio.gather(*(load(source) for source in self.sources))
+        return self.markets
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since=None, limit=None,
+                          params=None) -> SourcedRows:
+        async def call(exchange, mapping):
+            return _checked_rows(await exchange.fetch_ohlcv(mapping[symbol], timeframe, since=since, limit=limit,
+                                                            params=params or {}), mapping[symbol])
+
+        rows, source, _ = await self.route('fetch_ohlcv', [symbol], call, timeframe, {'limit': limit})
+        return _sourced_rows(rows, source)
+
+    async def fetch_ticker(self, symbol: str, params=None) -> dict:
+        ticker, source, _ = await self.route('fetch_ticker', [symbol],
+                                             lambda exchange, mapping: exchange.fetch_ticker(mapping[symbol]))
+        return dict(ticker, symbol=symbol, source=source)
+
+    async def fetch_tickers(self, symbols=None, params=None) -> dict:
+        symbols = list(symbols or ())
+
+        def call(exchange, mapping):
+            return exchange.fetch_tickers(list(mapping.values()) if symbols else None)
+
+        tickers, source, mapping = await self.route('fetch_tickers', symbols, call, request={'symbols': symbols})
+        return _unified_tickers(tickers, source, mapping)
+
+    async def close(self):
+        super().close()
+        await asyncio.gather(*(exchange.close() for exchange in self._sources.values()), return_exceptions=True)
@@ -0,0 +1,327 @@
+# src/core/fake_exchange.py
+"""
+Deterministic in-process exchange with the part of the ccxt API the bot uses
+(load_markets, fetch_markets, fetch_ohlcv with since/limit pagination, fetch_tickers).
+No network: candles come from the seeded generators of synthetic_data, or from a
+recording made with record_candles().
+
+Registered in data_fetcher as exchange 'fake', so `AdvancedSMC('fake')`,
+`BotAnalysisService('fake')` or `AsyncAnalysisService('fake')` run offline and
+reproducibly. Latency, rate-limit errors and outages can be injected:
+
+    exchange = FakeExchange(seed=1, latency=0.2, rate_limit=10, outages=[(30, 60)])
+    register_exchange('fake', lambda: exchange)
+
+Env (used by the default 'fake' registration): FAKE_EXCHANGE_SEED, FAKE_EXCHANGE_KIND,
+FAKE_EXCHANGE_LATENCY, FAKE_EXCHANGE_ERROR_RATE, FAKE_EXCHANGE_RATE_LIMIT, FAKE_EXCHANGE_ARCHIVE.
+
+    python -m src.core.fake_exchange record --exchange binance --symbols BTC/USDT,ETH/USDT \
+        --timeframes 1h,4h --limit 1000 --output candles.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+
+import numpy as np
+
+from .rate_limiter import priority, throttled
+from .synthetic_data import DEFAULT_END_MS, KINDS, synthetic_ohlcv
+from .timeframes import candle_open, timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+FAKE_EXCHANGE_SEED = int(os.getenv('FAKE_EXCHANGE_SEED', '0'))
+FAKE_EXCHANGE_KIND = os.getenv('FAKE_EXCHANGE_KIND', '')  # empty: one kind per symbol
+FAKE_EXCHANGE_LATENCY = float(os.getenv('FAKE_EXCHANGE_LATENCY', '0'))
+FAKE_EXCHANGE_ERROR_RATE = float(os.getenv('FAKE_EXCHANGE_ERROR_RATE', '0'))
+FAKE_EXCHANGE_RATE_LIMIT = int(os.getenv('FAKE_EXCHANGE_RATE_LIMIT', '0'))
+FAKE_EXCHANGE_ARCHIVE = os.getenv('FAKE_EXCHANGE_ARCHIVE', '')
+
+DEFAULT_BASES = ('BTC', 'ETH', 'BNB', 'SOL', 'XRP', 'ADA', 'DOGE', 'DOT', 'AVAX', 'LINK', 'TRX', 'MATIC',
+                 'LTC', 'ATOM', 'NEAR', 'UNI', 'APT', 'ARB', 'OP', 'FIL', 'INJ', 'SUI', 'PEPE', 'TON')
+# Candles generated per (symbol, timeframe); pages are cut from this history
+HISTORY_BARS = 5000
+# Same limits as binance: 500 candles by default, at most 1000 per request
+DEFAULT_OHLCV_LIMIT = 500
+MAX_OHLCV_LIMIT = 1000
+# Timeframe whose latest close is the ticker's last price (for pairs without recorded candles)
+TICKER_TIMEFRAME = '1m'
+
+
+def _errors():
+    """ccxt exception classes, so callers handle fake failures exactly like real ones."""
+    from ccxt.base import errors
+    return errors
+
+
+def fake_markets(symbols) -> dict:
+    markets = {}
+    for symbol in symbols:
+        base, quote = symbol.split('/')
+        markets[symbol] = {'id': base + quote, 'symbol': symbol, 'base': base, 'quote': quote,
+                           'type': 'spot', 'spot': True, 'active': True}
+    return markets
+
+
+class FakeExchange:
+    """Blocking ccxt look-alike, what get_exchange('fake') returns."""
+    id = 'fake'
+    has = {'fetchOHLCV': True, 'fetchTickers': True, 'fetchMarkets': True, 'fetchCurrencies': False}
+
+    def __init__(self, symbols=None, seed: int = FAKE_EXCHANGE_SEED, kind: str = FAKE_EXCHANGE_KIND,
+                 latency: float = FAKE_EXCHANGE_LATENCY, error_rate: float = FAKE_EXCHANGE_ERROR_RATE,
+                 rate_limit: int = FAKE_EXCHANGE_RATE_LIMIT, outages=(), archive: str = FAKE_EXCHANGE_ARCHIVE,
+                 end_ms: int = None, history_bars: int = HISTORY_BARS, clock=time.time):
+        """
+        symbols: listed pairs (default: DEFAULT_BASES/USDT, or the pairs of the archive).
+        kind: synthetic_data kind of every pair; empty picks one per symbol.
+        latency: seconds per call. error_rate: share of calls failing with NetworkError.
+        rate_limit: calls per second above which RateLimitExceeded is raised (0 = unlimited).
+        outages: (start, end) seconds after creation during which ExchangeNotAvailable is raised.
+        archive: recorded candles used instead of synthetic ones: a JSON recording
+            {symbol: {timeframe: [[ms, o, h, l, c, v], ...]}} or a candle_archive file (memory-mapped).
+        end_ms: time of the last synthetic candle (default: the clock, so the last candle is the open one).
+        history_bars: synthetic candles available per pair (for backfills / backtests).
+        """
+        self.recorded, self._archive = {}, None
+        if archive and archive.endswith('.json'):
+            self.recorded = self._load_archive(archive)
+        elif archive:
+            from .candle_archive import CandleArchive
+            self._archive = CandleArchive(archive)
+        recorded_symbols = list(self.recorded) or (self._archive.symbols() if self._archive else [])
+        self.symbols = list(symbols or dict.fromkeys(recorded_symbols) or [f"{base}/USDT" for base in DEFAULT_BASES])
+        self.seed = seed
+        self.kind = kind
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rateLimit = 1000 / rate_limit if rate_limit else 0  # ccxt: ms between requests
+        self.end_ms = end_ms
+        self.history_bars = history_bars
+        self.clock = clock
+        self.markets = fake_markets(self.symbols)
+        self.currencies = {}
+        self.calls = defaultdict(int)
+        self._created = clock()
+        self._outages = [(self._created + start, self._created + end) for start, end in outages]
+        self._recent_calls = deque()
+        self._series = {}
+        self._served = {}  # symbol -> timeframes fetched by callers
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # --- Fault injection ---
+    def start_outage(self, seconds: float):
+        """Fail every call with ExchangeNotAvailable for the next `seconds`."""
+        now = self.clock()
+        with self._lock:
+            self._outages.append((now, now + seconds))
+
+    def _check(self, method: str):
+        """Count the call and raise the injected error, if any."""
+        now = self.clock()
+        with self._lock:
+            self.calls[method] += 1
+            in_outage = any(start <= now < end for start, end in self._outages)
+            if self.rate_limit:
+                while self._recent_calls and self._recent_calls[0] <= now - 1:
+                    self._recent_calls.popleft()
+                self._recent_calls.append(now)
+                limited = len(self._recent_calls) > self.rate_limit
+            else:
+                limited = False
+            failed = self.error_rate and self._rng.random() < self.error_rate
+        if in_outage:
+            raise _errors().ExchangeNotAvailable(f"{self.id} {method}: exchange is under maintenance")
+        if limited:
+            raise _errors().RateLimitExceeded(f"{self.id} {method}: 429 Too Many Requests")
+        if failed:
+            raise _errors().NetworkError(f"{self.id} {method}: connection reset")
+
+    def _io(self, method: str):
+        if self.latency:
+            time.sleep(self.latency)
+        self._check(method)
+
+    # --- Data ---
+    @staticmethod
+    def _load_archive(path: str) -> dict:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _kind_of(self, symbol: str) -> str:
+        return self.kind or KINDS[zlib.crc32(symbol.encode()) % len(KINDS)]
+
+    def series(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Full candle history of a pair as an (n, 6) array; the same for the same seed."""
+        if symbol not in self.markets:
+            raise _errors().BadSymbol(f"{self.id} does not have market symbol {symbol}")
+        key = (symbol, timeframe, None)
+        if key in self._series:
+            return self._series[key]
+        if timeframe in self.recorded.get(symbol, {}):
+            self._series[key] = np.asarray(self.recorded[symbol][timeframe], dtype=np.float64)
+            return self._series[key]
+        if self._archive is not None and (symbol, timeframe) in self._archive:
+            self._series[key] = self._archive.array(symbol, timeframe)
+            return self._series[key]
+
+        key = (symbol, timeframe, self.seed)
+        candles = self._series.get(key)
+        if candles is None:
+            seed = self.seed * 1_000_003 + zlib.crc32(f"{symbol}:{timeframe}".encode())
+            start_price = 1 + zlib.crc32(symbol.encode()) % 50_000
+            candles = synthetic_ohlcv(self._kind_of(symbol), self.history_bars, seed, timeframe,
+                                      DEFAULT_END_MS, float(start_price))
+            self._series[key] = candles
+        # Values are fixed; only the time axis follows end_ms / the clock
+        end_ms = self.end_ms if self.end_ms is not None else int(self.clock() * 1000)
+        shift = int(candle_open(timeframe, end_ms / 1000) * 1000) - int(candles[-1, 0])
+        if shift:
+            candles = candles.copy()
+            candles[:, 0] += shift
+        return candles
+
+    def _page(self, symbol, timeframe, since, limit) -> list:
+        candles = self.series(symbol, timeframe)
+        self._served.setdefault(symbol, set()).add(timeframe)
+        limit = min(limit or DEFAULT_OHLCV_LIMIT, MAX_OHLCV_LIMIT)
+        if since is None:
+            page = candles[-limit:]
+        else:
+            start = int(np.searchsorted(candles[:, 0], since, side='left'))
+            page = candles[start:start + limit]
+        rows = page.tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
+
+    def _last_price(self, symbol: str):
+        """
+        Close of the latest candle of the shortest recorded timeframe. Synthetic timeframes are
+        independent series, so without recordings the shortest one already served is used
+        (TICKER_TIMEFRAME if none), to keep the ticker in line with the candles the caller saw.
+        """
+        timeframes = (list(self.recorded.get(symbol, {})) or (self._archive.timeframes(symbol) if self._archive else [])
+                      or list(self._served.get(symbol, ())))
+        timeframe = min(timeframes, key=timeframe_to_seconds) if timeframes else TICKER_TIMEFRAME
+        candles = self.series(symbol, timeframe)
+        return float(candles[-1, 4]) if len(candles) else None
+
+    def _tickers(self) -> dict:
+        tickers = {}
+        for rank, symbol in enumerate(self.symbols):
+            volume = float((len(self.symbols) - rank) * 1_000_000 + zlib.crc32(symbol.encode()) % 1_000_000)
+            tickers[symbol] = {'symbol': symbol, 'quoteVolume': volume, 'last': self._last_price(symbol)}
+        return tickers
+
+    # --- ccxt API ---
+    def load_markets(self, reload=False, params=None):
+        if reload:
+            self._io('load_markets')
+        return self.markets
+
+    def fetch_markets(self, params=None):
+        self._io('fetch_markets')
+        return list(fake_markets(self.symbols).values())
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets if isinstance(markets, dict) else {m['symbol']: m for m in markets}
+        self.currencies = currencies or {}
+        return self.markets
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._io('fetch_ohlcv')
+        return self._page(symbol, timeframe, since, limit)
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self._io('fetch_tickers')
+        tickers = self._tickers()
+        return {s: t for s, t in tickers.items() if s in symbols} if symbols else tickers
+
+
+class AsyncFakeExchange(FakeExchange):
+    """Same exchange for the asyncio runtime (ccxt.async_support API)."""
+
+    async def _io_async(self, method: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._check(method)
+
+    async def load_markets(self, reload=False, params=None):
+        if reload:
+            await self._io_async('load_markets')
+        return self.markets
+
+    async def fetch_markets(self, params=None):
+        await self._io_async('fetch_markets')
+        return list(fake_markets(self.symbols).values())
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        await self._io_async('fetch_ohlcv')
+        return self._page(symbol, timeframe, since, limit)
+
+    async def fetch_tickers(self, symbols=None, params=None):
+        await self._io_async('fetch_tickers')
+        tickers = self._tickers()
+        return {s: t for s, t in tickers.items() if s in symbols} if symbols else tickers
+
+    async def close(self):
+        pass
+
+
+# --- Recording ---
+def fetch_history(exchange, symbol: str, timeframe: str, limit: int) -> list:
+    """The last `limit` candles of a pair, paging with `since` like a backfill would."""
+    step_ms = timeframe_to_seconds(timeframe) * 1000
+    since = (int(time.time() * 1000) // step_ms - limit + 1) * step_ms
+    rows = []
+    while len(rows) < limit:
+        page_limit = min(limit - len(rows), MAX_OHLCV_LIMIT)
+        with priority('backfill'):
+            page = throttled(exchange, 'fetch_ohlcv',
+                             lambda: exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=page_limit), limit=page_limit)
+        if not page:
+            break
+        rows.extend(page)
+        since = int(page[-1][0]) + step_ms
+    return rows[-limit:]
+
+
+def record_candles(exchange, symbols, timeframes, limit: int, path: str) -> dict:
+    """Write the candles of a live exchange to a FakeExchange(archive=path) recording."""
+    recording = {symbol: {tf: fetch_history(exchange, symbol, tf, limit) for tf in timeframes} for symbol in symbols}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(recording, f)
+    os.replace(tmp_path, path)
+    logger.info(f"Recorded {len(symbols)} symbols x {len(timeframes)} timeframes to {path}")
+    return recording
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record candles for FakeExchange(archive=...).')
+    parser.add_argument('command', choices=['record'])
+    parser.add_argument('--exchange', default='binance')
+    parser.add_argument('--symbols', default='BTC/USDT,ETH/USDT')
+    parser.add_argument('--timeframes', default='15m,1h,4h,1d')
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    from .data_fetcher import get_exchange
+    logging.basicConfig(level=logging.INFO)
+    record_candles(get_exchange(args.exchange), args.symbols.split(','), args.timeframes.split(','),
+                   args.limit, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+# src/core/fake_redis.py
+"""
+In-process stand-in for a Redis server: the part of the protocol the shared analysis
+cache uses (PING, GET, SET with EX/PX/NX/XX, DEL, EXISTS, DBSIZE, FLUSHDB, SELECT, AUTH,
+and EVAL of its compare-and-delete script)
+over real RESP sockets, so SHARED_CACHE=redis://... runs locally and in tests without
+a Redis install. Keys expire like in Redis; past max_bytes the least recently used
+keys are evicted (maxmemory allkeys-lru).
+
+    server = FakeRedisServer(port=0).start()
+    store = RedisStore(port=server.port)
+
+    python -m src.core.fake_redis --port 6379 --max-bytes 67108864
+"""
+import argparse
+import logging
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server.fake
+        while True:
+            try:
+                args = _read_command(self.rfile)
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            self.wfile.write(server.execute(args))
+
+
+def _read_command(reader):
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.split()  # inline command (redis-cli / telnet)
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(reader.readline()[1:])
+        data = reader.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError('client closed the connection')
+        args.append(data[:-2])
+    return args
+
+
+def _bulk(value) -> bytes:
+    return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class FakeRedisServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, max_bytes: int = DEFAULT_MAX_BYTES, clock=time.time):
+        self.host = host
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (value, expires_at or None), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self) -> 'FakeRedisServer':
+        """Serve in a daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-redis', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- Key space (callers hold self._lock) ---
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= self.clock():
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def _remove(self, key):
+        value, _ = self._data.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def _put(self, key, value, expires_at):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, expires_at)
+        self._bytes += len(key) + len(value)
+        while self._bytes > self.max_bytes and len(self._data) > 1:
+            self._remove(next(iter(self._data)))
+
+    def execute(self, args) -> bytes:
+        if not args:
+            return b'-ERR empty command\r\n'
+        try:
+            return self._execute(args[0].upper(), args)
+        except (IndexError, ValueError):
+            return b"-ERR wrong arguments for '%s' command\r\n" % args[0]
+
+    def _execute(self, name, args) -> bytes:
+        with self._lock:
+            if name == b'PING':
+                return b'+PONG\r\n'
+            if name in (b'SELECT', b'AUTH'):
+                return b'+OK\r\n'
+            if name == b'GET':
+                entry = self._live(args[1])
+                return _bulk(entry[0] if entry else None)
+            if name == b'SET':
+                return self._set(args[1], args[2], [a.upper() for a in args[3:]], args[3:])
+            if name == b'DEL':
+                removed = 0
+                for key in args[1:]:
+                    if self._live(key):
+                        self._remove(key)
+                        removed += 1
+                return b':%d\r\n' % removed
+            if name == b'EVAL':
+                return self._eval(args[1], args[3:3 + int(args[2])], args[3 + int(args[2]):])
+            if name == b'EXISTS':
+                return b':%d\r\n' % sum(1 for key in args[1:] if self._live(key))
+            if name == b'DBSIZE':
+                return b':%d\r\n' % len(self._data)
+            if name == b'FLUSHDB':
+                self._data.clear()
+                self._bytes = 0
+                return b'+OK\r\n'
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    def _set(self, key, value, options, raw) -> bytes:
+        expires_at = None
+        if b'EX' in options:
+            expires_at = self.clock() + float(raw[options.index(b'EX') + 1])
+        if b'PX' in options:
+            expires_at = self.clock() + float(raw[options.index(b'PX') + 1]) / 1000
+        exists = self._live(key) is not None
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return b'$-1\r\n'
+        self._put(key, value, expires_at)
+        return b'+OK\r\n'
+
+    def _eval(self, script, keys, argv) -> bytes:
+        """No Lua here: only the compare-and-delete script of shared_cache is understood."""
+        from .shared_cache import DELETE_IF_SCRIPT
+
+        if script != DELETE_IF_SCRIPT.encode():
+            return b'-ERR scripting is limited to the shared cache unlock script\r\n'
+        entry = self._live(keys[0])
+        if entry is None or entry[0] != argv[0]:
+            return b':0\r\n'
+        self._remove(keys[0])
+        return b':1\r\n'
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'keys': len(self._data), 'bytes': self._bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = FakeRedisServer(args.host, args.port, args.max_bytes)
+    logger.info(f"Fake Redis listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# src/core/file_lock.py
+"""
+Data files shared by the bot replicas of a host (or a shared volume): the watchlists and the
+price alerts. Writers read-modify-write under an exclusive lock on `<path>.lock` and replace
+the file atomically; readers compare file_signature() to reload only what another process
+changed.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per data file
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock of `path` across processes (and threads: each call opens its own descriptor)."""
+    if fcntl is None or not path:
+        yield
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def file_signature(path: str) -> Optional[tuple]:
+    """Changes whenever the file is replaced (new inode) or rewritten; None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def write_json_atomic(path: str, data, **kwargs):
+    """Write through a temporary file and os.replace(), so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
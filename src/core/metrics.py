@@ -0,0 +1,347 @@
+# src/core/metrics.py
+"""
+Lightweight in-process metrics (counters, gauges, histograms) exported in the
+Prometheus text format on a local `/metrics` endpoint.
+
+    with STAGE_SECONDS.labels(stage='fetch_ohlcv', exchange='binance', timeframe='4h').time():
+        ...
+
+    @timed(STAGE_SECONDS, stage='format', exchange='', timeframe='')
+    def render(...): ...
+
+Children returned by `.labels()` are cached, so hot paths can keep a reference and
+pay only for a lock and a bisect per observation (see benchmarks/metrics_overhead.py).
+"""
+import functools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a cached render (~µs) up to a slow exchange call
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple([str(labels[n]) for n in self.labelnames])
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def collect(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            yield from child.samples(self.name, self.labelnames, key)
+
+
+class _CounterChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self, name, labelnames, key):
+        yield f'{name}{_format_labels(labelnames, key)} {_format_value(self._value)}'
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_function')
+
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from `function` at scrape time."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function else self._value
+
+    def samples(self, name, labelnames, key):
+        try:
+            value = self.value
+        except Exception as e:
+            logger.error(f"Error reading gauge {name}: {e}")
+            return
+        if value is not None:
+            yield f'{name}{_format_labels(labelnames, key)} {_format_value(value)}'
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default().set_function(function)
+
+
+class _Timer:
+    """Context manager and decorator observing the elapsed time into a histogram child."""
+    __slots__ = ('_child', '_started')
+
+    def __init__(self, child):
+        self._child = child
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, func):
+        child = self._child
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+
+
+class _HistogramChild:
+    __slots__ = ('_buckets', '_counts', '_sum', '_count', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def samples(self, name, labelnames, key):
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative = 0
+        for bound, bucket_count in zip(self._buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            yield f'{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}'
+        yield f'{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}'
+        yield f'{name}_count{_format_labels(labelnames, key)} {count}'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with another type/labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (),
+              buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def timed(metric: Histogram, **labels) -> _Timer:
+    """`with timed(h, stage=...):` or `@timed(h, stage=...)`."""
+    return metric.labels(**labels).time() if metric.labelnames else metric.time()
+
+
+# --- Metrics of the bot ---
+STAGE_SECONDS = histogram('trading_bot_stage_seconds', 'Latency of each stage of an analysis request.',
+                          ('stage', 'exchange', 'timeframe'))
+CACHE_REQUESTS = counter('trading_bot_cache_requests_total', 'Cache lookups by cache and result.',
+                         ('cache', 'result'))
+EXCHANGE_ERRORS = counter('trading_bot_exchange_errors_total', 'Failed exchange calls.',
+                          ('exchange', 'operation'))
+SEND_FAILURES = counter('trading_bot_send_failures_total', 'Failed Telegram Bot API calls.', ('method',))
+CANDLE_FEED_LATENCY = histogram('trading_bot_candle_feed_latency_seconds',
+                                'Seconds from a candle close to a feed consumer handling it.', ('consumer',),
+                                buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0))
+CANDLE_FEED_DROPPED = counter('trading_bot_candle_feed_dropped_total',
+                              'Candle events dropped because a consumer queue was full.', ('consumer',))
+ROUTER_DECISIONS = counter('trading_bot_router_decisions_total',
+                           'Requests the exchange router hedged or failed over, by target source.',
+                           ('source', 'decision'))
+RATE_LIMIT_WAIT = histogram('trading_bot_rate_limit_wait_seconds',
+                            'Seconds exchange requests waited for the rate limiter, by priority class.',
+                            ('exchange', 'priority'),
+                            buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+RATE_LIMIT_SLOWDOWNS = counter('trading_bot_rate_limit_slowdowns_total',
+                               'Times a rate limiter slowed down after a 429 or a used-weight header.',
+                               ('exchange', 'reason'))
+CIRCUIT_STATE = gauge('trading_bot_circuit_state',
+                      'Circuit breaker state per exchange (symbol="") and per symbol: 0 closed, 1 half open, 2 open.',
+                      ('exchange', 'symbol'))
+CIRCUIT_REJECTIONS = counter('trading_bot_circuit_rejections_total',
+                             'Exchange calls failed fast because a circuit breaker was open.', ('exchange',))
+COORDINATION_LEADER = gauge('trading_bot_coordination_leader',
+                            'Whether this replica holds the scheduled-jobs lease (1) or not (0).')
+COORDINATION_MEMBERS = gauge('trading_bot_coordination_members', 'Live bot replicas seen by this replica.')
+STARTUP_SECONDS = gauge('trading_bot_startup_seconds', 'Seconds from process start to each startup event.',
+                        ('event',))
+
+
+# --- HTTP endpoint ---
+def start_metrics_server(port: int, addr: str = '0.0.0.0', registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve `GET /metrics` on a daemon thread. Returns the server (server.shutdown() to stop)."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format, *args)
+
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Metrics endpoint on http://{addr}:{server.server_address[1]}/metrics")
+    return server
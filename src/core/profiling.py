@@ -0,0 +1,173 @@
+# src/core/profiling.py
+"""
+Opt-in sampling profiler for analysis and job runs.
+
+A fraction (PROFILE_SAMPLE_RATE, 0 = off) of the calls to functions decorated with
+@profiled(name) run under cProfile; each profile is written to PROFILE_DIR, keeping the
+newest PROFILE_MAX_FILES. report() aggregates the saved profiles into a top-N table.
+When the rate is 0 the decorator costs one attribute check per call.
+
+    python -m src.core.profiling --top 25 --name run_scan
+"""
+import argparse
+import asyncio
+import cProfile
+import functools
+import glob
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', '.cache/profiles')
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))
+
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+class Profiler:
+    def __init__(self, sample_rate: float = PROFILE_SAMPLE_RATE, directory: str = PROFILE_DIR,
+                 max_files: int = PROFILE_MAX_FILES):
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.directory = directory
+        self.max_files = max_files
+        # cProfile hooks are per thread and do not nest: one active profile per thread
+        self._active = threading.local()
+        self._write_lock = threading.Lock()
+
+    def set_sample_rate(self, rate: float):
+        self.sample_rate = min(max(float(rate), 0.0), 1.0)
+        logger.info(f"Profiling sample rate set to {self.sample_rate}")
+
+    def _start(self) -> Optional[cProfile.Profile]:
+        if random.random() >= self.sample_rate or getattr(self._active, 'on', False):
+            return None
+        self._active.on = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def _finish(self, name: str, profile: cProfile.Profile, started: float):
+        profile.disable()
+        self._active.on = False
+        self.save(name, profile, time.perf_counter() - started)
+
+    def call(self, name: str, func, *args, **kwargs):
+        profile = self._start()
+        if profile is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._finish(name, profile, started)
+
+    async def call_async(self, name: str, func, *args, **kwargs):
+        """Coroutine variant. The profile also contains the other tasks that ran during the awaits."""
+        profile = self._start()
+        if profile is None:
+            return await func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._finish(name, profile, started)
+
+    # --- Files ---
+    def save(self, name: str, profile: cProfile.Profile, elapsed: float):
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms-{_SAFE_NAME.sub('_', name)}-{os.getpid()}.prof"
+        try:
+            with self._write_lock:
+                os.makedirs(self.directory, exist_ok=True)
+                profile.dump_stats(os.path.join(self.directory, filename))
+                self._rotate()
+            logger.info(f"Saved profile of {name} ({elapsed:.2f}s) to {filename}")
+        except OSError as e:
+            logger.error(f"Error saving profile of {name}: {e}")
+
+    def _rotate(self):
+        files = self.files()
+        for path in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def files(self, name: Optional[str] = None) -> List[str]:
+        """Saved profiles, oldest first, optionally only those of `name`."""
+        pattern = f"*-{_SAFE_NAME.sub('_', name)}-*.prof" if name else '*.prof'
+        return sorted(glob.glob(os.path.join(self.directory, pattern)), key=os.path.basename)
+
+    # --- Reports ---
+    def top_functions(self, top_n: int = 20, name: Optional[str] = None, sort: str = 'tottime') -> List[dict]:
+        files = self.files(name)
+        if not files:
+            return []
+        stats = pstats.Stats(*files)
+        rows = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            # Built-ins are recorded as ('~', 0, '<built-in method ...>')
+            function = f"{os.path.basename(filename)}:{line}({func})" if filename != '~' else func
+            rows.append({'function': function, 'calls': calls,
+                         'tottime': tottime, 'cumtime': cumtime})
+        rows.sort(key=lambda r: r[sort], reverse=True)
+        return rows[:top_n]
+
+    def report(self, top_n: int = 20, name: Optional[str] = None, sort: str = 'tottime') -> str:
+        """Aggregated top-N hot functions over the saved profiles, as plain text."""
+        rows = self.top_functions(top_n, name, sort)
+        if not rows:
+            return "No profiles recorded."
+        header = f"{len(self.files(name))} profiles{f' of {name}' if name else ''}, sorted by {sort}"
+        lines = [header, f"{'tottime':>9} {'cumtime':>9} {'calls':>9}  function"]
+        for r in rows:
+            lines.append(f"{r['tottime']:>9.3f} {r['cumtime']:>9.3f} {r['calls']:>9}  {r['function']}")
+        return '\n'.join(lines)
+
+
+PROFILER = Profiler()
+
+
+def profiled(name: str, profiler: Profiler = None):
+    """Sample calls of the decorated function (sync or async) with cProfile."""
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                p = profiler or PROFILER
+                if not p.sample_rate:
+                    return await func(*args, **kwargs)
+                return await p.call_async(name, func, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            p = profiler or PROFILER
+            if not p.sample_rate:
+                return func(*args, **kwargs)
+            return p.call(name, func, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate the saved profiles into a top-N report.')
+    parser.add_argument('--dir', default=PROFILE_DIR)
+    parser.add_argument('--name', help='only profiles of this function (e.g. run_scan)')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--sort', choices=['tottime', 'cumtime', 'calls'], default='tottime')
+    args = parser.parse_args()
+    print(Profiler(directory=args.dir).report(args.top, args.name, args.sort))
+
+
+if __name__ == '__main__':
+    main()
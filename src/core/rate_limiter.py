@@ -0,0 +1,313 @@
+# src/core/rate_limiter.py
+"""
+One token-bucket rate limiter per exchange, shared by every caller (data_fetcher, the
+exchange router, the candle feed, backfills) through throttled(), and by the asyncio
+runtime through throttled_async().
+
+- Budget: the request weight per minute of the exchange (EXCHANGE_WEIGHT_LIMITS, e.g.
+  Binance 6000), or the pacing of its ccxt `rateLimit`; each call costs the weight of its
+  endpoint (request_weight). Only RATE_LIMIT_HEADROOM of the budget is used.
+- Priority classes: the caller's class comes from the context (`with priority('scanner'):`
+  or `@priority('scanner')`); interactive requests need nothing, it is the default.
+  Waiting requests are served by weighted fair queueing: a class with weight 8 gets 8
+  times the budget of a class with weight 1 when both are queued, and none starves.
+- Adaptive slowdown: a 429 / DDoSProtection error halves the rate and pauses the bucket
+  (Retry-After when the exchange sends it); Binance's used-weight header pauses it until
+  the next minute once the budget is nearly used. The rate recovers with each success.
+
+Queue wait per class is exported as trading_bot_rate_limit_wait_seconds.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from .metrics import RATE_LIMIT_SLOWDOWNS, RATE_LIMIT_WAIT
+
+logger = logging.getLogger(__name__)
+
+# Priority class -> share of the budget when classes compete (weighted fair queueing)
+PRIORITIES = {'interactive': 8, 'watchlist': 4, 'scanner': 2, 'backfill': 1}
+DEFAULT_PRIORITY = 'interactive'
+# Trọng số request tối đa mỗi phút theo sàn: "binance:6000,okx:1200"
+EXCHANGE_WEIGHT_LIMITS = os.getenv('EXCHANGE_WEIGHT_LIMITS', 'binance:6000')
+# Chỉ dùng một phần ngân sách của sàn, chừa chỗ cho sai lệch đồng hồ và các client khác
+RATE_LIMIT_HEADROOM = float(os.getenv('RATE_LIMIT_HEADROOM', '0.8'))
+# Bucket size in seconds of budget: how much a burst may take at once (per-minute weight budgets;
+# a budget derived from the ccxt rateLimit paces requests one at a time, like ccxt does)
+BURST_SECONDS = 10
+# Slowdown after a rate-limit error: rate factor floor, pause without Retry-After, recovery per success
+MIN_RATE_FACTOR = 0.1
+ERROR_PAUSE_SECONDS = 5.0
+RECOVERY_PER_SUCCESS = 0.02
+
+# Endpoint weights (Binance spot API); other exchanges count 1 per call
+ENDPOINT_WEIGHTS = {
+    'binance': {'fetch_ohlcv': 2, 'fetch_ticker': 2, 'fetch_tickers': 80, 'load_markets': 20},
+}
+
+_priority = contextvars.ContextVar('exchange_priority', default=DEFAULT_PRIORITY)
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+@contextmanager
+def priority(name: str):
+    """Exchange calls made inside (this thread / task) use the priority class `name`; also a decorator."""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority {name!r}, expected one of {list(PRIORITIES)}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def request_weight(exchange_id: str, operation: str, symbols=None, **request) -> int:
+    weights = ENDPOINT_WEIGHTS.get(exchange_id)
+    if weights is None:
+        return 1
+    if exchange_id == 'binance' and operation == 'fetch_tickers' and symbols:
+        # /ticker/24hr with a symbol list: 2 up to 20 symbols, 40 up to 100, 80 above
+        return 2 if len(symbols) <= 20 else 40 if len(symbols) <= 100 else 80
+    return weights.get(operation, 1)
+
+
+def _parse_limits(text: str) -> dict:
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        name, _, value = item.partition(':')
+        try:
+            limits[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Ignoring malformed EXCHANGE_WEIGHT_LIMITS entry {item!r}")
+    return limits
+
+
+class RateLimiter:
+    """Token bucket of one exchange with weighted fair queueing between priority classes."""
+
+    def __init__(self, name: str, weight_per_minute: float, headroom: float = RATE_LIMIT_HEADROOM,
+                 burst_seconds: float = BURST_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.weight_per_minute = weight_per_minute
+        self.rate = weight_per_minute * headroom / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.factor = 1.0
+        self.paused_until = 0.0
+        self._updated = clock()
+        self._virtual_time = 0.0
+        self._last_finish = dict.fromkeys(PRIORITIES, 0.0)
+        self._waiting = []
+        self._async_waiters = {}  # queue entry -> (loop, future) of a coroutine in acquire_async
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._wait_metrics = {p: RATE_LIMIT_WAIT.labels(exchange=name, priority=p) for p in PRIORITIES}
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate * self.factor)
+        self._updated = now
+
+    def _enqueue(self, weight: float, priority_class: str) -> tuple:
+        # Finish tag of the request in its class's queue: the lowest tag is served first
+        finish = max(self._virtual_time, self._last_finish[priority_class]) + weight / PRIORITIES[priority_class]
+        self._last_finish[priority_class] = finish
+        entry = (finish, next(self._seq))
+        heapq.heappush(self._waiting, entry)
+        return entry
+
+    def _grant(self, entry: tuple, weight: float) -> Optional[float]:
+        """Take the tokens if `entry` is served now (None); otherwise the seconds to wait (inf: until woken)."""
+        now = self.clock()
+        self._refill(now)
+        if self._waiting[0] is not entry:
+            return float('inf')
+        if now >= self.paused_until and self.tokens >= weight:
+            heapq.heappop(self._waiting)
+            self.tokens -= weight
+            self._virtual_time = entry[0]
+            return None
+        return max(self.paused_until - now, (weight - self.tokens) / (self.rate * self.factor), 0.001)
+
+    def _dequeue(self, entry: tuple):
+        if entry in self._waiting:
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+
+    def _wake(self):
+        """The head of the queue may have changed: wake the blocked threads and the coroutine at the head."""
+        self._cond.notify_all()
+        if self._waiting and self._waiting[0] in self._async_waiters:
+            loop, future = self._async_waiters.pop(self._waiting[0])
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def acquire(self, weight: float = 1, priority_class: Optional[str] = None) -> float:
+        """Block until `weight` tokens are granted to this request; returns the seconds waited."""
+        priority_class = priority_class or current_priority()
+        weight = min(weight, self.capacity)
+        started = self.clock()
+        with self._cond:
+            entry = self._enqueue(weight, priority_class)
+            try:
+                while True:
+                    timeout = self._grant(entry, weight)
+                    if timeout is None:
+                        break
+                    self._cond.wait(None if timeout == float('inf') else timeout)
+            except BaseException:
+                self._dequeue(entry)
+                raise
+            finally:
+                self._wake()
+        waited = self.clock() - started
+        self._wait_metrics[priority_class].observe(waited)
+        return waited
+
+    async def acquire_async(self, weight: float = 1, priority_class: Optional[str] = None) -> float:
+        """
+        acquire() for the event loop: same queue and budget, but the coroutine awaits a future
+        that _wake() resolves when it reaches the head of the queue, instead of blocking a thread.
+        """
+        priority_class = priority_class or current_priority()
+        weight = min(weight, self.capacity)
+        started = self.clock()
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            entry = self._enqueue(weight, priority_class)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._grant(entry, weight)
+                    if delay is None:
+                        break
+                    future = loop.create_future()
+                    self._async_waiters[entry] = (loop, future)
+                # At the head: wait for the tokens (or an earlier wake-up); behind it: until woken
+                await asyncio.wait([future], timeout=None if delay == float('inf') else delay)
+                with self._cond:
+                    self._async_waiters.pop(entry, None)
+        except BaseException:
+            with self._cond:
+                self._async_waiters.pop(entry, None)
+                self._dequeue(entry)
+            raise
+        finally:
+            with self._cond:
+                self._wake()
+        waited = self.clock() - started
+        self._wait_metrics[priority_class].observe(waited)
+        return waited
+
+    def slow_down(self, reason: str, pause: float):
+        """Halve the rate and stop granting tokens for `pause` seconds."""
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            self.factor = max(MIN_RATE_FACTOR, self.factor / 2)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, now + pause)
+        RATE_LIMIT_SLOWDOWNS.labels(exchange=self.name, reason=reason).inc()
+        logger.warning(f"Rate limiter {self.name}: {reason}, paused {pause:.1f}s at {self.factor:.2f}x rate")
+
+    def on_success(self, headers=None):
+        with self._cond:
+            if self.factor < 1.0:
+                self._refill(self.clock())
+                self.factor = min(1.0, self.factor + RECOVERY_PER_SUCCESS)
+        used = _header(headers, 'x-mbx-used-weight-1m')
+        if (used is not None and float(used) >= self.weight_per_minute * RATE_LIMIT_HEADROOM
+                and self.clock() >= self.paused_until):
+            # The exchange counts weight per calendar minute: wait for the next one
+            self.slow_down('used_weight_header', 60 - time.time() % 60)
+
+    def on_error(self, error: Exception, headers=None):
+        import ccxt
+
+        if isinstance(error, ccxt.DDoSProtection):  # RateLimitExceeded (429) and 418 bans
+            retry_after = _header(headers, 'retry-after')
+            self.slow_down('rate_limit_error', float(retry_after) if retry_after else ERROR_PAUSE_SECONDS)
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(self.clock())
+            return {'tokens': round(self.tokens, 1), 'rate': round(self.rate * self.factor, 2),
+                    'factor': round(self.factor, 2), 'waiting': len(self._waiting),
+                    'paused': round(max(0.0, self.paused_until - self.clock()), 1)}
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _header(headers, name: str) -> Optional[str]:
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def get_limiter(exchange) -> Optional[RateLimiter]:
+    """The limiter of an exchange instance; None if it has neither a configured budget nor a ccxt rateLimit."""
+    exchange_id = getattr(exchange, 'id', None)
+    with _limiters_lock:
+        if exchange_id not in _limiters:
+            weight_per_minute = _parse_limits(EXCHANGE_WEIGHT_LIMITS).get(exchange_id)
+            rate_limit_ms = getattr(exchange, 'rateLimit', 0) or 0
+            if weight_per_minute:
+                _limiters[exchange_id] = RateLimiter(exchange_id, weight_per_minute)
+            elif rate_limit_ms > 0:
+                _limiters[exchange_id] = RateLimiter(exchange_id, 60000 / rate_limit_ms, burst_seconds=0)
+            else:
+                _limiters[exchange_id] = None
+        return _limiters[exchange_id]
+
+
+def throttled(exchange, operation: str, call: Callable, **request):
+    """Run call() once the exchange's limiter grants the weight of `operation` (request: limit, symbols...)."""
+    limiter = get_limiter(exchange)
+    if limiter is None:
+        return call()
+    limiter.acquire(request_weight(exchange.id, operation, **request))
+    try:
+        result = call()
+    except Exception as e:
+        limiter.on_error(e, getattr(exchange, 'last_response_headers', None))
+        raise
+    limiter.on_success(getattr(exchange, 'last_response_headers', None))
+    return result
+
+
+async def throttled_async(exchange, operation: str, call: Callable, **request):
+    """throttled() for a coroutine function: awaits the same limiter without blocking the loop."""
+    limiter = get_limiter(exchange)
+    if limiter is None:
+        return await call()
+    await limiter.acquire_async(request_weight(exchange.id, operation, **request))
+    try:
+        result = await call()
+    except Exception as e:
+        limiter.on_error(e, getattr(exchange, 'last_response_headers', None))
+        raise
+    limiter.on_success(getattr(exchange, 'last_response_headers', None))
+    return result
+
+
+def limiter_stats() -> dict:
+    with _limiters_lock:
+        limiters = [limiter for limiter in _limiters.values() if limiter is not None]
+    return {limiter.name: limiter.stats() for limiter in limiters}
@@ -0,0 +1,187 @@
+# src/core/scan_table.py
+"""
+Columnar table of the market scanner's per-symbol scores, kept after every pass so /top
+can rank the market without analyzing anything or calling the exchange.
+
+One row per symbol, one numpy array per column:
+
+    symbol          str
+    price           float64  close of the last analyzed candle
+    strength        float32  AdvancedSMC.calculate_signal_strength (0..10)
+    rsi             float32
+    trend           int8     1 bullish / -1 bearish / 0 neutral (AdvancedSMC.determine_trend)
+    bos_time        int64    unix seconds of the latest BOS, 0 if none
+    choch           int8     direction of the latest CHoCH: 1 bullish / -1 bearish / 0 none
+    choch_time      int64    unix seconds of the latest CHoCH, 0 if none
+    level_distance  float32  % from the price to the nearest key level (nan if none)
+    scanned_at      int64    unix seconds of the scan that wrote the row
+
+The table is saved to SCAN_TABLE (.npz, written atomically). Saving merges the rows other
+processes wrote in the meantime (newest row per symbol wins), so in shard mode every
+replica writes its part and reads the whole market. Readers reload the file when it changed.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .timeframes import timeframe_to_seconds
+
+logger = logging.getLogger(__name__)
+
+# File .npz chứa bảng điểm của scanner (dùng chung giữa các process); để trống để chỉ giữ trong RAM
+SCAN_TABLE = os.getenv('SCAN_TABLE', '.cache/scan_table.npz')
+# Bỏ các symbol không được quét lại trong khoảng này (giây), ví dụ đã rời top volume
+SCAN_TABLE_MAX_AGE = float(os.getenv('SCAN_TABLE_MAX_AGE', str(2 * 86400)))
+# CHoCH trong số nến gần nhất này được coi là "mới"
+FRESH_CHOCH_BARS = 3
+
+COLUMNS = {
+    'symbol': np.str_, 'price': np.float64, 'strength': np.float32, 'rsi': np.float32, 'trend': np.int8,
+    'bos_time': np.int64, 'choch': np.int8, 'choch_time': np.int64, 'level_distance': np.float32,
+    'scanned_at': np.int64,
+}
+TRENDS = {'bullish': 1, 'bearish': -1, 'neutral': 0}
+
+
+def _empty() -> Dict[str, np.ndarray]:
+    return {name: np.array([], dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def _columns(rows: List[dict]) -> Dict[str, np.ndarray]:
+    return {name: np.array([row[name] for row in rows], dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def _merge(*tables: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """One row per symbol: the one with the latest scanned_at."""
+    merged = {name: np.concatenate([t[name] for t in tables]) for name in COLUMNS}
+    # lexsort: last key is primary -> by symbol, newest first
+    order = np.lexsort((-merged['scanned_at'], merged['symbol']))
+    symbols = merged['symbol'][order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = symbols[1:] != symbols[:-1]
+    return {name: column[order[first]] for name, column in merged.items()}
+
+
+class ScanTable:
+    def __init__(self, path: str = SCAN_TABLE, max_age: float = SCAN_TABLE_MAX_AGE, clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self.clock = clock
+        self.timeframe = '1d'
+        self._columns = _empty()
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self._columns['symbol'])
+
+    def _read(self) -> Optional[tuple]:
+        """(timeframe, columns) saved at self.path, or None if there is no readable table."""
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                return str(data['timeframe']), {name: data[name].astype(dtype) for name, dtype in COLUMNS.items()}
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read the scan table {self.path}: {e}")
+            return None
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def reload(self):
+        """Load the saved table if it changed since the last load or save (one stat call otherwise)."""
+        if not self.path:
+            return
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime:
+            return
+        saved = self._read()
+        with self._lock:
+            if saved is not None:
+                self.timeframe, self._columns = saved
+            self._mtime = mtime
+
+    def update(self, rows: Iterable[dict], timeframe: str = '1d'):
+        """Upsert the rows of a scan pass (see MarketScannerService.score_symbol) and save the table."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            tables = [self._columns, _columns(rows)]
+            if self.path and self._file_mtime() not in (None, self._mtime):
+                saved = self._read()
+                if saved is not None and saved[0] == timeframe:
+                    tables.append(saved[1])
+            if timeframe != self.timeframe:
+                tables = tables[1:]  # a scan of another timeframe replaces the table
+            columns = _merge(*tables)
+            fresh = columns['scanned_at'] >= self.clock() - self.max_age
+            self._columns = {name: column[fresh] for name, column in columns.items()}
+            self.timeframe = timeframe
+            if self.path:
+                self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, timeframe=np.array(self.timeframe), **self._columns)
+            os.replace(tmp, self.path)
+            self._mtime = self._file_mtime()
+        except OSError as e:
+            logger.error(f"Could not save the scan table {self.path}: {e}")
+
+    def _rows(self, columns: Dict[str, np.ndarray], index: np.ndarray) -> List[dict]:
+        return [{name: column[i].item() for name, column in columns.items()} for i in index]
+
+    def top(self, n: int = 10) -> dict:
+        """
+        Ranked views of the table: {'bullish', 'bearish', 'choch': [row, ...], 'timeframe',
+        'symbols', 'scanned_at'} - strongest bullish / bearish trends by signal strength, and
+        the CHoCHs of the last FRESH_CHOCH_BARS candles, newest first.
+        """
+        self.reload()
+        with self._lock:
+            columns, timeframe = self._columns, self.timeframe
+        strength, trend = columns['strength'], columns['trend']
+
+        def strongest(direction):
+            index = np.flatnonzero(trend == direction)
+            return index[np.argsort(-strength[index], kind='stable')][:n]
+
+        fresh_since = self.clock() - FRESH_CHOCH_BARS * timeframe_to_seconds(timeframe)
+        choch_index = np.flatnonzero((columns['choch'] != 0) & (columns['choch_time'] >= fresh_since))
+        choch_index = choch_index[np.argsort(-columns['choch_time'][choch_index], kind='stable')][:n]
+        return {
+            'timeframe': timeframe,
+            'symbols': len(columns['symbol']),
+            'scanned_at': int(columns['scanned_at'].max()) if len(columns['symbol']) else None,
+            'bullish': self._rows(columns, strongest(1)),
+            'bearish': self._rows(columns, strongest(-1)),
+            'choch': self._rows(columns, choch_index),
+        }
+
+
+_scan_table = None
+_scan_table_lock = threading.Lock()
+
+
+def get_scan_table() -> ScanTable:
+    """The process-wide table at SCAN_TABLE (loaded on first use)."""
+    global _scan_table
+    with _scan_table_lock:
+        if _scan_table is None:
+            _scan_table = ScanTable(SCAN_TABLE)
+        return _scan_table
@@ -0,0 +1,400 @@
+# src/core/shared_cache.py
+"""
+Analysis cache shared by every bot process / replica (SHARED_CACHE), so BTC/USDT 1h is
+computed once per candle instead of once per process.
+
+Entries are the results of AdvancedSMC.get_trading_signals, pickled (typed records,
+src/core/smc_results.py) and zlib-compressed, keyed by (exchange, symbol, timeframe,
+open time of the current candle). They expire when the candle closes, or after
+SHARED_CACHE_TTL seconds if that is sooner. Backends:
+
+    sqlite:///.cache/analysis.db   one file for the processes of a host (WAL, size-capped)
+    redis://host:6379/0            any Redis-protocol server (python -m src.core.fake_redis locally)
+
+Stampede protection: on a miss one caller takes a short lock (SET NX) and computes; the
+others (in this process or another) poll for its result instead of computing it again.
+A cache that is down is skipped for a while: requests are computed locally as before.
+The values are pickles, so the cache must only be reachable by the bot's own processes.
+"""
+import asyncio
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+from .metrics import CACHE_REQUESTS
+from .timeframes import candle_open, next_candle_close
+
+logger = logging.getLogger(__name__)
+
+# Cache dùng chung: "sqlite:///.cache/analysis.db" hoặc "redis://host:6379/0"; để trống để tắt
+SHARED_CACHE = os.getenv('SHARED_CACHE', '')
+# Thời gian sống tối đa của một kết quả (giây); kết quả luôn hết hạn khi nến đóng
+SHARED_CACHE_TTL = float(os.getenv('SHARED_CACHE_TTL', '300'))
+# Dung lượng tối đa của cache SQLite (byte); kết quả lớn hơn SHARED_CACHE_MAX_VALUE_BYTES không được lưu
+SHARED_CACHE_MAX_BYTES = int(os.getenv('SHARED_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+SHARED_CACHE_MAX_VALUE_BYTES = int(os.getenv('SHARED_CACHE_MAX_VALUE_BYTES', str(1024 * 1024)))
+# Thời gian giữ khóa tính toán; các tiến trình khác chờ tối đa bằng khoảng này
+SHARED_CACHE_LOCK_SECONDS = float(os.getenv('SHARED_CACHE_LOCK_SECONDS', '30'))
+# Skip a failing cache for this long before trying it again
+CACHE_DOWN_SECONDS = 30.0
+# Size-limit check of the SQLite store once every N writes
+EVICT_EVERY = 20
+KEY_PREFIX = 'smc:v1'
+# Compare-and-delete (GET + DEL in one step): a lock is only released by the caller that holds it
+DELETE_IF_SCRIPT = ("if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) "
+                    "else return 0 end")
+
+_HITS = CACHE_REQUESTS.labels(cache='shared', result='hit')
+_WAIT_HITS = CACHE_REQUESTS.labels(cache='shared', result='wait_hit')
+_MISSES = CACHE_REQUESTS.labels(cache='shared', result='miss')
+_ERRORS = CACHE_REQUESTS.labels(cache='shared', result='error')
+
+
+def dumps(value) -> bytes:
+    return zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL), 1)
+
+
+def loads(blob: bytes):
+    return pickle.loads(zlib.decompress(blob))
+
+
+class SQLiteStore:
+    """Key -> bytes with expiry in one SQLite file (one connection per thread, WAL for concurrent processes)."""
+
+    def __init__(self, path: str, max_bytes: int = SHARED_CACHE_MAX_BYTES, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                         'expires_at REAL NOT NULL, stored_at REAL NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._db().execute('SELECT value FROM entries WHERE key = ? AND expires_at > ?',
+                                 (key, self.clock())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = self.clock()
+        self._db().execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', (key, value, now + ttl, now))
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if the key is absent or expired (SET NX); True if this call set it."""
+        now = self.clock()
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM entries WHERE key = ? AND expires_at <= ?', (key, now))
+            added = db.execute('INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)',
+                               (key, value, now + ttl, now)).rowcount == 1
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return added
+
+    def delete(self, key: str):
+        self._db().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        """Delete the key only if it still holds `value`; True if it did."""
+        return self._db().execute('DELETE FROM entries WHERE key = ? AND value = ?', (key, value)).rowcount == 1
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones while the store is above max_bytes."""
+        db = self._db()
+        db.execute('DELETE FROM entries WHERE expires_at <= ?', (self.clock(),))
+        total, count = db.execute('SELECT COALESCE(SUM(LENGTH(value)), 0), COUNT(*) FROM entries').fetchone()
+        while total > self.max_bytes and count:
+            batch = max(1, count // 10)
+            db.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at LIMIT ?)', (batch,))
+            total, count = db.execute('SELECT COALESCE(SUM(LENGTH(value)), 0), COUNT(*) FROM entries').fetchone()
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisError(Exception):
+    """Error reply of a Redis-protocol server."""
+
+
+class RedisStore:
+    """The same store over the Redis protocol (RESP2, no client library needed), one socket per thread."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 2.0):
+        self.host, self.port, self.db, self.password, self.timeout = host, port, db, password, timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisStore':
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or '127.0.0.1', parsed.port or 6379, db, parsed.password)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = self._local.conn = (sock, sock.makefile('rb'))
+            if self.password:
+                self._call(conn, 'AUTH', self.password)
+            if self.db:
+                self._call(conn, 'SELECT', self.db)
+        return conn
+
+    def command(self, *args):
+        try:
+            return self._call(self._connection(), *args)
+        except (OSError, ConnectionError):
+            self.close()
+            raise
+
+    def _call(self, conn, *args):
+        sock, reader = conn
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        sock.sendall(b''.join(parts))
+        return _read_reply(reader)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.command('GET', key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.command('SET', key, value, 'PX', max(1, int(ttl * 1000)))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return self.command('SET', key, value, 'PX', max(1, int(ttl * 1000)), 'NX') is not None
+
+    def delete(self, key: str):
+        self.command('DEL', key)
+
+    def delete_if(self, key: str, value: bytes) -> bool:
+        return self.command('EVAL', DELETE_IF_SCRIPT, 1, key, value) == 1
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+
+def _read_reply(reader):
+    line = reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('Connection closed by the cache server')
+    kind, payload = line[:1], line[1:-2]
+    if kind == b'+':
+        return payload.decode()
+    if kind == b'-':
+        raise RedisError(payload.decode())
+    if kind == b':':
+        return int(payload)
+    if kind == b'$':
+        length = int(payload)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError('Connection closed by the cache server')
+        return data[:-2]
+    if kind == b'*':
+        length = int(payload)
+        return None if length < 0 else [_read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply {line!r}")
+
+
+def store_from_url(url: str):
+    if url.startswith('sqlite:///'):
+        # sqlite:///relative/path.db, sqlite:////absolute/path.db
+        return SQLiteStore(url[len('sqlite:///'):])
+    if url.startswith('redis://'):
+        return RedisStore.from_url(url)
+    raise ValueError(f"Unsupported SHARED_CACHE {url!r} (expected sqlite:///path or redis://host:port/db)")
+
+
+class SharedAnalysisCache:
+    """get_or_compute() in front of an analysis: shared result per candle, computed by one caller."""
+
+    def __init__(self, store, ttl: float = SHARED_CACHE_TTL, lock_seconds: float = SHARED_CACHE_LOCK_SECONDS,
+                 max_value_bytes: int = SHARED_CACHE_MAX_VALUE_BYTES, clock=time.time):
+        self.store = store
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.max_value_bytes = max_value_bytes
+        self.clock = clock
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self.counts = {'hit': 0, 'wait_hit': 0, 'miss': 0, 'error': 0}
+
+    def key(self, exchange: str, symbol: str, timeframe: str):
+        """(cache key, seconds to live) of the analysis of the current candle."""
+        now = self.clock()
+        opened = int(candle_open(timeframe, now))
+        ttl = min(self.ttl, next_candle_close(timeframe, now) - now)
+        return f"{KEY_PREFIX}:{exchange}:{symbol}:{timeframe}:{opened}", max(ttl, 1.0)
+
+    def _count(self, result: str):
+        with self._lock:
+            self.counts[result] += 1
+        {'hit': _HITS, 'wait_hit': _WAIT_HITS, 'miss': _MISSES, 'error': _ERRORS}[result].inc()
+
+    def _call(self, method: str, *args, default=None):
+        """A store operation; on failure the cache is skipped for CACHE_DOWN_SECONDS."""
+        if self.clock() < self._down_until:
+            return default
+        try:
+            return getattr(self.store, method)(*args)
+        except Exception as e:
+            self._down_until = self.clock() + CACHE_DOWN_SECONDS
+            self._count('error')
+            logger.warning(f"Shared cache unavailable ({method}: {e}), computing locally for {CACHE_DOWN_SECONDS:.0f}s")
+            return default
+
+    def get(self, key: str):
+        blob = self._call('get', key)
+        if blob is None:
+            return None
+        try:
+            return loads(blob)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable shared cache entry {key}: {e}")
+            self._call('delete', key)
+            return None
+
+    def put(self, key: str, value, ttl: float):
+        blob = dumps(value)
+        if len(blob) > self.max_value_bytes:
+            logger.warning(f"Not caching {key}: {len(blob)} bytes > {self.max_value_bytes}")
+            return
+        self._call('set', key, blob, ttl)
+
+    def _try_lock(self, key: str) -> Optional[bytes]:
+        """The token of the compute lock if this caller took it, else None."""
+        token = uuid.uuid4().hex.encode()
+        # A cache that is down grants the lock: every caller computes, as without the cache
+        return token if self._call('add', f"{key}:lock", token, self.lock_seconds, default=True) else None
+
+    def _unlock(self, key: str, token: bytes):
+        # Not a plain delete: past lock_seconds the lock may already belong to another caller
+        self._call('delete_if', f"{key}:lock", token)
+
+    def _store(self, key: str, ttl: float, value, token: Optional[bytes]):
+        """Cache the value, then release the lock if this caller holds it (not on the deadline path)."""
+        try:
+            if value:
+                self.put(key, value, ttl)
+        finally:
+            if token is not None:
+                self._unlock(key, token)
+
+    def get_or_compute(self, exchange: str, symbol: str, timeframe: str, compute: Callable):
+        """The cached analysis, or compute() (None / empty results are not cached)."""
+        key, ttl = self.key(exchange, symbol, timeframe)
+        deadline, delay, waited = self.clock() + self.lock_seconds, 0.02, False
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self._count('wait_hit' if waited else 'hit')
+                return value
+            token = self._try_lock(key)
+            if token is not None or self.clock() >= deadline:
+                self._count('miss')
+                value = None
+                try:
+                    value = compute()
+                finally:
+                    self._store(key, ttl, value, token)
+                return value
+            waited = True
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
+
+    async def get_or_compute_async(self, exchange: str, symbol: str, timeframe: str,
+                                   compute: Callable[[], Awaitable]):
+        """get_or_compute() for the asyncio runtime: store calls run in threads, compute is awaited."""
+        key, ttl = self.key(exchange, symbol, timeframe)
+        deadline, delay, waited = self.clock() + self.lock_seconds, 0.02, False
+        while True:
+            value = await asyncio.to_thread(self.get, key)
+            if value is not None:
+                self._count('wait_hit' if waited else 'hit')
+                return value
+            token = await asyncio.to_thread(self._try_lock, key)
+            if token is not None or self.clock() >= deadline:
+                self._count('miss')
+                value = None
+                try:
+                    value = await compute()
+                finally:
+                    await asyncio.to_thread(self._store, key, ttl, value, token)
+                return value
+            waited = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        lookups = counts['hit'] + counts['wait_hit'] + counts['miss']
+        counts['hit_rate'] = round((counts['hit'] + counts['wait_hit']) / lookups, 3) if lookups else 0.0
+        return counts
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedAnalysisCache]:
+    """The cache configured by SHARED_CACHE, or None when it is not set (or invalid)."""
+    global _shared_cache
+    if not SHARED_CACHE:
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            try:
+                _shared_cache = SharedAnalysisCache(store_from_url(SHARED_CACHE))
+            except ValueError as e:
+                logger.error(str(e))
+                return None
+        return _shared_cache
+
+
+def cached_analysis(exchange: str, symbol: str, timeframe: str, compute: Callable):
+    """compute() through the shared cache when one is configured."""
+    cache = get_shared_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(exchange, symbol, timeframe, compute)
@@ -0,0 +1,155 @@
+# src/core/smc_arrays.py
+"""
+SMC features on plain numpy arrays (no DataFrame, no per-row pandas access).
+Flags are int8 and price levels keep the float dtype of the candles (float32 archives
+stay float32), so a working set costs ~1/3 of the former int64 / float64 columns.
+
+These are the kernels behind the smc_* stages of analysis.py and the same results
+bit for bit; the parameter sweep (src/core/sweep.py) calls them directly on candles
+kept in shared memory. The BOS/CHoCH state machine and the order-block search stay
+sequential but walk Python lists, which is ~50x cheaper than `.iloc` per row.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_SWING_LOOKBACK = 20
+DEFAULT_OB_LOOKBACK = 10
+DEFAULT_SWEEP_WINDOW = 5
+# Categories of the enter_tag column (codes 0, 1, 2)
+ENTER_TAGS = ('', 'long_smc_simple', 'short_smc_simple')
+
+
+def _level_dtype(prices: np.ndarray):
+    return prices.dtype if prices.dtype.kind == 'f' else np.float64
+
+
+def swing_points(high: np.ndarray, low: np.ndarray, swing_lookback: int = DEFAULT_SWING_LOOKBACK):
+    """Candles that are the max high / min low of the centered 2*lookback+1 window."""
+    n, window = len(high), swing_lookback * 2 + 1
+    swing_high = np.zeros(n, dtype=bool)
+    swing_low = np.zeros(n, dtype=bool)
+    if n >= window:
+        inner = slice(swing_lookback, n - swing_lookback)
+        swing_high[inner] = sliding_window_view(high, window).max(axis=1) == high[inner]
+        swing_low[inner] = sliding_window_view(low, window).min(axis=1) == low[inner]
+    return swing_high, swing_low
+
+
+def bos_choch_signal(high: np.ndarray, low: np.ndarray, swing_high: np.ndarray, swing_low: np.ndarray) -> np.ndarray:
+    """1 / -1 = bullish / bearish BOS, 2 / -2 = bullish / bearish CHoCH, 0 = none."""
+    highs, lows = high.tolist(), low.tolist()
+    is_swing_high, is_swing_low = swing_high.tolist(), swing_low.tolist()
+    last_swing_high = last_swing_low = None
+    trend = 0
+    signals = [0] * len(highs)
+    for i in range(len(highs)):
+        current_high, current_low = highs[i], lows[i]
+        if is_swing_high[i]:
+            last_swing_high = current_high
+        if is_swing_low[i]:
+            last_swing_low = current_low
+        if trend == 1 and last_swing_low is not None and current_low < last_swing_low:
+            signals[i] = -2; trend = -1; last_swing_high = None
+        elif trend == -1 and last_swing_high is not None and current_high > last_swing_high:
+            signals[i] = 2; trend = 1; last_swing_low = None
+        elif last_swing_high is not None and current_high > last_swing_high:
+            signals[i] = 1; trend = 1; last_swing_low = None
+        elif last_swing_low is not None and current_low < last_swing_low:
+            signals[i] = -1; trend = -1; last_swing_high = None
+    return np.array(signals, dtype=np.int8)
+
+
+def order_blocks(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 signal: np.ndarray, ob_lookback: int = DEFAULT_OB_LOOKBACK):
+    """Last opposite candle within ob_lookback bars before each BOS/CHoCH: (OB, Top_OB, Bottom_OB)."""
+    n = len(close)
+    ob = np.zeros(n, dtype=np.int8)
+    top = np.full(n, np.nan, dtype=_level_dtype(high))
+    bottom = np.full(n, np.nan, dtype=_level_dtype(low))
+    bearish = (close < open_).tolist()
+    bullish = (close > open_).tolist()
+    for i in np.flatnonzero(signal[1:]) + 1:
+        direction = 1 if signal[i] > 0 else -1
+        candidates = bearish if direction == 1 else bullish
+        for j in range(i - 1, max(0, i - ob_lookback), -1):
+            if candidates[j]:
+                ob[j], top[j], bottom[j] = direction, high[j], low[j]
+                break
+    return ob, top, bottom
+
+
+def fair_value_gaps(high: np.ndarray, low: np.ndarray):
+    """Three-candle imbalances, marked on the middle candle: (FVG, Top_FVG, Bottom_FVG)."""
+    n = len(high)
+    fvg = np.zeros(n, dtype=np.int8)
+    top = np.full(n, np.nan, dtype=_level_dtype(high))
+    bottom = np.full(n, np.nan, dtype=_level_dtype(low))
+    if n < 3:
+        return fvg, top, bottom
+    before_high, before_low, after_high, after_low = high[:-2], low[:-2], high[2:], low[2:]
+    bullish = before_low > after_high
+    bearish = ~bullish & (before_high < after_low)
+    middle = np.arange(1, n - 1)
+    fvg[middle[bullish]], top[middle[bullish]], bottom[middle[bullish]] = 1, before_low[bullish], after_high[bullish]
+    fvg[middle[bearish]], top[middle[bearish]], bottom[middle[bearish]] = -1, before_high[bearish], after_low[bearish]
+    return fvg, top, bottom
+
+
+def liquidity_sweeps(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                     sweep_window: int = DEFAULT_SWEEP_WINDOW) -> np.ndarray:
+    """-1 / 1 where a candle takes the previous sweep_window high / low and closes back inside."""
+    n = len(high)
+    swept = np.zeros(n, dtype=np.int8)
+    if n <= sweep_window:
+        return swept
+    recent_high = sliding_window_view(high[:-1], sweep_window).max(axis=1)
+    recent_low = sliding_window_view(low[:-1], sweep_window).min(axis=1)
+    h, l, c = high[sweep_window:], low[sweep_window:], close[sweep_window:]
+    tail = swept[sweep_window:]
+    tail[(h > recent_high) & (c < recent_high)] = -1
+    tail[(l < recent_low) & (c > recent_low)] = 1
+    return swept
+
+
+def bos_choch_columns(signal: np.ndarray):
+    """(BOS, CHOCH) int8 columns of a bos_choch_signal: 1 / -1 bullish / bearish, 0 none."""
+    bos = np.where((signal == 1) | (signal == -1), signal, 0).astype(np.int8)
+    choch = np.where((signal == 2) | (signal == -2), signal // 2, 0).astype(np.int8)
+    return bos, choch
+
+
+def enter_tag_codes(enter_long: np.ndarray, enter_short: np.ndarray) -> np.ndarray:
+    """Codes into ENTER_TAGS (a short entry overrides a long one, as in populate_entry_trend_simple)."""
+    return np.where(enter_short == 1, 2, np.where(enter_long == 1, 1, 0)).astype(np.int8)
+
+
+def entry_exit_signals(features: dict, high: np.ndarray, low: np.ndarray) -> dict:
+    """Same rules as AdvancedSMC.populate_entry_trend_simple / populate_exit_trend, as int8 arrays."""
+    in_ob = (low <= features['Top_OB']) & (high >= features['Bottom_OB'])
+    in_fvg = (low <= features['Top_FVG']) & (high >= features['Bottom_FVG'])
+    bos, swept, ob, fvg, choch = (features[c] for c in ('BOS', 'Swept', 'OB', 'FVG', 'CHOCH'))
+    long_entry = (bos == 1) & (swept == 1) & ((in_ob & (ob == 1)) | (in_fvg & (fvg == 1)))
+    short_entry = (bos == -1) & (swept == -1) & ((in_ob & (ob == -1)) | (in_fvg & (fvg == -1)))
+    return {
+        'enter_long': long_entry.astype(np.int8), 'enter_short': short_entry.astype(np.int8),
+        'exit_long': (choch == -1).astype(np.int8), 'exit_short': (choch == 1).astype(np.int8),
+    }
+
+
+def smc_features(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 swing_lookback: int = DEFAULT_SWING_LOOKBACK, ob_lookback: int = DEFAULT_OB_LOOKBACK,
+                 sweep_window: int = DEFAULT_SWEEP_WINDOW, signal: np.ndarray = None) -> dict:
+    """
+    All SMC columns of analyze_smc_features as {column: array}. `signal` (bos_choch_signal for
+    this swing_lookback) can be passed in to skip the swing and BOS/CHoCH passes.
+    """
+    features = {}
+    if signal is None:
+        features['swing_high'], features['swing_low'] = swing_points(high, low, swing_lookback)
+        signal = bos_choch_signal(high, low, features['swing_high'], features['swing_low'])
+    features['bos_choch_signal'] = signal
+    features['BOS'], features['CHOCH'] = bos_choch_columns(signal)
+    features['OB'], features['Top_OB'], features['Bottom_OB'] = order_blocks(open_, high, low, close, signal, ob_lookback)
+    features['FVG'], features['Top_FVG'], features['Bottom_FVG'] = fair_value_gaps(high, low)
+    features['Swept'] = liquidity_sweeps(high, low, close, sweep_window)
+    return features
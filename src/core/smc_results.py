@@ -0,0 +1,113 @@
+# src/core/smc_results.py
+"""
+Typed, compact results of AdvancedSMC.analyze_smc_structure.
+
+Every level and signal is a frozen slots dataclass holding plain Python floats / ints
+(no per-instance __dict__, no numpy scalars), grouped in tuples. Code written for the
+former nested dicts keeps working: records and containers answer `.get(key, default)`
+and `record['key']`, and to_dict() / to_plain() rebuild the dict form (JSON, exports).
+Measured by benchmarks/analysis_results.py (memory per cached analysis, pickling).
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class _Record:
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return hasattr(self, key)
+
+    def to_dict(self) -> dict:
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+    def __reduce__(self):
+        # Positional args instead of the frozen-dataclass __setstate__: ~10x faster, fewer bytes
+        return type(self), tuple(getattr(self, name) for name in self.__slots__)
+
+
+@dataclass(frozen=True, slots=True)
+class OrderBlock(_Record):
+    type: str  # 'bullish_ob' / 'bearish_ob'
+    high: float
+    low: float
+    time: int
+    strength: str = 'high'
+
+
+@dataclass(frozen=True, slots=True)
+class LiquidityZone(_Record):
+    type: str  # 'buy_side_liquidity' / 'sell_side_liquidity'
+    price: float
+    time: int
+    strength: str = 'high'
+
+
+@dataclass(frozen=True, slots=True)
+class FairValueGap(_Record):
+    type: str  # 'bullish_fvg' / 'bearish_fvg'
+    top: float
+    bottom: float
+    time: int
+    filled: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class StructureBreak(_Record):
+    type: str  # 'bullish_bos' / 'bearish_bos'
+    price: float
+    time: int
+    strength: str = 'confirmed'
+
+
+@dataclass(frozen=True, slots=True)
+class EntrySignal(_Record):
+    time: int
+    price: float
+    tag: str
+
+
+@dataclass(frozen=True, slots=True)
+class ExitSignal(_Record):
+    time: int
+    price: float
+
+
+@dataclass(frozen=True, slots=True)
+class TradingSignals(_Record):
+    entry_long: Tuple[EntrySignal, ...] = ()
+    entry_short: Tuple[EntrySignal, ...] = ()
+    exit_long: Tuple[ExitSignal, ...] = ()
+    exit_short: Tuple[ExitSignal, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class SMCAnalysis(_Record):
+    order_blocks: Tuple[OrderBlock, ...] = ()
+    liquidity_zones: Tuple[LiquidityZone, ...] = ()
+    fair_value_gaps: Tuple[FairValueGap, ...] = ()
+    break_of_structure: Tuple[StructureBreak, ...] = ()
+    trading_signals: TradingSignals = TradingSignals()
+
+
+def _plain(value):
+    if isinstance(value, _Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+def to_plain(result: Optional[dict]) -> Optional[dict]:
+    """An analysis result (get_trading_signals / the bot services) with every typed value as dicts and lists."""
+    if result is None:
+        return None
+    return {key: _plain(value) for key, value in result.items()}
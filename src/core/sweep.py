@@ -0,0 +1,286 @@
+# src/core/sweep.py
+"""
+Parallel parameter sweep of the SMC entry/exit signals over swing_lookback,
+ob_lookback (order-block search) and sweep_window (liquidity sweeps).
+
+The candles of all symbols are copied once into a shared-memory block (or, with
+--archive, memory-mapped from a candle_archive file); the worker processes attach to
+it and read them in place, so a task is only a parameter tuple in and one result row out. Every finished combination is appended to a JSONL
+checkpoint: a rerun with the same checkpoint skips what is already done. The result
+is a CSV ranked by --rank-by.
+
+    python -m src.core.sweep --top 20 --bars 3000 --swing 10,15,20,25,30 --ob 5,10,15,20 \
+        --sweep 3,5,8,13 --workers 4 --checkpoint sweep.jsonl --output sweep.csv
+    python -m src.core.sweep --archive binance-1h.smca --timeframe 1h --workers 4
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .backtest import DEFAULT_FEE, DEFAULT_SLIPPAGE, portfolio_stats, simulate
+from .candle_archive import CandleArchive
+from .smc_arrays import bos_choch_signal, entry_exit_signals, smc_features, swing_points
+
+logger = logging.getLogger(__name__)
+
+PARAMS = ('swing_lookback', 'ob_lookback', 'sweep_window')
+RANK_METRICS = ('total_return', 'profit_factor', 'win_rate', 'max_drawdown')
+
+
+class SharedCandles:
+    """OHLCV rows of many symbols in one shared-memory (n, 6) float64 block, one contiguous slice per symbol."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape, offsets: Dict[str, tuple], owner: bool):
+        self._shm = shm
+        self.shape = tuple(shape)
+        self.offsets = offsets
+        self.owner = owner
+        self.candles = np.ndarray(self.shape, dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, rows_by_symbol: Dict[str, list]) -> 'SharedCandles':
+        offsets, start = {}, 0
+        for symbol, rows in rows_by_symbol.items():
+            offsets[symbol] = (start, start + len(rows))
+            start += len(rows)
+        shape = (start, 6)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, start * 6 * 8))
+        shared = cls(shm, shape, offsets, owner=True)
+        for symbol, rows in rows_by_symbol.items():
+            begin, end = offsets[symbol]
+            shared.candles[begin:end] = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, shape, offsets: Dict[str, tuple]) -> 'SharedCandles':
+        return cls(shared_memory.SharedMemory(name=name), shape, offsets, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def handle(self) -> tuple:
+        """What a worker needs to attach: (name, shape, offsets)."""
+        return self.name, self.shape, self.offsets
+
+    @property
+    def symbols(self) -> list:
+        return list(self.offsets)
+
+    def symbol(self, symbol: str) -> np.ndarray:
+        begin, end = self.offsets[symbol]
+        return self.candles[begin:end]
+
+    def columns(self, symbol: str) -> tuple:
+        """(timestamp, open, high, low, close) of one symbol."""
+        c = self.symbol(symbol)
+        return c[:, 0].astype(np.int64), c[:, 1], c[:, 2], c[:, 3], c[:, 4]
+
+    def close(self):
+        self.candles = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class ArchivedCandles:
+    """One timeframe of a candle archive, read like SharedCandles: every process maps the same file pages."""
+
+    def __init__(self, path: str, timeframe: str, symbols: Optional[List[str]] = None):
+        self.archive = CandleArchive(path)
+        self.timeframe = timeframe
+        self.symbols = list(symbols or self.archive.symbols(timeframe))
+
+    @classmethod
+    def attach(cls, path: str, timeframe: str, symbols: List[str]) -> 'ArchivedCandles':
+        return cls(path, timeframe, symbols)
+
+    def handle(self) -> tuple:
+        return self.archive.path, self.timeframe, self.symbols
+
+    def columns(self, symbol: str) -> tuple:
+        timestamp, values = self.archive.candles(symbol, self.timeframe)
+        return timestamp, values[:, 0], values[:, 1], values[:, 2], values[:, 3]
+
+    def close(self):
+        pass
+
+
+# --- Worker side ---
+_worker = {}
+SOURCES = {'shared': SharedCandles, 'archive': ArchivedCandles}
+
+
+def _init_worker(source: str, handle: tuple, fee: float, slippage: float):
+    _worker['candles'] = SOURCES[source].attach(*handle)
+    _worker['fee'], _worker['slippage'] = fee, slippage
+    _worker['signal_cache'] = (None, {})
+
+
+def _bos_signals(swing_lookback: int) -> dict:
+    """bos_choch_signal per symbol; the grid is ordered by swing_lookback, so keep the last one."""
+    cached_lookback, signals = _worker['signal_cache']
+    if cached_lookback != swing_lookback:
+        signals = {}
+        for symbol in _worker['candles'].symbols:
+            _, _, high, low, _ = _worker['candles'].columns(symbol)
+            signals[symbol] = bos_choch_signal(high, low, *swing_points(high, low, swing_lookback))
+        _worker['signal_cache'] = (swing_lookback, signals)
+    return signals
+
+
+def evaluate(swing_lookback: int, ob_lookback: int, sweep_window: int) -> dict:
+    """Backtest one parameter combination over every symbol (runs in a worker)."""
+    started = time.perf_counter()
+    candles = _worker['candles']
+    bos_signals = _bos_signals(swing_lookback)
+    per_symbol_trades = {}
+    for symbol in candles.symbols:
+        timestamp, open_, high, low, close = candles.columns(symbol)
+        if len(timestamp) < swing_lookback * 2 + 1:
+            continue
+        features = smc_features(open_, high, low, close, swing_lookback, ob_lookback, sweep_window,
+                                signal=bos_signals[symbol])
+        signals = entry_exit_signals(features, high, low)
+        per_symbol_trades[symbol] = simulate(timestamp, open_, close, signals['enter_long'], signals['exit_long'],
+                                             signals['enter_short'], signals['exit_short'],
+                                             _worker['fee'], _worker['slippage'], symbol)
+    row = {'swing_lookback': swing_lookback, 'ob_lookback': ob_lookback, 'sweep_window': sweep_window}
+    row.update(portfolio_stats(per_symbol_trades))
+    row['seconds'] = round(time.perf_counter() - started, 4)
+    return row
+
+
+# --- Driver ---
+def parameter_grid(swing_lookbacks: Iterable[int], ob_lookbacks: Iterable[int], sweep_windows: Iterable[int]) -> List[tuple]:
+    """All combinations, swing_lookback outermost (workers reuse its BOS/CHoCH pass)."""
+    return list(itertools.product(swing_lookbacks, ob_lookbacks, sweep_windows))
+
+
+def load_checkpoint(path: Optional[str]) -> Dict[tuple, dict]:
+    done = {}
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # last line cut by an interrupted run
+                done[tuple(row[p] for p in PARAMS)] = row
+    return done
+
+
+def run_sweep(rows_by_symbol, grid: List[tuple], workers: int = 1,
+              checkpoint: Optional[str] = None, fee: float = DEFAULT_FEE, slippage: float = DEFAULT_SLIPPAGE) -> List[dict]:
+    """
+    Evaluate every combination of `grid` not already in `checkpoint`; returns all rows (old and new).
+    rows_by_symbol: {symbol: ccxt rows} (copied to shared memory) or an ArchivedCandles.
+    """
+    done = load_checkpoint(checkpoint)
+    pending = [combo for combo in grid if combo not in done]
+    archived = isinstance(rows_by_symbol, ArchivedCandles)
+    symbols = rows_by_symbol.symbols if archived else list(rows_by_symbol)
+    logger.info(f"Sweep: {len(grid)} combinations, {len(done)} from checkpoint, {len(pending)} to run "
+                f"on {len(symbols)} symbols with {workers} workers")
+    if not pending:
+        return [done[combo] for combo in grid if combo in done]
+
+    if archived:
+        source, shared = 'archive', rows_by_symbol
+    else:
+        source, shared = 'shared', SharedCandles.create(rows_by_symbol)
+    out = open(checkpoint, 'a', encoding='utf-8') if checkpoint else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(source, shared.handle(), fee, slippage)) as executor:
+            futures = [executor.submit(evaluate, *combo) for combo in pending]
+            for i, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                done[tuple(row[p] for p in PARAMS)] = row
+                if out is not None:
+                    out.write(json.dumps(row) + '\n')
+                    out.flush()
+                if i % 50 == 0 or i == len(futures):
+                    logger.info(f"Sweep: {i}/{len(futures)} done")
+    finally:
+        if out is not None:
+            out.close()
+        shared.close()
+    return [done[combo] for combo in grid if combo in done]
+
+
+def rank(rows: List[dict], by: str = 'total_return') -> List[dict]:
+    """Best first (lowest first for max_drawdown); rows without the metric go last."""
+    reverse = by != 'max_drawdown'
+    present = [r for r in rows if r.get(by) is not None]
+    missing = [r for r in rows if r.get(by) is None]
+    return sorted(present, key=lambda r: r[by], reverse=reverse) + missing
+
+
+def write_ranked_csv(rows: List[dict], path: str):
+    if not rows:
+        return
+    columns = ['rank'] + list(rows[0].keys())
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for i, row in enumerate(rows, 1):
+            writer.writerow(dict(row, rank=i))
+
+
+def _ints(text: str) -> List[int]:
+    return [int(v) for v in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchange', default='fake')
+    parser.add_argument('--archive', help='candle_archive file to read instead of the exchange')
+    parser.add_argument('--symbols', help='comma-separated pairs (default: --top by volume)')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--bars', type=int, default=3000, help='candles per symbol')
+    parser.add_argument('--swing', type=_ints, default=[10, 15, 20, 25, 30], help='swing_lookback values')
+    parser.add_argument('--ob', type=_ints, default=[5, 10, 15, 20], help='ob_lookback values')
+    parser.add_argument('--sweep', type=_ints, default=[3, 5, 8, 13], help='sweep_window values')
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE)
+    parser.add_argument('--slippage', type=float, default=DEFAULT_SLIPPAGE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--checkpoint', help='JSONL file of finished combinations (resumes from it)')
+    parser.add_argument('--rank-by', choices=RANK_METRICS, default='total_return')
+    parser.add_argument('--output', default='sweep.csv', help='ranked CSV')
+    args = parser.parse_args()
+
+    from .data_fetcher import get_exchange, get_top_symbols_by_volume, register_exchange
+    from .fake_exchange import HISTORY_BARS, FakeExchange, fetch_history
+
+    logging.basicConfig(level=logging.INFO)
+    if args.archive:
+        rows_by_symbol = ArchivedCandles(args.archive, args.timeframe, args.symbols.split(',') if args.symbols else None)
+    else:
+        if args.exchange == 'fake' and args.bars > HISTORY_BARS:
+            register_exchange('fake', lambda: FakeExchange(history_bars=args.bars))
+        symbols = args.symbols.split(',') if args.symbols else get_top_symbols_by_volume(args.exchange, args.top)
+        exchange = get_exchange(args.exchange)
+        rows_by_symbol = {symbol: fetch_history(exchange, symbol, args.timeframe, args.bars) for symbol in symbols}
+
+    started = time.perf_counter()
+    grid = parameter_grid(args.swing, args.ob, args.sweep)
+    rows = rank(run_sweep(rows_by_symbol, grid, args.workers, args.checkpoint, args.fee, args.slippage), args.rank_by)
+    write_ranked_csv(rows, args.output)
+    logger.info(f"Sweep of {len(grid)} combinations finished in {time.perf_counter() - started:.1f}s -> {args.output}")
+    print(json.dumps(rows[:5], indent=2))
+
+
+if __name__ == '__main__':
+    main()
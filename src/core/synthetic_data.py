@@ -0,0 +1,76 @@
+# src/core/synthetic_data.py
+"""
+Seeded synthetic OHLCV generators for benchmarks and offline runs.
+The same (kind, bars, seed, timeframe, end) always gives the same candles.
+
+Kinds:
+    trending   - drifting regimes that flip direction (many BOS / CHoCH)
+    ranging    - mean-reverting around the start price
+    gappy      - trending, with opening gaps between candles (many FVGs)
+    volatile   - fat-tailed returns with large wicks
+"""
+import numpy as np
+import pandas as pd
+
+from .data_fetcher import ohlcv_to_dataframe
+from .timeframes import candle_open, timeframe_to_seconds
+
+KINDS = ('trending', 'ranging', 'gappy', 'volatile')
+# Fixed default end time so generated candles do not depend on the clock
+DEFAULT_END_MS = 1_700_000_000_000
+
+
+def _returns(kind: str, bars: int, rng: np.random.Generator) -> np.ndarray:
+    if kind in ('trending', 'gappy'):
+        # Regimes of 15-80 bars with alternating drift
+        lengths = rng.integers(15, 80, size=bars // 15 + 1)
+        signs = np.where(np.arange(len(lengths)) % 2 == 0, 1.0, -1.0)
+        drift = np.repeat(signs * rng.uniform(0.001, 0.004, size=len(lengths)), lengths)[:bars]
+        return drift + rng.normal(0, 0.008, size=bars)
+    if kind == 'ranging':
+        noise = rng.normal(0, 0.006, size=bars)
+        log_price = np.empty(bars)
+        level = 0.0
+        for i in range(bars):
+            level += -0.05 * level + noise[i]  # Ornstein-Uhlenbeck around 0
+            log_price[i] = level
+        return np.diff(log_price, prepend=0.0)
+    if kind == 'volatile':
+        return rng.standard_t(3, size=bars) * 0.02
+    raise ValueError(f"Unknown synthetic kind {kind!r}, expected one of {KINDS}")
+
+
+def synthetic_ohlcv(kind: str = 'trending', bars: int = 200, seed: int = 0, timeframe: str = '1h',
+                    end_ms: int = DEFAULT_END_MS, start_price: float = 100.0) -> np.ndarray:
+    """Candles as a float64 array of shape (bars, 6): timestamp ms, open, high, low, close, volume."""
+    rng = np.random.default_rng([seed, KINDS.index(kind) if kind in KINDS else 0])
+    returns = np.clip(_returns(kind, bars, rng), -0.5, 0.5)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    if kind == 'gappy':
+        gaps = np.where(rng.random(bars) < 0.08, rng.normal(0, 0.02, size=bars), 0.0)
+        open_ = open_ * (1 + gaps)
+    wick = 0.02 if kind == 'volatile' else 0.004
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, wick, size=bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, wick, size=bars)))
+    volume = rng.lognormal(8, 1, size=bars)
+
+    step_ms = timeframe_to_seconds(timeframe) * 1000
+    end_ms = int(candle_open(timeframe, end_ms / 1000) * 1000)  # weeks open on Monday, like the exchanges
+    timestamps = end_ms - (bars - 1 - np.arange(bars)) * step_ms
+    return np.column_stack([timestamps, open_, high, low, close, volume])
+
+
+def synthetic_rows(kind: str = 'trending', bars: int = 200, seed: int = 0, timeframe: str = '1h',
+                   end_ms: int = DEFAULT_END_MS, start_price: float = 100.0) -> list:
+    """Same candles as ccxt-style rows ([int ms, o, h, l, c, v])."""
+    rows = synthetic_ohlcv(kind, bars, seed, timeframe, end_ms, start_price).tolist()
+    for row in rows:
+        row[0] = int(row[0])
+    return rows
+
+
+def synthetic_dataframe(kind: str = 'trending', bars: int = 200, seed: int = 0, timeframe: str = '1h',
+                        end_ms: int = DEFAULT_END_MS, start_price: float = 100.0) -> pd.DataFrame:
+    """Same candles as the DataFrame used by the analysis."""
+    return ohlcv_to_dataframe(synthetic_rows(kind, bars, seed, timeframe, end_ms, start_price))
@@ -0,0 +1,38 @@
+# src/core/timeframes.py
+# Không import pandas/ccxt ở đây: module này được dùng lúc khởi động bot
+import calendar
+import time
+
+_TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000}
+# Exchange weeks open on Monday 00:00 UTC; the epoch (1970-01-01) was a Thursday
+_WEEK_OFFSET = 4 * 86400
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """'15m' -> 900, '4h' -> 14400, '1w' -> 604800 (same units as ccxt; '1M' counts 30 days)."""
+    return int(timeframe[:-1]) * _TIMEFRAME_UNITS[timeframe[-1]]
+
+def _month_start(months: int) -> int:
+    """Unix time of the first day of the month `months` months after January 1970."""
+    year, month = divmod(months, 12)
+    return calendar.timegm((1970 + year, month + 1, 1, 0, 0, 0))
+
+def _candle_bounds(timeframe: str, now: float) -> tuple:
+    """(open, close) of the candle open at `now`: weeks start on Monday, months on the 1st (UTC)."""
+    if timeframe[-1] == 'M':
+        count = int(timeframe[:-1])
+        t = time.gmtime(now)
+        index = (t.tm_year - 1970) * 12 + t.tm_mon - 1
+        index -= index % count
+        return _month_start(index), _month_start(index + count)
+    step = timeframe_to_seconds(timeframe)
+    offset = _WEEK_OFFSET if timeframe[-1] == 'w' else 0
+    opened = (now - offset) // step * step + offset
+    return opened, opened + step
+
+def candle_open(timeframe: str, now: float) -> float:
+    """Unix time at which the candle open at `now` opened."""
+    return _candle_bounds(timeframe, now)[0]
+
+def next_candle_close(timeframe: str, now: float) -> float:
+    """Unix time at which the candle open at `now` closes."""
+    return _candle_bounds(timeframe, now)[1]
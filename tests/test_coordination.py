@@ -0,0 +1,109 @@
+# tests/test_coordination.py
+from src.core.coordination import Coordinator, HashRing, MemoryLeaseBackend, SQLiteLeaseBackend
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _replicas(backend, clock, names, mode='leader'):
+    return [Coordinator(backend, mode=mode, replica_id=name, lease_seconds=15, clock=clock) for name in names]
+
+
+def test_leader_keeps_lease_while_renewing():
+    clock = Clock()
+    a, b = _replicas(MemoryLeaseBackend(clock), clock, ['a', 'b'])
+    a.tick()
+    b.tick()
+    assert a.is_leader and not b.is_leader
+    for _ in range(5):
+        clock.now += 10
+        a.tick()
+        b.tick()
+        assert a.is_leader and not b.is_leader
+    assert a.runs_jobs() and not b.runs_jobs()
+
+
+def test_lease_taken_over_after_expiry():
+    clock = Clock()
+    a, b = _replicas(MemoryLeaseBackend(clock), clock, ['a', 'b'])
+    a.tick()
+    b.tick()
+    clock.now += 14.9  # a stops renewing (dead or partitioned)
+    b.tick()
+    assert not b.is_leader
+    clock.now += 0.2
+    # a's own view expires with the lease, so the two never lead at the same time
+    assert not a.is_leader
+    b.tick()
+    assert b.is_leader
+    a.tick()
+    assert not a.is_leader
+
+
+def test_stop_hands_over_at_once():
+    clock = Clock()
+    a, b = _replicas(MemoryLeaseBackend(clock), clock, ['a', 'b'])
+    a.tick()
+    a.stop()
+    b.tick()
+    assert b.is_leader and not a.is_leader
+
+
+def test_sqlite_backend_lease(tmp_path):
+    clock = Clock()
+    backend = SQLiteLeaseBackend(str(tmp_path / 'coordination.db'), clock=clock)
+    assert backend.acquire('jobs', 'a', 15)
+    assert not backend.acquire('jobs', 'b', 15)
+    assert backend.acquire('jobs', 'a', 15)
+    clock.now += 16
+    assert backend.acquire('jobs', 'b', 15)
+    backend.release('jobs', 'a')  # not the holder: no effect
+    assert not backend.acquire('jobs', 'a', 15)
+    backend.heartbeat('a', 15)
+    backend.heartbeat('b', 5)
+    clock.now += 10
+    assert backend.members() == ['a']
+
+
+def test_hash_ring_moves_only_the_keys_of_a_removed_member():
+    keys = [f"SYM{i}/USDT" for i in range(2000)]
+    before = HashRing(['a', 'b', 'c'])
+    after = HashRing(['a', 'c'])
+    owners = {key: before.owner(key) for key in keys}
+    for key in keys:
+        if owners[key] != 'b':
+            assert after.owner(key) == owners[key]
+        else:
+            assert after.owner(key) in ('a', 'c')
+    shares = [sum(owner == member for owner in owners.values()) / len(keys) for member in 'abc']
+    assert all(0.2 < share < 0.47 for share in shares)
+
+
+def test_hash_ring_is_the_same_in_every_replica():
+    assert HashRing(['b', 'a']).owner('BTC/USDT') == HashRing(['a', 'b']).owner('BTC/USDT')
+    assert HashRing([]).owner('BTC/USDT') is None
+
+
+def test_shard_rebalances_when_a_replica_dies():
+    clock = Clock()
+    replicas = _replicas(MemoryLeaseBackend(clock), clock, ['a', 'b', 'c'], mode='shard')
+    for replica in replicas:
+        replica.tick()
+    for replica in replicas:
+        replica.tick()  # every replica now sees all the members
+    keys = [f"SYM{i}/USDT" for i in range(300)]
+    assert all(sum(r.owns(key) for r in replicas) == 1 for key in keys)
+    assert all(r.runs_jobs() for r in replicas)
+
+    survivors = replicas[:2]  # c stops heartbeating
+    for _ in range(4):
+        clock.now += 5
+        for replica in survivors:
+            replica.tick()
+    assert all(r.stats()['members'] == ['a', 'b'] for r in survivors)
+    assert all(sum(r.owns(key) for r in survivors) == 1 for key in keys)
@@ -0,0 +1,76 @@
+# tests/test_price_alert_service.py
+from src.bot.services.price_alert_service import PriceAlertService
+
+
+def make_service(path='', clock=lambda: 1_700_000_000.0):
+    return PriceAlertService(persistence_file=path, clock=clock)
+
+
+def fired_prices(alerts):
+    return sorted(a.price for a in alerts)
+
+
+def test_crossing_up_and_down_fires_once():
+    service = make_service()
+    for price in (90, 100, 110):
+        service.add(1, 'BTC/USDT', price)
+    assert service.update_price('BTC/USDT', 95) == []  # no previous price yet
+    assert fired_prices(service.update_price('BTC/USDT', 100)) == [100]  # the level itself counts
+    assert service.update_price('BTC/USDT', 99) == []
+    assert fired_prices(service.update_price('BTC/USDT', 89)) == [90]
+    assert service.update_price('BTC/USDT', 120) != []
+    assert service.update_price('BTC/USDT', 80) == [] and service.symbols() == []
+
+
+def test_current_price_seeds_the_previous_price():
+    service = make_service()
+    service.add(1, 'ETH/USDT', 2000, current_price=1900)
+    assert fired_prices(service.update_price('ETH/USDT', 2100)) == [2000]
+
+
+def test_a_gap_fires_every_level_in_between():
+    service = make_service()
+    for user_id, price in [(1, 10), (2, 20), (3, 30), (1, 40), (2, 20.5)]:
+        service.add(user_id, 'SOL/USDT', price)
+    service.update_price('SOL/USDT', 35)
+    assert fired_prices(service.update_price('SOL/USDT', 15)) == [20, 20.5, 30]
+    assert [a.price for a in service.get_user_alerts(1)] == [10, 40]
+
+
+def test_limits_and_duplicates():
+    service = PriceAlertService(persistence_file='', max_per_user=2)
+    assert service.add(1, 'BTC/USDT', 100)['success']
+    assert not service.add(1, 'BTC/USDT', 100)['success']
+    assert not service.add(1, 'BTC/USDT', -1)['success']
+    assert service.add(1, 'BTC/USDT', 101)['success']
+    assert not service.add(1, 'BTC/USDT', 102)['success']
+    assert service.add(2, 'BTC/USDT', 100)['success']
+
+
+def test_replicas_merge_through_the_file(tmp_path):
+    path = str(tmp_path / 'alerts.json')
+    first, second = make_service(path), make_service(path)
+    a = first.add(1, 'BTC/USDT', 100)['alert']
+    b = second.add(2, 'BTC/USDT', 200)['alert']
+    assert a.id != b.id
+    assert {x.price for x in first.get_user_alerts(2)} == {200}
+    # first fires #a: it is saved lazily and must not come back on the next reload
+    first.update_price('BTC/USDT', 90)
+    assert fired_prices(first.update_price('BTC/USDT', 150)) == [100]
+    c = second.add(2, 'ETH/USDT', 3000)['alert']
+    assert first.stats() == {'alerts': 2, 'symbols': 2, 'users': 1}
+    first.save_if_dirty()
+    third = make_service(path)
+    assert sorted(x.id for x in third.get_user_alerts(2)) == sorted([b.id, c.id])
+    assert third.get_user_alerts(1) == []
+    assert second.stats()['alerts'] == 2
+
+
+def test_last_prices_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'alerts.json')
+    service = make_service(path)
+    service.add(1, 'BTC/USDT', 100)
+    service.update_price('BTC/USDT', 90)
+    service.add(1, 'BTC/USDT', 120)  # saves with the last price
+    restarted = make_service(path)
+    assert fired_prices(restarted.update_price('BTC/USDT', 110)) == [100]
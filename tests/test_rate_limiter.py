@@ -0,0 +1,97 @@
+# tests/test_rate_limiter.py
+import asyncio
+import threading
+import time
+
+import ccxt
+
+from src.core.rate_limiter import RateLimiter
+
+
+def drained(clock=time.monotonic, pause=0.05):
+    """100 weight/s, no burst, nothing granted for `pause` seconds: every request queues."""
+    limiter = RateLimiter('test', 6000, headroom=1.0, burst_seconds=0, clock=clock)
+    limiter.tokens = 0.0
+    limiter.paused_until = clock() + pause
+    return limiter
+
+
+def test_finish_tags_interleave_classes_by_weight():
+    limiter = drained()
+    tags = {name: limiter._enqueue(1, cls)[0] for name, cls in
+            [('s0', 'scanner'), ('w0', 'watchlist'), ('w1', 'watchlist'), ('i0', 'interactive')]}
+    assert tags == {'s0': 0.5, 'w0': 0.25, 'w1': 0.5, 'i0': 0.125}
+
+
+def test_async_waiters_are_served_in_wfq_order():
+    limiter = drained()
+    order = []
+    checks = []
+    grant = limiter._grant
+
+    def counted(entry, weight):
+        checks.append(entry)
+        return grant(entry, weight)
+
+    limiter._grant = counted
+
+    async def request(tag, priority_class):
+        await limiter.acquire_async(1, priority_class)
+        order.append(tag)
+
+    async def main():
+        await asyncio.gather(*[request(f"s{i}", 'scanner') for i in range(6)],
+                             *[request(f"w{i}", 'watchlist') for i in range(6)])
+
+    asyncio.run(main())
+    # watchlist weighs twice a scanner; equal finish tags go to the earlier request
+    assert order == ['w0', 's0', 'w1', 'w2', 's1', 'w3', 'w4', 's2', 'w5', 's3', 's4', 's5']
+    # Woken at the head of the queue instead of polling: a few checks per request
+    assert len(checks) <= 12 * 4
+    assert limiter.stats()['waiting'] == 0
+
+
+def test_threads_and_coroutines_share_the_queue():
+    limiter = drained()
+    order = []
+    thread = threading.Thread(target=lambda: (limiter.acquire(1, 'interactive'), order.append('sync')))
+
+    async def request(tag):
+        await limiter.acquire_async(1, 'backfill')
+        order.append(tag)
+
+    async def main():
+        tasks = [asyncio.create_task(request(f"b{i}")) for i in range(3)]
+        await asyncio.sleep(0.01)  # backfill requests queue first
+        thread.start()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    thread.join(timeout=5)
+    assert order[0] == 'sync' and sorted(order[1:]) == ['b0', 'b1', 'b2']
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = drained(pause=60)
+
+    async def main():
+        task = asyncio.create_task(limiter.acquire_async(1, 'scanner'))
+        await asyncio.sleep(0.01)
+        assert limiter.stats()['waiting'] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert limiter.stats()['waiting'] == 0
+
+
+def test_rate_limit_error_halves_the_rate_and_pauses():
+    now = [1000.0]
+    limiter = RateLimiter('test', 600, headroom=1.0, burst_seconds=60, clock=lambda: now[0])
+    limiter.on_error(ccxt.DDoSProtection('429'), headers={'Retry-After': '7'})
+    assert limiter.factor == 0.5 and limiter.tokens == 0.0
+    assert limiter.paused_until == 1007.0
+    limiter.on_error(ccxt.NetworkError('timeout'))
+    assert limiter.factor == 0.5
+    now[0] += 10
+    assert limiter.stats()['tokens'] == 50.0  # 10 s at half of 10 weight/s
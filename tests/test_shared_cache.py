@@ -0,0 +1,110 @@
+# tests/test_shared_cache.py
+import calendar
+import threading
+import time
+
+import pytest
+
+from src.core.fake_redis import FakeRedisServer
+from src.core.shared_cache import RedisStore, SharedAnalysisCache, SQLiteStore
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_store(request, tmp_path):
+    servers = []
+
+    def make(clock):
+        if request.param == 'sqlite':
+            return SQLiteStore(str(tmp_path / 'cache.db'), clock=clock)
+        server = FakeRedisServer(port=0, clock=clock).start()
+        servers.append(server)
+        return RedisStore(port=server.port)
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+def test_result_is_computed_once_per_candle(make_store):
+    clock = Clock()
+    cache = SharedAnalysisCache(make_store(clock), clock=clock)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'price': len(calls)}
+
+    assert cache.get_or_compute('binance', 'BTC/USDT', '1h', compute) == {'price': 1}
+    assert cache.get_or_compute('binance', 'BTC/USDT', '1h', compute) == {'price': 1}
+    assert len(calls) == 1 and cache.stats()['hit'] == 1
+    clock.now += 3600  # next candle: new key
+    assert cache.get_or_compute('binance', 'BTC/USDT', '1h', compute) == {'price': 2}
+
+
+def test_empty_results_are_not_cached(make_store):
+    clock = Clock()
+    cache = SharedAnalysisCache(make_store(clock), clock=clock)
+    assert cache.get_or_compute('binance', 'BTC/USDT', '1h', lambda: None) is None
+    assert cache.get_or_compute('binance', 'BTC/USDT', '1h', lambda: {'ok': 1}) == {'ok': 1}
+
+
+def test_expired_lock_owner_does_not_release_the_new_holder(make_store):
+    clock = Clock()
+    cache = SharedAnalysisCache(make_store(clock), lock_seconds=30, clock=clock)
+    first = cache._try_lock('k')
+    assert first is not None and cache._try_lock('k') is None
+    clock.now += 31  # first's compute outlived the lock
+    second = cache._try_lock('k')
+    assert second is not None
+    cache._unlock('k', first)
+    assert cache._try_lock('k') is None
+    cache._unlock('k', second)
+    assert cache._try_lock('k') is not None
+
+
+def test_deadline_path_leaves_the_lock_alone(make_store):
+    clock = Clock()
+    store = make_store(clock)
+    holder = SharedAnalysisCache(store, lock_seconds=30, clock=clock)
+    key, _ = holder.key('binance', 'BTC/USDT', '1h')
+    assert holder._try_lock(key) is not None
+    impatient = SharedAnalysisCache(store, lock_seconds=0, clock=clock)
+    assert impatient.get_or_compute('binance', 'BTC/USDT', '1h', lambda: {'ok': 1}) == {'ok': 1}
+    assert holder._try_lock(key) is None
+
+
+def test_concurrent_misses_compute_once(tmp_path):
+    cache = SharedAnalysisCache(SQLiteStore(str(tmp_path / 'cache.db')))
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'ok': 1}
+
+    threads = [threading.Thread(target=lambda: results.append(
+        cache.get_or_compute('binance', 'BTC/USDT', '1h', compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{'ok': 1}] * 8
+    assert cache.stats()['wait_hit'] == 7
+
+
+def test_weekly_key_follows_the_exchange_week(tmp_path):
+    thursday = calendar.timegm((2026, 10, 15, 13, 0, 0))
+    monday, next_monday = calendar.timegm((2026, 10, 12, 0, 0, 0)), calendar.timegm((2026, 10, 19, 0, 0, 0))
+    cache = SharedAnalysisCache(SQLiteStore(str(tmp_path / 'cache.db')), ttl=10 ** 7, clock=lambda: thursday)
+    key, ttl = cache.key('binance', 'BTC/USDT', '1w')
+    assert key.endswith(f":1w:{monday}")
+    assert ttl == next_monday - thursday
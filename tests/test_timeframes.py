@@ -0,0 +1,28 @@
+# tests/test_timeframes.py
+import calendar
+
+from src.core.timeframes import candle_open, next_candle_close, timeframe_to_seconds
+
+
+def utc(*fields):
+    return calendar.timegm(fields + (0,) * (6 - len(fields)))
+
+
+def test_intraday_candles_align_on_the_epoch():
+    now = utc(2026, 10, 15, 13, 37)
+    assert timeframe_to_seconds('4h') == 14400
+    assert candle_open('4h', now) == utc(2026, 10, 15, 12)
+    assert next_candle_close('15m', now) == utc(2026, 10, 15, 13, 45)
+
+
+def test_weeks_open_on_monday():
+    assert candle_open('1w', utc(2026, 10, 15, 13)) == utc(2026, 10, 12)
+    assert candle_open('1w', utc(2026, 10, 12)) == utc(2026, 10, 12)
+    assert next_candle_close('1w', utc(2026, 10, 18, 23, 59)) == utc(2026, 10, 19)
+
+
+def test_months_follow_the_calendar():
+    assert candle_open('1M', utc(2026, 2, 14)) == utc(2026, 2, 1)
+    assert next_candle_close('1M', utc(2026, 2, 14)) == utc(2026, 3, 1)
+    assert next_candle_close('1M', utc(2026, 12, 31, 23)) == utc(2027, 1, 1)
+    assert candle_open('3M', utc(2026, 5, 20)) == utc(2026, 4, 1)